@@ -27,7 +27,7 @@ if __name__ == "__main__":
     print(ast.get_symbols())
     symbols = ast.get_symbols()
     name_map = {"x": "y", "c_54": "c_64"}
-    _fol_lan.name_remap(name_map, ast)
+    ast = _fol_lan.name_remap(name_map, ast)
     print(ast)
     print("")
     # parser = FOL_Parser()
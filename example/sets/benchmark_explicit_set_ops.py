@@ -0,0 +1,41 @@
+""" Measure the per-operation overhead of ExplicitSet
+
+Each operation is applied on sets with the same variables, so the time is dominated by
+the construction of the result and the conversion between the internal and the ordered variables.
+"""
+from contractda.sets import ExplicitSet
+from contractda.vars._var import CategoricalVar
+import random
+import timeit
+
+def make_sets(num_vars: int, num_elems: int, seed: int = 0):
+    rng = random.Random(seed)
+    # declare the variables in the reverse order of their ids so that the internal order differs from the given one
+    vars = [CategoricalVar(f"v{i:02d}", range(0, 8)) for i in reversed(range(num_vars))]
+    sets = []
+    for _ in range(2):
+        expr = {tuple([rng.randrange(0, 8) for _ in vars]) for _ in range(num_elems)}
+        sets.append(ExplicitSet(vars, list(expr)))
+    return vars, sets
+
+def chain(set1: ExplicitSet, set2: ExplicitSet) -> ExplicitSet:
+    ret = set1.union(set2)
+    ret = ret.intersect(set1)
+    ret = ret.difference(set2)
+    return ret.union(set2)
+
+if __name__ == "__main__":
+    repeat = 20
+    for num_vars, num_elems in [(4, 1000), (8, 10000), (16, 10000)]:
+        vars, (set1, set2) = make_sets(num_vars, num_elems)
+        expr = list(set1.ordered_expr)
+        cases = {
+            "construct": lambda: ExplicitSet(vars, expr),
+            "chained ops (4)": lambda: chain(set1, set2),
+            "ordered_expr": lambda: set1.ordered_expr,
+            "iterate": lambda: [elem for elem in set1],
+        }
+        print(f"vars = {num_vars}, elements = {num_elems}")
+        for name, case in cases.items():
+            elapsed = min(timeit.repeat(case, number=1, repeat=repeat))
+            print(f"    {name:<16} {elapsed * 1e3:9.3f} ms")
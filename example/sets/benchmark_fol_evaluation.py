@@ -0,0 +1,38 @@
+""" Measure the membership checks of FOLClauseSet by the compiled clause against the interpreter
+
+Each check evaluates the same clause on a different element, as a runtime monitor does.
+"""
+from contractda.sets import FOLClauseSet
+from contractda.vars import RealVar
+import random
+import timeit
+
+def make_clause_set(num_vars: int, num_atoms: int, seed: int = 0):
+    rng = random.Random(seed)
+    vars = [RealVar(f"x{i}") for i in range(num_vars)]
+    atoms = []
+    for _ in range(num_atoms):
+        a, b = rng.sample(vars, 2)
+        atoms.append(f"({a.id} + {rng.randint(1, 9)} * {b.id} {rng.choice(['<=', '>=', '!='])} {rng.randint(0, 50)})")
+    # a conjunction of implications, so most atoms are evaluated
+    expr = " && ".join([f"({atoms[i]} -> {atoms[i + 1]})" for i in range(0, num_atoms - 1, 2)])
+    return vars, FOLClauseSet(vars=vars, expr=expr)
+
+if __name__ == "__main__":
+    number = 2000
+    rng = random.Random(1)
+    for num_vars, num_atoms in [(4, 8), (16, 32), (64, 128)]:
+        vars, clause_set = make_clause_set(num_vars, num_atoms)
+        elements = [{var: rng.uniform(-10, 10) for var in vars} for _ in range(number)]
+        tables = [{var.id: val for var, val in element.items()} for element in elements]
+        root = clause_set.expr.root
+        clause_set.expr.compile()
+        cases = {
+            "interpreter": lambda: [root.evaluate(table) for table in tables],
+            "compiled": lambda: [clause_set.expr.evaluate(table) for table in tables],
+            "is_contain": lambda: [clause_set.is_contain(element) for element in elements],
+        }
+        print(f"vars = {num_vars}, atoms = {num_atoms}, checks = {number}")
+        for name, case in cases.items():
+            elapsed = min(timeit.repeat(case, number=1, repeat=5))
+            print(f"    {name:<12} {elapsed * 1e6 / number:9.2f} us/check")
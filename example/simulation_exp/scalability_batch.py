@@ -0,0 +1,50 @@
+from contractda.vars import Var, RealVar
+from contractda.sets import FOLClauseSet
+import numpy as np
+import random
+import time
+
+operator_expression = [">=", ">", "<", "<=", "!="]
+operator_clause = ["&&", "||", "->"]
+
+def random_generation_test(depth: int, variables: list[Var]):
+    # Randomly generate a FOL clause with needed depth
+    if depth == 1:
+        v1, v2 = random.sample(variables, 2)
+        operator = random.choice(operator_expression)
+        return f"{v1.id} + {random.uniform(0, 2):.3f} * {v2.id} {operator} {random.uniform(0, 100):.3f}"
+
+    operator = random.choice(operator_clause)
+    c1 = random_generation_test(depth - 1, variables=variables)
+    c2 = random_generation_test(depth - 1, variables=variables)
+    return f"({c1}) {operator} ({c2})"
+
+def recorded_rows(variables: list[Var], num_rows: int, seed: int = 0) -> dict[Var, np.ndarray]:
+    # the port values recorded by a test bench
+    rng = np.random.default_rng(seed)
+    return {var: rng.uniform(0, 100, num_rows) for var in variables}
+
+if __name__ == "__main__":
+    random.seed(10)
+    n_var = 20
+    variables = [RealVar(f"v_{i}") for i in range(n_var)]
+    # the rows checked one by one, the time of the other rows is extrapolated
+    n_row_checks = 10000
+
+    for depth in [2, 4, 6]:
+        guarantee = FOLClauseSet(variables, random_generation_test(depth, variables))
+        for num_rows in [10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]:
+            columns = recorded_rows(variables, num_rows)
+
+            start_time = time.perf_counter()
+            rows = min(num_rows, n_row_checks)
+            expected = [guarantee.is_contain({var: column[row] for var, column in columns.items()}) for row in range(rows)]
+            row_time = (time.perf_counter() - start_time) * num_rows / rows
+
+            start_time = time.perf_counter()
+            ret = guarantee.contains_batch(columns)
+            batch_time = time.perf_counter() - start_time
+            assert (ret[:rows] == np.array(expected)).all()
+
+            print(f"depth = {depth}, rows = {num_rows:>8}: per row {row_time:8.3f} s, batch {batch_time:8.3f} s, "
+                  f"speedup {row_time / batch_time:6.1f}x, {int(ret.sum())} rows satisfy the guarantee")
@@ -1,10 +1,9 @@
 import copy
 
 from contractda.contracts._contract_base import ContractBase
-from contractda.sets import SetBase, FOLClauseSet, ExplicitSet
+from contractda.sets import SetBase, FOLClauseSet, ExplicitSet, MDDSet
 from contractda.vars import Var
-from contractda.solvers import SolverInterface
-from contractda.sets._fol_lan import name_remap
+from contractda.solvers import SolverInterface, QueryCache, SolverSession
 
 from contractda.logger._logger import LOG
 
@@ -107,11 +106,13 @@ class AGContract(ContractBase):
     ##################################
     #   Contract Property
     ##################################
-    def is_receptive(self, solver: SolverInterface = None) -> bool:
+    def is_receptive(self, solver: SolverInterface = None, session: SolverSession = None) -> bool:
         """ Whether the contract is recptive
 
         Receptive means for each targeted environment, there is a allowed behavior.
 
+        :param SolverInterface solver: the solver for the check, a new solver is used if None
+        :param SolverSession session: the session answering the check, cannot be given with solver
         :return: True if the contract is receptive, False if not
         :rtype: bool
         """
@@ -120,29 +121,8 @@ class AGContract(ContractBase):
 
         
         if isinstance(self.guarantee, FOLClauseSet):
-            if solver is None:
-                solver = self.assumption._solver_type()
-            # ensure all variables are encoded
-            vars_map = {v.id: solver.get_fresh_variable(v.id, sort=v.type_str) for v in self.vs}
-            # encode both guarantee and assumption
-            var_map, encoded_guarantee = self.guarantee.encode(solver=solver, vars=self.guarantee.vars, clause=self.guarantee.expr, vars_map=vars_map)
-            var_map, encoded_assumption = self.assumption.encode(solver=solver, vars=self.assumption.vars, clause=self.assumption.expr, vars_map=vars_map)
-            # prepare quantifier variables
-            exist_vs = [var_map[v.id] for v in self.non_assumption_vs]
-            # form the clause for checking
-            if exist_vs:
-                encoded_clause = solver.clause_and(encoded_assumption, 
-                                                solver.clause_not(
-                                                    solver.clause_exists(exist_vs, encoded_guarantee)))
-            else:
-                #empty due to same variables in assumption and guarantee
-                encoded_clause = solver.clause_and(encoded_assumption, 
-                                                solver.clause_not(encoded_guarantee))
-            # solve the existencde
-            solver.add_conjunction_clause(encoded_clause)
-            exist_counter_example = solver.check()
-            return not exist_counter_example  
-        elif isinstance(self.guarantee, ExplicitSet):
+            return self._is_behavior_available(self.assumption, self.guarantee, solver=solver, session=session)
+        elif isinstance(self.guarantee, (ExplicitSet, MDDSet)):
             # Explicit set
             # find the counter example that if there is a input without behavior
             # we can use projection to achieve this
@@ -152,26 +132,30 @@ class AGContract(ContractBase):
         else:
             raise NotImplementedError
 
-    def is_compatible(self) -> bool:
+    def is_compatible(self, session: SolverSession = None) -> bool:
         """ Whether the contract is compatible
 
         A contract is compatible if the implementation set is not empty
         Receptive means for each targeted environment, there is a allowed behavior.
 
+        :param SolverSession session: the session answering the check for first order logic sets, a new solver is used if None
         :return: True if the contract is compatible, False if not
         :rtype: bool
         """
-        return self.implementation.is_satifiable()
+        implementation = self.implementation
+        return implementation.is_satifiable(**self._session_kwargs(session, implementation))
 
-    def is_consistent(self) -> bool:
+    def is_consistent(self, session: SolverSession = None) -> bool:
         """ Whether the contract is consistent
 
         A contract is consistent if the environment set is not empty
 
+        :param SolverSession session: the session answering the check for first order logic sets, a new solver is used if None
         :return: True if the contract is consistent, False if not
         :rtype: bool
         """
-        return self.environment.is_satifiable()
+        environment = self.environment
+        return environment.is_satifiable(**self._session_kwargs(session, environment))
     ##################################
     #   Contract Operations
     ##################################
@@ -308,13 +292,14 @@ class AGContract(ContractBase):
     ##################################
     #   Contract Relations
     ##################################
-    def is_refined_by(self, other: ContractBase) -> bool:
+    def is_refined_by(self, other: ContractBase, session: SolverSession = None) -> bool:
         """ Whether the contract is refined by the other contract
 
         A contract is refined by the other contract if the all the implementations of the new contract satisfy the original contract 
         and they can work under the environment required by the original contract.
 
         :param ContractBase others: all the subsystem contracts of :py:class:`~contract.contracts.ContractBase` 
+        :param SolverSession session: the session answering the checks for first order logic sets, a new solver is used if None
         :return: True if the contract is refined by the others, False if not
         :rtype: bool
         """
@@ -326,7 +311,7 @@ class AGContract(ContractBase):
         g1 = self.implementation
         g2 = other.implementation
 
-        return a1.is_subset(a2) and g2.is_subset(g1)
+        return a1.is_subset(a2, **self._session_kwargs(session, a1, a2)) and g2.is_subset(g1, **self._session_kwargs(session, g1, g2))
 
     def is_conformed_by(self, other: ContractBase) -> bool:
         """Whether the contract is conformed by the other contract
@@ -350,7 +335,7 @@ class AGContract(ContractBase):
         """
         return self.is_conformed_by(other) and self.is_refined_by(other)
 
-    def is_strongly_replaceable_by(self, other: ContractBase, solver: SolverInterface = None) -> bool:
+    def is_strongly_replaceable_by(self, other: ContractBase, solver: SolverInterface = None, session: SolverSession = None) -> bool:
         """ Check if the contract is strongly replaceable by the other contract
 
         Contract A is strongly replaceable by contract B if contract B has behavior for all targeted environment of A.
@@ -362,6 +347,8 @@ class AGContract(ContractBase):
         the final one must strongly replace the original system contract and thus we can implementation a design that is not vacuous.
 
         :param ContractBase other: the other contract to be checked if it strongly replaces this contract
+        :param SolverInterface solver: the solver for the check, a new solver is used if None
+        :param SolverSession session: the session answering the check, cannot be given with solver
         :return: True if the contract is strongly replaceable by the other, False if not
         :rtype: bool
         """
@@ -369,29 +356,8 @@ class AGContract(ContractBase):
         # (A! && ! Exists(v not in A1, G2))
         
         if isinstance(other.guarantee, FOLClauseSet):
-            if solver is None:
-                solver = self.assumption._solver_type()
-            # ensure all variables are encoded
-            vars_map = {v.id: solver.get_fresh_variable(v.id, sort=v.type_str) for v in self.vs}
-            # encode both guarantee and assumption
-            var_map, encoded_guarantee = other.guarantee.encode(solver=solver, vars=other.guarantee.vars, clause=other.guarantee.expr, vars_map=vars_map)
-            var_map, encoded_assumption = self.assumption.encode(solver=solver, vars=self.assumption.vars, clause=self.assumption.expr, vars_map=vars_map)
-            # prepare quantifier variables
-            exist_vs = [var_map[v.id] for v in self.non_assumption_vs]
-            # form the clause for checking
-            if exist_vs:
-                encoded_clause = solver.clause_and(encoded_assumption, 
-                                                solver.clause_not(
-                                                    solver.clause_exists(exist_vs, encoded_guarantee)))
-            else:
-                #empty due to same variables in assumption and guarantee
-                encoded_clause = solver.clause_and(encoded_assumption, 
-                                                solver.clause_not(encoded_guarantee))
-            # solve the existencde
-            solver.add_conjunction_clause(encoded_clause)
-            exist_counter_example = solver.check()
-            return not exist_counter_example  
-        elif isinstance(other.guarantee, ExplicitSet):
+            return self._is_behavior_available(self.assumption, other.guarantee, solver=solver, session=session)
+        elif isinstance(other.guarantee, (ExplicitSet, MDDSet)):
             # Explicit set
             # find the counter example that if there is a input without behavior
             # we can use projection to achieve this
@@ -402,7 +368,7 @@ class AGContract(ContractBase):
         else:
             raise NotImplementedError()
 
-    def is_replaceable_by(self, other: ContractBase, solver: SolverInterface = None) -> bool:
+    def is_replaceable_by(self, other: ContractBase, solver: SolverInterface = None, session: SolverSession = None) -> bool:
         """ Check if the contract is replaceable by the other contract
 
         Contract A is replaceable by contract B if contract B has behavior under some targeted environment of A.
@@ -410,6 +376,7 @@ class AGContract(ContractBase):
         Replaceability is an important property to ensure we can implementation a nonvacuous design of the original contract based on the refined contract.
 
         :param ContractBase other: the other contract to be checked if it replaces this contract
+        :param SolverSession session: the session answering the check, a new solver is used if None
         :return: True if the contract is strongly replaceable by the other, False if not
         :rtype: bool
         """
@@ -420,14 +387,79 @@ class AGContract(ContractBase):
         if isinstance(other.guarantee, FOLClauseSet):
             if solver is not None:
                 raise NotImplementedError("I have not implement user specified solver for internal set operation")
-            return self.assumption.intersect(other.guarantee).is_satifiable()
-        elif isinstance(other.guarantee, ExplicitSet):
+            return self.assumption.intersect(other.guarantee).is_satifiable(session=session)
+        elif isinstance(other.guarantee, (ExplicitSet, MDDSet)):
             legal_env = other.guarantee.project(self.assumption.ordered_vars, is_refine=False)
             ret = self.assumption.intersect(legal_env).is_satifiable()
             return ret
         else:
             raise NotImplementedError()
 
+    @staticmethod
+    def _session_kwargs(session: SolverSession | None, *sets: SetBase) -> dict:
+        """The keyword arguments passing the session to the checks of sets, only first order logic sets take a session"""
+        if session is None or not all(isinstance(a_set, FOLClauseSet) for a_set in sets):
+            return {}
+        return {"session": session}
+
+    def _is_behavior_available(self, assumption: FOLClauseSet, guarantee: FOLClauseSet, solver: SolverInterface = None, session: SolverSession = None) -> bool:
+        """ Whether every element of assumption has a behavior in guarantee
+
+        :param FOLClauseSet assumption: the assumption
+        :param FOLClauseSet guarantee: the guarantee
+        :param SolverInterface solver: the solver, a new solver is used if None
+        :param SolverSession session: the session answering the check, cannot be given with solver
+        :return: True if there is no element of assumption without behavior, False if not
+        :rtype: bool
+        """
+        # Check if there is counter example: some element satisfies A but has no corresponding behavior allowed by G
+        # (A && ! Exists(v not in A, G))
+        if solver is not None and session is not None:
+            raise Exception("Either a solver or a session can be given, not both")
+        # the result only depends on the clauses if no solver with other constraints is given
+        cache = QueryCache.get_active() if solver is None else None
+        if cache is not None:
+            exist_ids = ",".join(sorted([v.id for v in self.non_assumption_vs]))
+            if session is None:
+                kind = f"behavior:{assumption._solver_type.__name__}:{exist_ids}"
+            else:
+                kind = f"behavior:{session.solver_type.__name__}:{exist_ids}:{session.context_key}"
+            key = cache.make_key(kind, [str(assumption.expr), str(guarantee.expr)], [(v.id, v.type_str) for v in self.vs])
+            ret = cache.get(key)
+            if ret is not None:
+                return ret
+        if session is not None:
+            solver = session.solver
+            vars_map = session.declare(self.vs)
+        else:
+            if solver is None:
+                solver = assumption._solver_type()
+            # ensure all variables are encoded
+            vars_map = {v.id: solver.get_fresh_variable(v.id, sort=v.type_str) for v in self.vs}
+        # encode both guarantee and assumption
+        var_map, encoded_guarantee = guarantee.encode(solver=solver, vars=guarantee.vars, clause=guarantee.expr, vars_map=vars_map)
+        var_map, encoded_assumption = assumption.encode(solver=solver, vars=assumption.vars, clause=assumption.expr, vars_map=vars_map)
+        # prepare quantifier variables
+        exist_vs = [var_map[v.id] for v in self.non_assumption_vs]
+        # form the clause for checking
+        if exist_vs:
+            encoded_clause = solver.clause_and(encoded_assumption, 
+                                            solver.clause_not(
+                                                solver.clause_exists(exist_vs, encoded_guarantee)))
+        else:
+            #empty due to same variables in assumption and guarantee
+            encoded_clause = solver.clause_and(encoded_assumption, 
+                                            solver.clause_not(encoded_guarantee))
+        # solve the existencde
+        if session is not None:
+            exist_counter_example = session.check(encoded_clause)
+        else:
+            solver.add_conjunction_clause(encoded_clause)
+            exist_counter_example = solver.check()
+        if cache is not None:
+            cache.put(key, not exist_counter_example)
+        return not exist_counter_example
+
     def is_independent_decomposition_of(self, other1: ContractBase, other2: ContractBase) -> bool:
         """ Check if the contract decomposition can allowed independent receptive refinement without causing vacuous design.
 
@@ -494,11 +526,12 @@ class AGContract(ContractBase):
             # LOG.debug(f"[INDE] Type 3 Fixed point: {[elem for elem in type_3_fixed_points]}")
 
             # real useful way to quickly identify - direclty start the search in the graph
+            all_obligations = other1.obligation.intersect(other2.obligation)
             for env in self.assumption.internal_expr:
                 LOG.debug(f"[INDE] Checking environment: {[var.id for var in self.assumption.internal_vars]} = {env}")
-                env_set = ExplicitSet(self.assumption.internal_vars, [env])
-                all_fixed_points = other1.obligation.intersect(other2.obligation).intersect(env_set) # only consider the targeted env
-                all_fixed_points = all_fixed_points.project(list(related_inputs)).internal_expr
+                env_assignment = dict(zip(self.assumption.internal_vars, env))
+                all_fixed_points = self._select_explicit(all_obligations, env_assignment) # only consider the targeted env
+                all_fixed_points = all_fixed_points.view(related_inputs).materialize()
 
                 possible_fixed_point = []
                 candidates = set(copy.copy(all_fixed_points))
@@ -508,7 +541,7 @@ class AGContract(ContractBase):
                     test_root = candidates.pop()
                     LOG.debug(f"[INDE] Start Fixed point group search for {test_root}")
                     group = [test_root]
-                    is_dirty = self._explored_fixed_point_explicit(other1, other2, explored_point=test_root, group=group, all_fixed_points=all_fixed_points, related_inputs=related_inputs, env_set=env_set)
+                    is_dirty = self._explored_fixed_point_explicit(other1, other2, explored_point=test_root, group=group, all_fixed_points=all_fixed_points, related_inputs=related_inputs, env_assignment=env_assignment)
                     if not is_dirty:
                         possible_fixed_point.extend(group)
                         LOG.debug(f"[INDE] Add possible fixed points: {possible_fixed_point}")
@@ -522,6 +555,8 @@ class AGContract(ContractBase):
                     
         elif isinstance(self.guarantee, FOLClauseSet):
             ret = self._is_independent_decomposition_of_infinite_set(other1=other1, other2=other2, dmax = 10)
+        else:
+            raise NotImplementedError(f"Independent decomposition check is not implemented for {type(self.guarantee).__name__}")
 
         LOG.debug(f"===================================================")
         LOG.debug(f"=            Independent Design Result            =")
@@ -774,14 +809,14 @@ class AGContract(ContractBase):
         return copied_related_inputs, rename_map
 
     def _copy_clause_with_copied_var(self, clause: FOLClauseSet, rename_map, copied_expr_var):
-        copied_clause_expr = copy.deepcopy(clause.expr)
-        name_remap(rename_map, copied_clause_expr.root)
-        copied_clause_expr._symbols = copied_clause_expr.root.get_symbols()
+        # the nodes are immutable, renaming rebuilds the tree of the copy
+        copied_clause_expr = copy.copy(clause.expr)
+        copied_clause_expr.rename_symbols(rename_map)
         # create new fol clause set for it
         copied_clause = FOLClauseSet(vars = copied_expr_var, expr=copied_clause_expr)
         return copied_clause
 
-    def _explored_fixed_point_explicit(self, other1: ContractBase, other2: ContractBase, explored_point, group: list, all_fixed_points, related_inputs, env_set, direction = None):
+    def _explored_fixed_point_explicit(self, other1: ContractBase, other2: ContractBase, explored_point, group: list, all_fixed_points, related_inputs, env_assignment, direction = None):
         LOG.debug(f"[INDE] Exploring {explored_point}")
 
         next_points1 = set()
@@ -789,35 +824,47 @@ class AGContract(ContractBase):
         is_dirty1 = False
         is_dirty2 = False
         if direction == 1 or direction is None:
-            neighbor_behaviors_1 = self._get_neighbors_explicit(explored_point, other1, related_inputs=related_inputs, env_set=env_set)
+            neighbor_behaviors_1 = self._get_neighbors_explicit(explored_point, other1, related_inputs=related_inputs, env_assignment=env_assignment)
             LOG.debug(f"[INDE] Possible behaviors for C1 {neighbor_behaviors_1}")
             next_points1, is_dirty1 = self._check_neighbors_explicit(neighbors=neighbor_behaviors_1, explored_point=explored_point, group=group, all_fixed_points=all_fixed_points)
         if direction == 2 or direction is None:
-            neighbor_behaviors_2 = self._get_neighbors_explicit(explored_point, other2, related_inputs=related_inputs, env_set=env_set)
+            neighbor_behaviors_2 = self._get_neighbors_explicit(explored_point, other2, related_inputs=related_inputs, env_assignment=env_assignment)
             LOG.debug(f"[INDE] Possible behaviors for C2 {neighbor_behaviors_2}")
             next_points2, is_dirty2 = self._check_neighbors_explicit(neighbors=neighbor_behaviors_2, explored_point=explored_point, group=group, all_fixed_points=all_fixed_points)
 
         is_dirty = is_dirty1 or is_dirty2
 
         for next_point in next_points1:
-            is_dirty |= self._explored_fixed_point_explicit(other1=other1, other2=other2, explored_point=next_point, group=group, all_fixed_points=all_fixed_points, related_inputs=related_inputs, env_set=env_set, direction=2)
+            is_dirty |= self._explored_fixed_point_explicit(other1=other1, other2=other2, explored_point=next_point, group=group, all_fixed_points=all_fixed_points, related_inputs=related_inputs, env_assignment=env_assignment, direction=2)
         for next_point in next_points2:
-            is_dirty |= self._explored_fixed_point_explicit(other1=other1, other2=other2, explored_point=next_point, group=group, all_fixed_points=all_fixed_points, related_inputs=related_inputs, env_set=env_set, direction=1)
+            is_dirty |= self._explored_fixed_point_explicit(other1=other1, other2=other2, explored_point=next_point, group=group, all_fixed_points=all_fixed_points, related_inputs=related_inputs, env_assignment=env_assignment, direction=1)
         return is_dirty
 
-    def _get_neighbors_explicit(self, fixed_point, other: ContractBase, related_inputs, env_set):
-        ef_set = ExplicitSet(related_inputs, expr=[fixed_point])
+    def _get_neighbors_explicit(self, fixed_point, other: ContractBase, related_inputs, env_assignment):
         # get related inputs of the other
         related_input_other = set(other.assumption.ordered_vars).intersection(set(related_inputs))
         # #TODO: Debug this, the environment is not completely removed from this
         # print([v.id for v in related_input_other])
-        neighbor_behaviors = ef_set.project(list(related_input_other), is_refine=False).intersect(env_set).intersect(other.guarantee)
+        assignment = {var: val for var, val in zip(related_inputs, fixed_point) if var in related_input_other}
+        assignment.update(env_assignment)
+        neighbor_behaviors = self._select_explicit(other.guarantee, assignment)
         neighbor_behaviors = neighbor_behaviors.project(related_inputs)
         LOG.debug(f"[INDE] Possible behaviors {neighbor_behaviors}")
         #LOG.debug(f"[INDE] Possible behaviors {neighbor_behaviors}")
-        return neighbor_behaviors.internal_expr
+        # the neighbors are only iterated once, no need to copy them
+        return neighbor_behaviors.view(related_inputs)
+
 
 
+    @staticmethod
+    def _select_explicit(eset: ExplicitSet, assignment: dict) -> ExplicitSet:
+        """Intersect the set with the single element given by the assignment, the assigned variables in the set are looked up by select"""
+        set_vars = set(eset.vars)
+        ret = eset.select({var: val for var, val in assignment.items() if var in set_vars})
+        added_vars = [var for var in assignment if var not in set_vars]
+        if added_vars:
+            ret = ret.intersect(ExplicitSet(added_vars, [tuple([assignment[var] for var in added_vars])]))
+        return ret
 
     def _check_neighbors_explicit(self, neighbors, explored_point, group, all_fixed_points):
         next_points = []
@@ -4,15 +4,41 @@ from contractda.logger._logger import LOG
 from contractda.design._design_exceptions import IncompleteContractException, ObjectNotFoundException
 from contractda.simulator import Simulator, ClauseEvaluator, Evaluator, Stimulus
 from contractda.design_api._design_expression import DesignExpression
+from contractda.solvers import QueryCache, SolverSession
+from contractda.contracts import AGContract
 
 from typing import Any
+import functools
 import json
 
+def _use_query_cache(method):
+    """Run a query method of the manager with the query cache of the manager"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._query_cache is True:
+            # follow the global cache
+            return method(self, *args, **kwargs)
+        with QueryCache.scope(None if self._query_cache is False else self._query_cache):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+def _session_kwargs(contract_obj, session: SolverSession) -> dict:
+    """The keyword arguments passing the session to the checks of a contract, only AG contracts take a session"""
+    if isinstance(contract_obj, AGContract):
+        return {"session": session}
+    return {}
+
 class DesignLevelManager():
     """The manager for all objects and the interface to perform system level task
     Mapping of names uses hierarchical names to avoid conflicts.
     """
-    def __init__(self):
+    def __init__(self, query_cache: QueryCache | bool = True):
+        """Constructor
+
+        :param QueryCache|bool query_cache: the cache of the solver queries issued by the manager,
+            True to use the global cache of :class:`~contractda.solvers.QueryCache` and False to disable caching
+        """
+        self._query_cache: QueryCache | bool = query_cache
         self._systems = dict()
         self._ports = dict()
         self._connections = dict()
@@ -59,6 +85,7 @@ class DesignLevelManager():
         raise NotImplementedError
         pass
 
+    @_use_query_cache
     def verify_design_refinement(self, design: str | System, hierarchical=True) -> list[System]:
         """Verify if the given design satisfy refinement relation, hierarchical mean if the relation need to checked hierarchically"""
         system_obj = self._verify_design_obj_or_str(design=design)
@@ -76,6 +103,7 @@ class DesignLevelManager():
             systems_under_test.extend(list(test_system.subsystems.values()))
         return failed_systems
 
+    @_use_query_cache
     def verify_system_refinement(self, system: str | System, hierarchical=True) -> bool:
         """Verify if the given design satisfy refinement relation, hierarchical mean if the relation need to checked hierarchically"""
         system_obj = self._verify_system_obj_or_str(system=system)
@@ -93,6 +121,7 @@ class DesignLevelManager():
 
 
 
+    @_use_query_cache
     def verify_design_independent(self, design: str | System, hierarchical=True) -> list[System]:
         """Verify if the given design may suffer from incompatible problems during independent design process"""
         if isinstance(system, str):
@@ -102,6 +131,7 @@ class DesignLevelManager():
             return 
         raise NotImplementedError
         
+    @_use_query_cache
     def verify_system_independent(self, system: str | System, hierarchical=True) -> bool:
         """Verify if the given design satisfy refinement relation, hierarchical mean if the relation need to checked hierarchically
         
@@ -206,6 +236,7 @@ class DesignLevelManager():
         
         raise NotImplementedError("Not support when feedback composition has more than 2 subsystems")
 
+    @_use_query_cache
     def verify_design_consistensy(self, design: str | System, hierarchical=True) -> dict[System, list[SystemContract]]:
         """Check if the system contracts in a design are consistent
 
@@ -227,6 +258,7 @@ class DesignLevelManager():
 
         pass
 
+    @_use_query_cache
     def verify_system_consistensy(self, system: str | System, hierarchical=True) -> list[SystemContract]:
         """Check if the system contracts in a system are consistent
 
@@ -237,12 +269,15 @@ class DesignLevelManager():
         system_obj = self._verify_system_obj_or_str(system=system)
         self._generate_system_contracts(system_obj)
         inconsistent_contracts = []
+        # the contracts of a system share the variables
+        session = SolverSession()
         for contract in system_obj.contracts:
-            if not contract.contract_obj.is_consistent():
+            if not contract.contract_obj.is_consistent(**_session_kwargs(contract.contract_obj, session)):
                 inconsistent_contracts.append(contract)
         return inconsistent_contracts
         
 
+    @_use_query_cache
     def verify_design_compatibility(self, design: str | System, hierarchical=True) -> dict[System, list[SystemContract]]:
         """Check if the system contracts in a design are compatible
 
@@ -262,6 +297,7 @@ class DesignLevelManager():
             systems_under_test.extend(list(test_system.subsystems.values()))
         return failed_contracts
 
+    @_use_query_cache
     def verify_system_compatibility(self, system: str | System, hierarchical=True) -> list[SystemContract]:
         """Check if the system contracts in a system are consistent
 
@@ -272,11 +308,14 @@ class DesignLevelManager():
         system_obj = self._verify_system_obj_or_str(system=system)
         self._generate_system_contracts(system_obj)
         incompatible_contracts = []
+        # the contracts of a system share the variables
+        session = SolverSession()
         for contract in system_obj.contracts:
-            if not contract.contract_obj.is_compatible():
+            if not contract.contract_obj.is_compatible(**_session_kwargs(contract.contract_obj, session)):
                 incompatible_contracts.append(contract)
         return incompatible_contracts
 
+    @_use_query_cache
     def verify_design_receptiveness(self, design: str | System, hierarchical=True) -> dict[System, list[SystemContract]]:
         """Check if the system contracts in a design are receptive
 
@@ -296,6 +335,7 @@ class DesignLevelManager():
             systems_under_test.extend(list(test_system.subsystems.values()))
         return failed_contracts
 
+    @_use_query_cache
     def verify_system_receptiveness(self, system: str | System, hierarchical=True) -> list[SystemContract]:
         """Check if the contracts in a system are receptive
 
@@ -306,11 +346,14 @@ class DesignLevelManager():
         system_obj = self._verify_system_obj_or_str(system=system)
         self._generate_system_contracts(system_obj)
         irreceptive_contracts = []
+        # the contracts of a system share the variables
+        session = SolverSession()
         for contract in system_obj.contracts:
-            if not contract.contract_obj.is_receptive():
+            if not contract.contract_obj.is_receptive(**_session_kwargs(contract.contract_obj, session)):
                 irreceptive_contracts.append(contract)
         return irreceptive_contracts
 
+    @_use_query_cache
     def verify_design_connection(self, design: str | System, hierarchical=True):
         """Check if the system connection is well-defined
 
@@ -330,6 +373,7 @@ class DesignLevelManager():
             systems_under_test.extend(list(test_system.subsystems.values()))
         return failed_systems
     
+    @_use_query_cache
     def verify_system_connection(self, system: str | System, hierarchical=True) -> list[SystemContract]:
         """Check if the system connection is well-defined
 
@@ -362,6 +406,7 @@ class DesignLevelManager():
         return self.simulate_system(system=system_obj, stimulus=stimulus, num_unique_simulations=num_unique_simulations)
 
 
+    @_use_query_cache
     def evaluate_system(self, system: str | System, 
                         objective: DesignExpression,
                         stimulus: Stimulus | dict[Port, Any] = None, 
@@ -392,6 +437,7 @@ class DesignLevelManager():
                                  check_unique=False)
         return ret
 
+    @_use_query_cache
     def evaluate_range_system(self, system: str | System, 
                             objective: DesignExpression,
                             stimulus: Stimulus | dict[Port, Any] = None, 
@@ -526,6 +572,15 @@ class DesignLevelManager():
         for subsystem in system.subsystems.values():
             self._generate_system_contracts(system=subsystem)
 
+    @property
+    def query_cache(self) -> QueryCache | bool:
+        """The cache of the solver queries issued by the manager, True if the global cache is used and False if caching is disabled"""
+        return self._query_cache
+
+    @query_cache.setter
+    def query_cache(self, cache: QueryCache | bool):
+        self._query_cache = cache
+
     def summary(self):
         print(f"======== Design Manager Summary ========")
         print(f"     Systems: {len(self._systems)}")
@@ -8,22 +8,46 @@ The :mod:`contract.sets` module defines a base class for set object as described
     :template: class.rst
 
     ~contractda.sets.ExplicitSet
+    ~contractda.sets.ExplicitSetView
+    ~contractda.sets.ExplicitSetDictView
+    ~contractda.sets.ArrayExplicitSet
+    ~contractda.sets.BitmapExplicitSet
+    ~contractda.sets.MappedExplicitSet
+    ~contractda.sets.MDDSet
+    ~contractda.sets.MDDManager
     ~contractda.sets.ClauseSet
     ~contractda.sets.FOLClauseSet
+    ~contractda.sets.FOLSimplifier
     ~contractda.sets.SetBase
 """
 
 from contractda.sets._explicit_set import ExplicitSet
+from contractda.sets._explicit_set_view import ExplicitSetView, ExplicitSetDictView
+from contractda.sets._array_explicit_set import ArrayExplicitSet
+from contractda.sets._bitmap_explicit_set import BitmapExplicitSet
+from contractda.sets._mapped_explicit_set import MappedExplicitSet
+from contractda.sets._mdd_set import MDDSet, MDDManager, get_default_mdd_manager, set_default_mdd_manager
 from contractda.sets._clause_set import ClauseSet
 from contractda.sets._clause import Clause
 from contractda.sets._fol_clause import FOLClause
 from contractda.sets._fol_clause_set import FOLClauseSet
+from contractda.sets._fol_simplify import FOLSimplifier
 from contractda.sets._base import SetBase
 
 __all__ = [
     "ExplicitSet",
+    "ExplicitSetView",
+    "ExplicitSetDictView",
+    "ArrayExplicitSet",
+    "BitmapExplicitSet",
+    "MappedExplicitSet",
+    "MDDSet",
+    "MDDManager",
+    "get_default_mdd_manager",
+    "set_default_mdd_manager",
     "ClauseSet",
     "FOLClauseSet",
+    "FOLSimplifier",
     "FOLClause"
     "Clause",
 #    "LTLClause"
@@ -0,0 +1,396 @@
+""" Class for ArrayExplicitSet
+"""
+from __future__ import annotations
+from typing import Iterable, Any
+import math
+
+import numpy as np
+
+from contractda.sets._explicit_set import ExplicitSet, ExplicitSetVarType, ExplicitSetElementType, ExplicitSetExpressionType, argsort
+from contractda.vars._var import Var
+
+# dtype of the dictionary-encoded values
+_CODE_DTYPE = np.int32
+# the largest row key that can be packed in a signed 64-bit integer
+_MAX_KEY = np.iinfo(np.int64).max
+
+class ArrayExplicitSet(ExplicitSet):
+    """
+    An explicit set stored as a deduplicated and sorted 2-D integer array
+
+    The values of each variable are dictionary-encoded to small integers.
+    The values in the domain of the variable are encoded first, following the order of ``value_range``;
+    values outside the domain (if any) are appended after them.
+    Each row of the array is an element of the set and the columns follow the internal variable order.
+    The rows are kept sorted lexicographically without duplicates, so set operations run as vectorized row merges.
+
+    The class accepts the same arguments as :class:`~contractda.sets.ExplicitSet` and can be used wherever an explicit set is expected.
+
+    :param list[Var] vars: The variables of the set
+    :param list[tuple] expr: The elements of the set, each tuple is an element and the values follow the order of vars
+    """
+    def __init__(self, vars: ExplicitSetVarType, expr: ExplicitSetExpressionType):
+        expr = list(expr)
+        self._validate(vars, expr)
+
+        self._var_order = argsort(vars)
+        self._vars: list[Var] = [vars[i] for i in self._var_order]
+        self._dicts: list[list] = [list(var.value_range) for var in self._vars]
+        self._codes: list[dict] = [{val: code for code, val in enumerate(values)} for values in self._dicts]
+        self._rows: np.ndarray = _normalize_rows(self._encode_expr(expr), self._radices())
+        self._keys: np.ndarray | None = None
+
+    @classmethod
+    def _from_rows(cls, vars: ExplicitSetVarType, dicts: list[list], rows: np.ndarray, is_normalized: bool = False) -> ArrayExplicitSet:
+        """ Create the set from encoded rows, the vars must be sorted in the internal order
+        """
+        ret = cls.__new__(cls)
+        ret._var_order = list(range(len(vars)))
+        ret._vars = list(vars)
+        ret._dicts = dicts
+        ret._codes = [{val: code for code, val in enumerate(values)} for values in dicts]
+        ret._rows = rows if is_normalized else _normalize_rows(rows, ret._radices())
+        ret._keys = None
+        return ret
+
+    @property
+    def internal_expr(self) -> set[tuple]:
+        """
+        The expr of the set, followed the internal_vars
+        """
+        return set(self._iter_internal())
+
+    @property
+    def rows(self) -> np.ndarray:
+        """
+        The encoded elements, one row per element with columns following the internal_vars
+        """
+        return self._rows
+
+    @property
+    def value_dicts(self) -> list[list]:
+        """
+        The value dictionaries of the internal_vars, the encoded value ``c`` in column ``i`` represents ``value_dicts[i][c]``
+        """
+        return self._dicts
+
+    ######################
+    #   Extraction
+    ######################
+
+    def cardinality(self) -> int:
+        """ The number of elements in the set
+
+        :return: the number of elements
+        :rtype: int
+        """
+        return len(self._rows)
+
+    def _elements_at(self, ranks: list[int]) -> list[ExplicitSetElementType]:
+        return [self._decode_row(row) for row in self._rows[np.asarray(ranks, dtype=np.int64)].tolist()]
+
+    def _rank_groups(self, column: int) -> dict[Any, np.ndarray]:
+        if self._strata is None:
+            self._strata = dict()
+        groups = self._strata.get(column)
+        if groups is None:
+            # the domain values come first in the dictionary, so the groups follow the value_range
+            values = self._dicts[column]
+            groups = {values[code]: ranks for code, ranks in _group_ranks(self._rows[:, column])}
+            self._strata[column] = groups
+        return groups
+
+    ######################
+    #   Set Operation
+    ######################
+
+    def union(self, other: ExplicitSet) -> ArrayExplicitSet:
+        """ Union opration on set
+
+        Note: if the variable set is different, projection is used
+
+        :param ExplicitSet other: the set to be union with this set
+        :return: A new set which represents the union of the two set
+        :rtype: ArrayExplicitSet
+        """
+        return self._merge(other, np.union1d)
+
+    def intersect(self, other: ExplicitSet) -> ArrayExplicitSet:
+        """ Intersect opration on set
+
+        :param ExplicitSet other: the set to be intersect with this set
+        :return: A new set which represents the intersect of the two set
+        :rtype: ArrayExplicitSet
+        """
+        return self._merge(other, _intersect1d)
+
+    def difference(self, other: ExplicitSet) -> ArrayExplicitSet:
+        """ Difference opration on set
+
+        :param ExplicitSet other: the set to be difference with this set
+        :return: A new set which represents the difference of the two set
+        :rtype: ArrayExplicitSet
+        """
+        return self._merge(other, _setdiff1d)
+
+    def complement(self) -> ArrayExplicitSet:
+        """ Complement opration on set
+
+        :return: A new set which represents the Complement of the set
+        :rtype: ArrayExplicitSet
+        """
+        domain_sizes = self._domain_sizes()
+        total = math.prod(domain_sizes)
+        if total == 0:
+            return self._from_rows(self._vars, self._dicts, np.empty((0, len(self._vars)), dtype=_CODE_DTYPE), is_normalized=True)
+        if total > _MAX_KEY:
+            raise Exception(f"The domain of the set is too large to be enumerated: {total} elements")
+        in_domain = self._rows[np.all(self._rows < np.array(domain_sizes, dtype=_CODE_DTYPE), axis=1)]
+        keys = _row_keys(in_domain, domain_sizes)
+        new_keys = np.setdiff1d(np.arange(total, dtype=np.int64), keys, assume_unique=True)
+        ret = self._from_rows(self._vars, self._dicts, _decode_keys(new_keys, domain_sizes), is_normalized=True)
+        ret._var_order = self._var_order
+        return ret
+
+    def _project_subset(self, new_vars: Iterable[Var], is_refine = False, num_workers: int = 1):
+        """ Project the set onto the new variables.
+
+        :param Iterable[str] vars: The id of the new variables, which must be a subset of the variables in the set
+        :param bool is_refine: whether the resulting set is a refinement or abstraction
+        :param int num_workers: not used, the vectorized projection runs in this process
+        """
+        new_vars_set = set(new_vars)
+        indices = [i for i, var in enumerate(self._vars) if var in new_vars_set]
+        remain_vars = [self._vars[i] for i in indices]
+        remain_dicts = [self._dicts[i] for i in indices]
+        remain_rows = self._rows[:, indices]
+        if not is_refine:
+            ret = self._from_rows(remain_vars, remain_dicts, remain_rows)
+        else:
+            discarded = [i for i in range(len(self._vars)) if i not in indices]
+            discarded_sizes = [len(self._vars[i].value_range) for i in discarded]
+            # only the values in the domain can cover the domain of the discarded variables
+            covered = np.all(self._rows[:, discarded] < np.array(discarded_sizes, dtype=_CODE_DTYPE), axis=1)
+            group_keys = _row_keys(remain_rows[covered], [len(d) for d in remain_dicts])
+            if group_keys is None:
+                groups, counts = np.unique(remain_rows[covered], axis=0, return_counts=True)
+            else:
+                _, first_idx, counts = np.unique(group_keys, return_index=True, return_counts=True)
+                groups = remain_rows[covered][first_idx]
+            # the rows are unique, so a group covers the product domain iff it has as many rows as the domain
+            ret = self._from_rows(remain_vars, remain_dicts, groups[counts == math.prod(discarded_sizes)], is_normalized=True)
+        ret._reorder_vars(new_vars)
+        return ret
+
+    def _project_extend(self, new_vars: Iterable[Var], is_refine = True):
+        """ Extend the variables with new_vars
+        """
+        new_vars = list(new_vars)
+        domain_sizes = [len(var.value_range) for var in new_vars]
+        n_extend = math.prod(domain_sizes)
+        extend_rows = _decode_keys(np.arange(n_extend, dtype=np.int64), domain_sizes)
+        rows = np.hstack([np.repeat(self._rows, n_extend, axis=0), np.tile(extend_rows, (len(self._rows), 1))])
+
+        all_vars = self._vars + new_vars
+        all_dicts = self._dicts + [list(var.value_range) for var in new_vars]
+        order = argsort(all_vars)
+        return self._from_rows([all_vars[i] for i in order], [all_dicts[i] for i in order], rows[:, order])
+
+    def is_contain(self, element: ExplicitSetElementType) -> bool:
+        """ Check if the set is contain the element
+
+        :param ExplicitSetElementType element: the element to be checked if it is contained in the set
+        :return: True if the element is in the set. False if not.
+        :rtype: bool
+        """
+        self._verify_match_len_element(element, len(self._vars))
+        element = self._convert_elem_to_internal(element)
+        row = []
+        for codes, val in zip(self._codes, element):
+            code = codes.get(val)
+            if code is None:
+                return False
+            row.append(code)
+        return self._contain_rows(np.array([row], dtype=_CODE_DTYPE).reshape(1, len(self._vars)))[0]
+
+    def is_subset(self, other: ExplicitSet) -> bool:
+        """ Check if the set is a subset of the other set
+
+        :param ExplicitSet other: the other set to be check if this set is a subset of it.
+        :return: True if this set is a subset of the other set. False if not.
+        :rtype: bool
+        """
+        _, _, rows1, rows2, radices = self._sync(other)
+        return len(_rows_set_op(_setdiff1d, rows1, rows2, radices)) == 0
+
+    def is_proper_subset(self, other: ExplicitSet) -> bool:
+        """ Check if the set is a proper subset of the other set
+
+        :param ExplicitSet other: the other set to be check if this set is a proper subset of it.
+        :return: True if this set is a proper subset of the other set. False if not.
+        :rtype: bool
+        """
+        _, _, rows1, rows2, radices = self._sync(other)
+        return len(rows1) < len(rows2) and len(_rows_set_op(_setdiff1d, rows1, rows2, radices)) == 0
+
+    def is_satifiable(self) -> bool:
+        """ Check if the set is satisfiable, i.e., not empty
+
+        :return: True if this set is satisfiable. False if not.
+        :rtype: bool
+        """
+        return len(self._rows) > 0
+
+    def is_equivalence(self, other: ExplicitSet) -> bool:
+        """ Check if the set is equivalent to the other set
+
+        :param ExplicitSet other: the other set to be check if this set is equivalent to it.
+        :return: True if this set is equivalent to the other set. False if not.
+        :rtype: bool
+        """
+        _, _, rows1, rows2, _ = self._sync(other)
+        # both are sorted and deduplicated, so equal sets have equal arrays
+        return np.array_equal(rows1, rows2)
+
+    def is_disjoint(self, other: ExplicitSet) -> bool:
+        """ Check if the set is disjoint to the other set
+
+        :param ExplicitSet other: the other set to be check if this set is disjoint to it.
+        :return: True if this set is disjoint to the other set. False if not.
+        :rtype: bool
+        """
+        _, _, rows1, rows2, radices = self._sync(other)
+        return len(_rows_set_op(_intersect1d, rows1, rows2, radices)) == 0
+
+    ######################
+    #   Internal Functions
+    ######################
+
+    def _apply_set_op(self, other: ExplicitSet, op) -> ArrayExplicitSet:
+        """ Apply the vectorized set operation op on the rows of the two sets"""
+        vars, dicts, rows1, rows2, radices = self._sync(other)
+        return self._from_rows(vars, dicts, _rows_set_op(op, rows1, rows2, radices), is_normalized=True)
+
+    def _sync(self, other: ExplicitSet) -> tuple[list[Var], list[list], np.ndarray, np.ndarray, list[int]]:
+        """ Bring the two sets to the same variables and the same value dictionaries
+
+        :return: the internal variables, the merged value dictionaries, the rows of this set, the rows of the other set, and the radices of the row keys
+        """
+        set1, set2 = self._context_sync(self, self._coerce(other))
+        dicts = []
+        rows1 = set1._rows
+        rows2 = set2._rows
+        for col, (values1, values2) in enumerate(zip(set1._dicts, set2._dicts)):
+            if values1 == values2:
+                dicts.append(values1)
+                continue
+            # both dictionaries start with the same domain, only the extra values need remapping
+            merged = list(values1)
+            merged_codes = dict(set1._codes[col])
+            for val in values2:
+                if val not in merged_codes:
+                    merged_codes[val] = len(merged)
+                    merged.append(val)
+            remap = np.array([merged_codes[val] for val in values2], dtype=_CODE_DTYPE)
+            if rows2 is set2._rows:
+                rows2 = rows2.copy()
+            rows2[:, col] = remap[rows2[:, col]]
+            dicts.append(merged)
+        radices = [max(len(values), 1) for values in dicts]
+        # remapped rows may not be sorted anymore
+        if rows2 is not set2._rows:
+            rows2 = _normalize_rows(rows2, radices)
+        return set1._vars, dicts, rows1, rows2, radices
+
+    def _contain_rows(self, rows: np.ndarray) -> np.ndarray:
+        """ Vectorized membership check of encoded rows"""
+        radices = self._radices()
+        if self._keys is None:
+            self._keys = _row_keys(self._rows, radices)
+        if self._keys is None:
+            return np.array([any(np.array_equal(row, r) for r in self._rows) for row in rows], dtype=bool)
+        keys = _row_keys(rows, radices)
+        pos = np.searchsorted(self._keys, keys)
+        pos[pos == len(self._keys)] = 0
+        return (self._keys[pos] == keys) if len(self._keys) else np.zeros(len(rows), dtype=bool)
+
+    def _radices(self) -> list[int]:
+        return [max(len(values), 1) for values in self._dicts]
+
+    def _domain_sizes(self) -> list[int]:
+        return [len(var.value_range) for var in self._vars]
+
+    def _encode_expr(self, expr: list[tuple]) -> np.ndarray:
+        """ Encode the elements in external order into rows in internal order"""
+        rows = np.empty((len(expr), len(self._vars)), dtype=_CODE_DTYPE)
+        for col, ext_idx in enumerate(self._var_order):
+            rows[:, col] = [self._encode_value(col, elem[ext_idx]) for elem in expr]
+        return rows
+
+    def _encode_value(self, col: int, val) -> int:
+        codes = self._codes[col]
+        code = codes.get(val)
+        if code is None:
+            # value outside the domain, append it to the dictionary
+            code = len(self._dicts[col])
+            codes[val] = code
+            self._dicts[col].append(val)
+        return code
+
+    def _decode_row(self, row) -> tuple:
+        return tuple([values[code] for values, code in zip(self._dicts, row)])
+
+    def _iter_internal(self):
+        for row in self._rows.tolist():
+            yield self._decode_row(row)
+
+def _row_keys(rows: np.ndarray, radices: list[int]) -> np.ndarray | None:
+    """ Pack each row into a mixed-radix integer key, the keys follow the lexicographic order of the rows
+
+    :return: the keys, or None if the keys do not fit in 64-bit integers
+    """
+    if rows.shape[1] == 0:
+        return np.zeros(rows.shape[0], dtype=np.int64)
+    if math.prod(radices) > _MAX_KEY:
+        return None
+    return np.ravel_multi_index(tuple(rows.T), radices).astype(np.int64, copy=False)
+
+def _group_ranks(codes: np.ndarray) -> list[tuple[int, np.ndarray]]:
+    """ The positions of each code in codes, in increasing order of the codes"""
+    order = np.argsort(codes, kind="stable")
+    uniques, starts = np.unique(codes[order], return_index=True)
+    return list(zip(uniques.tolist(), np.split(order, starts[1:])))
+
+def _decode_keys(keys: np.ndarray, radices: list[int]) -> np.ndarray:
+    if len(radices) == 0:
+        return np.zeros((len(keys), 0), dtype=_CODE_DTYPE)
+    return np.stack(np.unravel_index(keys, radices), axis=1).astype(_CODE_DTYPE)
+
+def _void_view(rows: np.ndarray) -> np.ndarray:
+    """ View each row as a single opaque item, used when the rows do not fit in integer keys"""
+    rows = np.ascontiguousarray(rows)
+    return rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).ravel()
+
+def _normalize_rows(rows: np.ndarray, radices: list[int]) -> np.ndarray:
+    """ Sort the rows lexicographically and remove the duplicated rows"""
+    if len(rows) <= 1:
+        return rows
+    keys = _row_keys(rows, radices)
+    if keys is None:
+        return np.unique(rows, axis=0)
+    _, idx = np.unique(keys, return_index=True)
+    return rows[idx]
+
+def _rows_set_op(op, rows1: np.ndarray, rows2: np.ndarray, radices: list[int]) -> np.ndarray:
+    """ Apply the 1-D set operation op on the rows of normalized arrays"""
+    keys1 = _row_keys(rows1, radices)
+    if keys1 is not None:
+        return _decode_keys(op(keys1, _row_keys(rows2, radices)), radices)
+    ret = op(_void_view(rows1), _void_view(rows2))
+    return np.unique(np.ascontiguousarray(ret).view(rows1.dtype).reshape(-1, rows1.shape[1]), axis=0)
+
+def _intersect1d(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.intersect1d(a, b, assume_unique=True)
+
+def _setdiff1d(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.setdiff1d(a, b, assume_unique=True)
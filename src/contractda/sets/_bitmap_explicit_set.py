@@ -0,0 +1,384 @@
+""" Class for BitmapExplicitSet
+"""
+from __future__ import annotations
+from typing import Iterable, Any
+import math
+
+import numpy as np
+
+from contractda.sets._explicit_set import ExplicitSet, ExplicitSetVarType, ExplicitSetElementType, ExplicitSetExpressionType, argsort
+from contractda.sets._array_explicit_set import ArrayExplicitSet, _group_ranks
+from contractda.vars._var import Var
+
+# the bitmap is stored in little-endian 64-bit words, bit i of the set is bit (i % 64) of word (i // 64)
+_WORD_DTYPE = np.dtype("<u8")
+_WORD_BITS = 64
+# number of words unpacked at a time when enumerating the elements
+_CHUNK_WORDS = 1 << 16
+
+class BitmapExplicitSet(ExplicitSet):
+    """
+    An explicit set stored as a bitmap over the product domain of its variables
+
+    Each element is mapped to a mixed-radix index, the digits are the positions of the values in ``value_range`` of the internal variables.
+    The set is the bitmap of the indices of its elements, so union, intersection, difference and the subset/disjoint checks are word-wise bit operations,
+    and complement is a bitwise NOT instead of enumerating the domain.
+
+    The product of the domain sizes must not exceed :attr:`max_domain_size`.
+    Unlike :class:`~contractda.sets.ExplicitSet`, every value must be in the domain of its variable, an element with a value outside the domain raises an exception,
+    including the elements of a plain explicit set used as the other operand of a set operation.
+
+    The representation is not selected automatically, a plain :class:`~contractda.sets.ExplicitSet` still enumerates the domain in ``complement()``.
+    To make ``AGContract.implementation`` cheap, build the assumption and guarantee as bitmap sets, or convert existing sets with :meth:`from_explicit_set`
+    after checking the variables with :meth:`supports`.
+
+    :param list[Var] vars: The variables of the set
+    :param list[tuple] expr: The elements of the set, each tuple is an element and the values follow the order of vars
+    """
+    max_domain_size: int = 10**8
+    # the cumulative number of elements per word, counted on first use
+    _cum_counts: np.ndarray | None = None
+
+    def __init__(self, vars: ExplicitSetVarType, expr: ExplicitSetExpressionType):
+        expr = list(expr)
+        self._validate(vars, expr)
+        self._verify_domain_size(vars)
+
+        self._var_order = argsort(vars)
+        self._vars: list[Var] = [vars[i] for i in self._var_order]
+        self._set_domains()
+        self._words: np.ndarray = _words_from_indices(self._encode_expr(expr), self._size)
+
+    @classmethod
+    def supports(cls, vars: Iterable[Var]) -> bool:
+        """ Check if a set over the variables can be represented by a bitmap
+
+        :param Iterable[Var] vars: the variables of the set
+        :return: True if all variables are finite and the product of the domain sizes is at most max_domain_size
+        :rtype: bool
+        """
+        vars = list(vars)
+        return cls._verify_finite_domain(vars) and math.prod([len(var.value_range) for var in vars]) <= cls.max_domain_size
+
+    @classmethod
+    def _convert_explicit_set(cls, other: ExplicitSet) -> BitmapExplicitSet:
+        if not isinstance(other, ArrayExplicitSet):
+            return cls(vars=other.internal_vars, expr=other.internal_expr)
+        # the codes of the values in the domain are already the mixed-radix digits
+        cls._verify_domain_size(other.internal_vars)
+        ret = cls.__new__(cls)
+        ret._var_order = list(range(len(other.internal_vars)))
+        ret._vars = list(other.internal_vars)
+        ret._set_domains()
+        rows = other.rows
+        if np.any(rows >= np.array(ret._sizes, dtype=rows.dtype)):
+            raise Exception("The set contains values outside the domain of its variables")
+        ret._words = _words_from_indices(_ravel(rows, ret._sizes), ret._size)
+        return ret
+
+    @classmethod
+    def _from_words(cls, vars: ExplicitSetVarType, words: np.ndarray) -> BitmapExplicitSet:
+        """ Create the set from the bitmap words, the vars must be sorted in the internal order
+        """
+        ret = cls.__new__(cls)
+        ret._var_order = list(range(len(vars)))
+        ret._vars = list(vars)
+        ret._set_domains()
+        ret._words = words
+        return ret
+
+    @property
+    def internal_expr(self) -> set[tuple]:
+        """
+        The expr of the set, followed the internal_vars
+        """
+        return set(self._iter_internal())
+
+    @property
+    def words(self) -> np.ndarray:
+        """
+        The bitmap of the set as 64-bit words
+        """
+        return self._words
+
+    ######################
+    #   Extraction
+    ######################
+
+    def cardinality(self) -> int:
+        """ The number of elements in the set
+
+        The bits are counted once and kept with the set.
+
+        :return: the number of elements
+        :rtype: int
+        """
+        cum_counts = self._cumulative_counts()
+        return int(cum_counts[-1]) if len(cum_counts) else 0
+
+    ######################
+    #   Set Operation
+    ######################
+
+    def union(self, other: ExplicitSet) -> BitmapExplicitSet:
+        """ Union opration on set
+
+        Note: if the variable set is different, projection is used
+
+        :param ExplicitSet other: the set to be union with this set
+        :return: A new set which represents the union of the two set
+        :rtype: BitmapExplicitSet
+        """
+        return self._merge(other, np.bitwise_or)
+
+    def intersect(self, other: ExplicitSet) -> BitmapExplicitSet:
+        """ Intersect opration on set
+
+        :param ExplicitSet other: the set to be intersect with this set
+        :return: A new set which represents the intersect of the two set
+        :rtype: BitmapExplicitSet
+        """
+        return self._merge(other, np.bitwise_and)
+
+    def difference(self, other: ExplicitSet) -> BitmapExplicitSet:
+        """ Difference opration on set
+
+        :param ExplicitSet other: the set to be difference with this set
+        :return: A new set which represents the difference of the two set
+        :rtype: BitmapExplicitSet
+        """
+        return self._merge(other, _andnot)
+
+    def complement(self) -> BitmapExplicitSet:
+        """ Complement opration on set
+
+        :return: A new set which represents the Complement of the set
+        :rtype: BitmapExplicitSet
+        """
+        ret = self._from_words(self._vars, _mask_tail(np.invert(self._words), self._size))
+        ret._var_order = self._var_order
+        return ret
+
+    def _project_subset(self, new_vars: Iterable[Var], is_refine = False, num_workers: int = 1):
+        """ Project the set onto the new variables.
+
+        :param Iterable[str] vars: The id of the new variables, which must be a subset of the variables in the set
+        :param bool is_refine: whether the resulting set is a refinement or abstraction
+        :param int num_workers: not used, the vectorized projection runs in this process
+        """
+        new_vars_set = set(new_vars)
+        discarded_axes = tuple(i for i, var in enumerate(self._vars) if var not in new_vars_set)
+        remain_vars = [var for var in self._vars if var in new_vars_set]
+        tensor = self._tensor()
+        # refinement keeps the values covering the whole discarded domain, abstraction keeps any value
+        if is_refine:
+            reduced = tensor.all(axis=discarded_axes)
+        else:
+            reduced = tensor.any(axis=discarded_axes)
+        ret = self._from_words(remain_vars, _pack(np.ravel(reduced)))
+        ret._reorder_vars(new_vars)
+        return ret
+
+    def _project_extend(self, new_vars: Iterable[Var], is_refine = True):
+        """ Extend the variables with new_vars
+        """
+        new_vars = list(new_vars)
+        all_vars = self._vars + new_vars
+        self._verify_domain_size(all_vars)
+        tensor = self._tensor()
+        sizes = tensor.shape + tuple(len(var.value_range) for var in new_vars)
+        extended = np.broadcast_to(tensor.reshape(tensor.shape + (1,) * len(new_vars)), sizes)
+        order = argsort(all_vars)
+        extended = np.ascontiguousarray(extended.transpose(order))
+        return self._from_words([all_vars[i] for i in order], _pack(extended.ravel()))
+
+    def is_contain(self, element: ExplicitSetElementType) -> bool:
+        """ Check if the set is contain the element
+
+        :param ExplicitSetElementType element: the element to be checked if it is contained in the set
+        :return: True if the element is in the set. False if not.
+        :rtype: bool
+        """
+        self._verify_match_len_element(element, len(self._vars))
+        element = self._convert_elem_to_internal(element)
+        index = 0
+        for codes, size, val in zip(self._codes, self._sizes, element):
+            code = codes.get(val)
+            if code is None:
+                return False
+            index = index * size + code
+        return bool((int(self._words[index // _WORD_BITS]) >> (index % _WORD_BITS)) & 1)
+
+    def is_subset(self, other: ExplicitSet) -> bool:
+        """ Check if the set is a subset of the other set
+
+        :param ExplicitSet other: the other set to be check if this set is a subset of it.
+        :return: True if this set is a subset of the other set. False if not.
+        :rtype: bool
+        """
+        _, words1, words2 = self._sync(other)
+        return not bool(np.any(_andnot(words1, words2)))
+
+    def is_proper_subset(self, other: ExplicitSet) -> bool:
+        """ Check if the set is a proper subset of the other set
+
+        :param ExplicitSet other: the other set to be check if this set is a proper subset of it.
+        :return: True if this set is a proper subset of the other set. False if not.
+        :rtype: bool
+        """
+        _, words1, words2 = self._sync(other)
+        return not np.any(_andnot(words1, words2)) and bool(np.any(_andnot(words2, words1)))
+
+    def is_satifiable(self) -> bool:
+        """ Check if the set is satisfiable, i.e., not empty
+
+        :return: True if this set is satisfiable. False if not.
+        :rtype: bool
+        """
+        return bool(np.any(self._words))
+
+    def is_equivalence(self, other: ExplicitSet) -> bool:
+        """ Check if the set is equivalent to the other set
+
+        :param ExplicitSet other: the other set to be check if this set is equivalent to it.
+        :return: True if this set is equivalent to the other set. False if not.
+        :rtype: bool
+        """
+        _, words1, words2 = self._sync(other)
+        return bool(np.array_equal(words1, words2))
+
+    def is_disjoint(self, other: ExplicitSet) -> bool:
+        """ Check if the set is disjoint to the other set
+
+        :param ExplicitSet other: the other set to be check if this set is disjoint to it.
+        :return: True if this set is disjoint to the other set. False if not.
+        :rtype: bool
+        """
+        _, words1, words2 = self._sync(other)
+        return not bool(np.any(np.bitwise_and(words1, words2)))
+
+    ######################
+    #   Internal Functions
+    ######################
+
+    def _apply_set_op(self, other: ExplicitSet, op) -> BitmapExplicitSet:
+        """ Apply the word-wise operation op on the bitmaps of the two sets"""
+        vars, words1, words2 = self._sync(other)
+        return self._from_words(vars, op(words1, words2))
+
+    def _sync(self, other: ExplicitSet) -> tuple[list[Var], np.ndarray, np.ndarray]:
+        """ Bring the two sets to the same variables
+
+        :return: the internal variables, the words of this set, and the words of the other set
+        """
+        set1, set2 = self._context_sync(self, self._coerce(other))
+        return set1._vars, set1._words, set2._words
+
+    @classmethod
+    def _verify_domain_size(cls, vars: Iterable[Var]) -> None:
+        size = math.prod([len(var.value_range) for var in vars])
+        if size > cls.max_domain_size:
+            raise Exception(f"The domain size {size} exceeds the maximum size of a bitmap set {cls.max_domain_size}")
+
+    def _set_domains(self):
+        self._domains: list[list] = [list(var.value_range) for var in self._vars]
+        self._codes: list[dict] = [{val: code for code, val in enumerate(values)} for values in self._domains]
+        self._sizes: list[int] = [len(values) for values in self._domains]
+        self._size: int = math.prod(self._sizes)
+
+    def _encode_expr(self, expr: list[tuple]) -> np.ndarray:
+        """ Convert the elements in external order into the mixed-radix indices"""
+        rows = np.empty((len(expr), len(self._vars)), dtype=np.int64)
+        for col, ext_idx in enumerate(self._var_order):
+            codes = self._codes[col]
+            column = []
+            for elem in expr:
+                code = codes.get(elem[ext_idx])
+                if code is None:
+                    raise Exception(f"The value {elem[ext_idx]} is not in the domain of variable {self._vars[col].id}")
+                column.append(code)
+            rows[:, col] = column
+        return _ravel(rows, self._sizes)
+
+    def _cumulative_counts(self) -> np.ndarray:
+        """ The number of elements up to and including each word"""
+        if self._cum_counts is None:
+            self._cum_counts = np.cumsum(_popcounts(self._words))
+        return self._cum_counts
+
+    def _elements_at(self, ranks: list[int]) -> list[ExplicitSetElementType]:
+        # locate the word containing each rank, then the bit inside the word
+        cum_counts = self._cumulative_counts()
+        ranks = np.asarray(ranks, dtype=np.int64)
+        word_ids = np.searchsorted(cum_counts, ranks, side="right")
+        ranks_in_word = ranks - np.concatenate(([0], cum_counts))[word_ids]
+        bits = np.unpackbits(self._words[word_ids].view(np.uint8).reshape(len(ranks), 8), axis=1, bitorder="little")
+        positions = np.argmax(np.cumsum(bits, axis=1) > ranks_in_word[:, None], axis=1)
+        return [self._decode_index(index) for index in (word_ids * _WORD_BITS + positions).tolist()]
+
+    def _rank_groups(self, column: int) -> dict[Any, np.ndarray]:
+        if self._strata is None:
+            self._strata = dict()
+        groups = self._strata.get(column)
+        if groups is None:
+            indices = np.flatnonzero(np.unpackbits(self._words.view(np.uint8), count=self._size, bitorder="little"))
+            values = self._domains[column]
+            groups = {values[code]: ranks for code, ranks in _group_ranks(np.unravel_index(indices, self._sizes)[column])}
+            self._strata[column] = groups
+        return groups
+
+    def _decode_index(self, index: int) -> tuple:
+        elem = []
+        for values, size in zip(reversed(self._domains), reversed(self._sizes)):
+            index, code = divmod(index, size)
+            elem.append(values[code])
+        return tuple(reversed(elem))
+
+    def _tensor(self) -> np.ndarray:
+        """ Unpack the bitmap into a boolean array indexed by the codes of the internal variables"""
+        return np.unpackbits(self._words.view(np.uint8), count=self._size, bitorder="little").astype(bool).reshape(self._sizes)
+
+    def _iter_internal(self):
+        for start in range(0, len(self._words), _CHUNK_WORDS):
+            chunk = self._words[start:start+_CHUNK_WORDS]
+            indices = np.flatnonzero(np.unpackbits(chunk.view(np.uint8), bitorder="little")) + start * _WORD_BITS
+            if len(self._sizes) == 0:
+                codes = [[] for _ in indices]
+            else:
+                codes = np.stack(np.unravel_index(indices, self._sizes), axis=1).tolist()
+            for row in codes:
+                yield tuple([values[code] for values, code in zip(self._domains, row)])
+
+def _ravel(rows: np.ndarray, sizes: list[int]) -> np.ndarray:
+    if len(sizes) == 0:
+        return np.zeros(len(rows), dtype=np.int64)
+    return np.ravel_multi_index(tuple(rows.T), sizes).astype(np.int64, copy=False)
+
+def _words_from_indices(indices: np.ndarray, size: int) -> np.ndarray:
+    words = np.zeros((size + _WORD_BITS - 1) // _WORD_BITS, dtype=_WORD_DTYPE)
+    indices = np.asarray(indices, dtype=np.int64)
+    np.bitwise_or.at(words, indices // _WORD_BITS, np.left_shift(np.uint64(1), (indices % _WORD_BITS).astype(np.uint64)))
+    return words
+
+def _pack(flat: np.ndarray) -> np.ndarray:
+    """ Pack a flat boolean array into the bitmap words"""
+    packed = np.packbits(flat, bitorder="little")
+    padded = np.zeros(((len(flat) + _WORD_BITS - 1) // _WORD_BITS) * 8, dtype=np.uint8)
+    padded[:len(packed)] = packed
+    return padded.view(_WORD_DTYPE)
+
+def _mask_tail(words: np.ndarray, size: int) -> np.ndarray:
+    """ Clear the bits beyond the domain in the last word"""
+    remainder = size % _WORD_BITS
+    if remainder and len(words):
+        words[-1] &= np.uint64((1 << remainder) - 1)
+    return words
+
+def _andnot(words1: np.ndarray, words2: np.ndarray) -> np.ndarray:
+    return np.bitwise_and(words1, np.invert(words2))
+
+def _popcounts(words: np.ndarray) -> np.ndarray:
+    """ Number of set bits in each word"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).astype(np.int64)
+    return np.unpackbits(words.view(np.uint8)).reshape(-1, _WORD_BITS).sum(axis=1)
@@ -210,7 +210,8 @@ class ClauseSet(SetBase):
         False if something goes wrong
         Also return the list of failing vars
         """
-        symbols = set(expr.get_symbols())
+        # the symbols are kept by the clause, they are not collected again
+        symbols = expr.get_symbols()
         var_ids = set([var.id for var in vars])
         failed_list = list(symbols - var_ids)
         result = not bool(failed_list)
@@ -1,7 +1,7 @@
 """ Class for ExplicitSet
 """
 from __future__ import annotations
-from typing import Iterable, Any
+from typing import Iterable, Any, TYPE_CHECKING
 
 from contractda.sets._base import SetBase
 from contractda.vars._var import Var
@@ -9,7 +9,14 @@ from contractda.logger._logger import LOG
 
 import random
 import copy
+import concurrent.futures
 import itertools
+import logging
+import math
+import operator
+
+if TYPE_CHECKING:
+    from contractda.sets._explicit_set_view import ExplicitSetView, ExplicitSetDictView
 
 ExplicitSetVarType = list[Var]
 ExplicitSetElementType = tuple
@@ -20,30 +27,39 @@ class ExplicitSet(SetBase):
     A set class that explicitly enumerate all elements
 
     For projection and intersection, extension variables are accepted and specialized treatment is performed to improve the performance
-    For difference and union, extension variables are treated as plain projecction.
+    For intersection, difference and the subset/disjoint checks, sets over different variables are joined on their shared variables
+    so that the extension of each operand is never enumerated. For union, extension variables are treated as plain projecction.
+
+    An element can be a cube: the value :data:`ExplicitSet.ANY` in a column stands for every value in the domain of that variable.
+    Extension variables are stored as such columns, so a cylinder over extra variables takes one element instead of one per value of the domain.
+    Set operations work on the cubes directly and only expand them when the result cannot be written with cubes.
+    ``internal_expr``, ``ordered_expr`` and the iteration always produce the expanded elements.
+    Cubes are only supported by ExplicitSet itself, the subclasses store concrete elements.
 
-    Note: Complement, and projection with refinement or, extension variables. Domain is enumerated and thus the performance might not good.
+    Note: Complement, and projection with refinement. Domain is enumerated and thus the performance might not good.
     If you can write the set with clause, theory prover can be used to accelates the set computation.
 
     :param list[str] vars: The ids for the variables
     :param list[tuple] expr: The expression of the set, the explicit set
         requires a explicit expression by a list of tuple, each tuple is an element in the set, and the value in the tuple is the same order as that in the vars
     """
+    #: The value of a column that matches every value in the domain of its variable
+    ANY = None  # set below the class definition
+    # the elements containing ANY, following the internal order, empty for subclasses which store concrete elements only
+    _cubes: set[tuple] = frozenset()
+    # the expanded elements, computed on first access when there are cubes
+    _expanded: set[tuple] | None = None
+    _cube_index: _CubeIndex | None = None
+    # the indexes of select, from the positions of the selected variables to the elements grouped by their values
+    _indexes: dict[tuple[int], dict[tuple, list]] | None = None
+    # the expanded elements in a fixed order for random access by rank, and the ranks grouped by the values of a column
+    _elements: tuple[tuple] | None = None
+    _strata: dict[int, dict[Any, list[int]]] | None = None
+
     def __init__(self, vars: ExplicitSetVarType, expr: ExplicitSetExpressionType):
 
         #TODO: check if the provided value in the element of the expr is within the range of the vars
-        # check no duplicate variable in vars
-        if not self._verify_unique_vars(vars):
-            var_names = [var.id for var in vars]
-            raise Exception(f"Duplicate variables are not allowed {var_names}")
-        
-        if not self._verify_finite_domain(vars):
-            violated_var = [var for var in vars if not var.is_finite()]
-            raise Exception(f"The created domain is not finite: Variables: {violated_var}")
-        
-        # check if the tuple is ok
-        for elem in expr:
-            self._verify_match_len_element(elem, len(vars))
+        self._validate(vars, expr)
 
         # sort the variables
         var_arg_sorted = argsort(vars)
@@ -53,6 +69,10 @@ class ExplicitSet(SetBase):
         self._vars: list[Var] = [vars[i] for i in var_arg_sorted]
         # _expr_internal: the set expr corresponding to the variables ordered by _vars
         self._expr_internal =  self._convert_expr_to_internal(expr) 
+        # _cubes: the elements with don't care values are kept apart from _expr_internal
+        self._cubes = {elem for elem in self._expr_internal if ANY in elem}
+        if self._cubes:
+            self._expr_internal -= self._cubes
 
     def __str__(self):
         return f"{tuple([str(var)for var in self.ordered_vars])} = {str(self.ordered_expr)}"
@@ -73,16 +93,19 @@ class ExplicitSet(SetBase):
         """
         The ids for the variables, which is not sorted and may reflect the original input from designer
         """
-        sorted_pair = sorted(zip(self._var_order, self._vars), key=lambda x: x[0])
-        return [val for _, val in sorted_pair]
-        #return [self._vars[id] for id in self._var_order]
+        return [self._vars[i] for i in self._inverse_order]
 
     @property
     def internal_expr(self) -> ExplicitSetExpressionType:
         """
         The expr of the set, followed the internal_vars
         """
-        return self._expr_internal
+        if not self._cubes:
+            return self._expr_internal
+        if self._expanded is None:
+            domains = [var.value_range for var in self._vars]
+            self._expanded = self._expr_internal.union(*[_expand_cube(cube, domains) for cube in self._cubes])
+        return self._expanded
     
     @property
     def ordered_expr(self) -> ExplicitSetExpressionType:
@@ -95,7 +118,29 @@ class ExplicitSet(SetBase):
     def get_element_dict(self) -> list[dict]:
         """Return the element in the form of dictionaries with keys being the variables and value being the values in each element.
         """
-        return [{k: v for k, v in zip(self._vars, elem)} for elem in self._expr_internal]
+        return self.dict_view(self._vars).materialize()
+
+    def view(self, vars: Iterable[Var] = None) -> ExplicitSetView:
+        """ A lazy view of the elements with the values following vars
+
+        Unlike ordered_expr, the elements are not copied, see :class:`~contractda.sets.ExplicitSetView`.
+
+        :param list[Var] vars: The variables of the view, a subset of the variables of the set. Default to the ordered_vars
+        :return: the view of the elements
+        :rtype: ExplicitSetView
+        """
+        from contractda.sets._explicit_set_view import ExplicitSetView
+        return ExplicitSetView(self, vars)
+
+    def dict_view(self, vars: Iterable[Var] = None) -> ExplicitSetDictView:
+        """ A lazy view of the elements as dictionaries with keys being the variables
+
+        :param list[Var] vars: The variables in the dictionaries, a subset of the variables of the set. Default to the ordered_vars
+        :return: the view of the elements
+        :rtype: ExplicitSetDictView
+        """
+        from contractda.sets._explicit_set_view import ExplicitSetDictView
+        return ExplicitSetDictView(self, vars)
     
     def reorder_vars(self, vars: list[Var]) -> None:
         """ Change the order of variables
@@ -112,17 +157,74 @@ class ExplicitSet(SetBase):
         # assume the variables are checked to be the same as the self._vars and are unique
         self._var_order = argsort(vars)
 
+    @classmethod
+    def from_explicit_set(cls, other: ExplicitSet) -> ExplicitSet:
+        """ Convert an explicit set into the representation of this class
+
+        :param ExplicitSet other: the set to be converted
+        :return: the set with the same variables, variable order and elements, other itself if it is already an instance of this class
+        :rtype: ExplicitSet
+        """
+        if isinstance(other, cls):
+            return other
+        ret = cls._convert_explicit_set(other)
+        ret._reorder_vars(other.ordered_vars)
+        return ret
+
+    @staticmethod
+    def _from_internal(vars: ExplicitSetVarType, expr: ExplicitSetExpressionType, cubes: ExplicitSetExpressionType | None = None) -> ExplicitSet:
+        """ Create the set from trusted elements, skipping the validation of __init__
+
+        The elements are only permuted if vars is not already in the internal order.
+        The variable order of the result is vars.
+
+        :param list[Var] vars: The variables of the set, unique and with finite domains
+        :param Iterable[tuple] expr: The elements following vars, each of the length of vars. It may be consumed or kept by the set.
+        :param Iterable[tuple] cubes: The elements with don't care values, None if they are not separated from expr yet
+        :return: the set
+        :rtype: ExplicitSet
+        """
+        ret = ExplicitSet.__new__(ExplicitSet)
+        var_order = argsort(vars)
+        ret._var_order = var_order
+        ret._vars = [vars[i] for i in var_order]
+        permute = _permuter(var_order)
+        expr = set(expr) if permute is None else set(map(permute, expr))
+        if cubes is None:
+            cubes = {elem for elem in expr if ANY in elem}
+            if cubes:
+                expr -= cubes
+        elif cubes:
+            cubes = set(cubes) if permute is None else set(map(permute, cubes))
+        ret._expr_internal = expr
+        ret._cubes = cubes if cubes else frozenset()
+        return ret
+
+    @property
+    def _var_order(self) -> tuple[int]:
+        """The position in the ordered_vars of each of the internal_vars"""
+        return self._order
+
+    @_var_order.setter
+    def _var_order(self, var_order: Iterable[int]) -> None:
+        # precompute the inverse permutation: the position in the internal_vars of each of the ordered_vars
+        self._order = tuple(var_order)
+        inverse_order = [0] * len(self._order)
+        for internal_idx, external_idx in enumerate(self._order):
+            inverse_order[external_idx] = internal_idx
+        self._inverse_order = tuple(inverse_order)
+
     ######################
     #   Extraction
     ######################
 
     def __iter__(self):
-        self._iter = iter(self._expr_internal) 
+        permute = _permuter(self._inverse_order)
+        self._iter = self._iter_internal() if permute is None else map(permute, self._iter_internal())
         return self
 
     def __next__(self):
-        element = next(self._iter)
-        return self._convert_elem_to_external(element)
+        return next(self._iter)
     
     def get_enumeration(self) -> Iterable[ExplicitSetElementType]:
         """ Enumerate the set elements
@@ -130,17 +232,103 @@ class ExplicitSet(SetBase):
         :return: An iterable object that can produce all elements
         :rtype: Iterable
         """
-        return list(self._expr_internal)
+        return list(self._iter_internal())
     
+    def __len__(self):
+        return self.cardinality()
+
+    def cardinality(self) -> int:
+        """ The number of elements in the set
+
+        Constant time, except for a set with cubes which is expanded once and then kept.
+
+        :return: the number of elements
+        :rtype: int
+        """
+        return len(self.internal_expr)
+
     def sample(self):
         """ Sample an element in the set
 
-        :return: any element that is in the set
+        The element is the same on every call, the global random state is not changed.
+
+        :return: any element that is in the set, the values follow the internal_vars
         :rtype: Any
         """
-        random.seed(0)
-        random_id = random.randrange(0, self.len())
-        return list(self._expr_internal)[random_id]
+        return self._elements_at([random.Random(0).randrange(0, self.cardinality())])[0]
+
+    def sample_many(self, n: int, seed: int | None = None, replace: bool = True) -> list[ExplicitSetElementType]:
+        """ Draw elements uniformly at random
+
+        The elements are picked by their ranks, so each draw takes constant time after the first call
+        instead of converting the set into a list.
+
+        :param int n: the number of elements to be drawn
+        :param int seed: the seed of the draws, default to a random seed
+        :param bool replace: whether an element can be drawn more than once, if not, n must not exceed the cardinality
+        :return: the elements with the values following the ordered_vars
+        :rtype: list[tuple]
+        """
+        rng = random.Random(seed)
+        ranks = self._draw_ranks(rng, range(self.cardinality()), n, replace)
+        return self._convert_ranks_to_external(ranks)
+
+    def sample_stratified(self, var: Var, n: int, seed: int | None = None, replace: bool = True) -> dict[Any, list[ExplicitSetElementType]]:
+        """ Draw elements uniformly at random for each value of a variable
+
+        Each value of var taken by some element of the set is a stratum, and the elements of a stratum are drawn independently of the others,
+        so rare values are represented as much as frequent ones. The strata of a variable are computed by the first call and kept with the set.
+
+        :param Var var: the variable defining the strata
+        :param int n: the number of elements drawn from each stratum, at most the size of the stratum if not replace
+        :param int seed: the seed of the draws, default to a random seed
+        :param bool replace: whether an element can be drawn more than once
+        :return: the drawn elements keyed by the value of var, the values of the elements follow the ordered_vars
+        :rtype: dict[Any, list[tuple]]
+        """
+        if var not in self._vars:
+            raise Exception(f"The variable {var.id} is not in the set")
+        rng = random.Random(seed)
+        ret = dict()
+        for value, ranks in self._rank_groups(self._vars.index(var)).items():
+            num_draws = n if replace else min(n, len(ranks))
+            ret[value] = self._convert_ranks_to_external(self._draw_ranks(rng, ranks, num_draws, replace))
+        return ret
+
+    @staticmethod
+    def _draw_ranks(rng: random.Random, ranks, n: int, replace: bool) -> list[int]:
+        if n > 0 and len(ranks) == 0:
+            raise Exception("Cannot sample from an empty set")
+        if replace:
+            return [int(ranks[i]) for i in rng.choices(range(len(ranks)), k=n)]
+        return [int(ranks[i]) for i in rng.sample(range(len(ranks)), n)]
+
+    def _convert_ranks_to_external(self, ranks: list[int]) -> list[ExplicitSetElementType]:
+        permute = _permuter(self._inverse_order)
+        elems = self._elements_at(ranks)
+        return elems if permute is None else list(map(permute, elems))
+
+    def _elements_at(self, ranks: list[int]) -> list[ExplicitSetElementType]:
+        """The elements with the given ranks following the internal_vars, the ranks index the elements in a fixed order of the set"""
+        if self._elements is None:
+            self._elements = tuple(self.internal_expr)
+        return [self._elements[rank] for rank in ranks]
+
+    def _rank_groups(self, column: int) -> dict[Any, list[int]]:
+        """The ranks of the elements grouped by their value of the column, in the order of the value_range followed by the values outside the domain"""
+        if self._strata is None:
+            self._strata = dict()
+        groups = self._strata.get(column)
+        if groups is None:
+            if self._elements is None:
+                self._elements = tuple(self.internal_expr)
+            by_value = dict()
+            for rank, elem in enumerate(self._elements):
+                by_value.setdefault(elem[column], []).append(rank)
+            groups = {value: by_value.pop(value) for value in self._vars[column].value_range if value in by_value}
+            groups.update(by_value)
+            self._strata[column] = groups
+        return groups
     ######################
     #   Set Operation
     ######################
@@ -154,19 +342,7 @@ class ExplicitSet(SetBase):
         :return: A new set which represents the union of the two set
         :rtype: ExplicitSet
         """
-        # check vars
-        set1, set2 = self._context_sync(self, other)
-
-        # same variables
-        # compute the set union
-        new_expr = set1._expr_internal.union(set2._expr_internal)
-        ret = ExplicitSet(vars = set1._vars, expr=new_expr)
-
-        new_var = self.ordered_vars
-        new_var += [var for var in other.ordered_vars if var not in new_var]
-        ret._reorder_vars(new_var)
-        return ret
-
+        return self._merge(other, set.union)
 
     def intersect(self, other: ExplicitSet) -> ExplicitSet:
         """ Intersect opration on set
@@ -175,19 +351,7 @@ class ExplicitSet(SetBase):
         :return: A new set which represents the intersect of the two set
         :rtype: ExplicitSet
         """
-        # check vars
-        set1, set2 = self._context_sync(self, other)
-
-        # same variables
-        # compute the set intersect
-        new_expr = set1._expr_internal.intersection(set2._expr_internal)
-        ret = ExplicitSet(vars = set1._vars, expr=new_expr)
-
-        new_var = self.ordered_vars
-        new_var += [var for var in other.ordered_vars if var not in new_var]
-        ret._reorder_vars(new_var)
-        return ret
-
+        return self._merge(other, set.intersection)
 
     def difference(self, other: ExplicitSet) -> ExplicitSet:
         """ Difference opration on set 
@@ -196,19 +360,7 @@ class ExplicitSet(SetBase):
         :return: A new set which represents the difference of the two set
         :rtype: ExplicitSet
         """
-        # check vars
-        set1, set2 = self._context_sync(self, other)
-
-        # same variables
-        # compute the set difference
-        new_expr = set1._expr_internal - set2._expr_internal
-        ret = ExplicitSet(vars = set1._vars, expr=new_expr)
-
-        new_var = self.ordered_vars
-        new_var += [var for var in other.ordered_vars if var not in new_var]
-        ret._reorder_vars(new_var)
-        return ret
-
+        return self._merge(other, set.difference)
 
     def complement(self) -> ExplicitSet:
         """ Complement opration on set 
@@ -216,12 +368,27 @@ class ExplicitSet(SetBase):
         :return: A new set which represents the Complement of the set
         :rtype: Explicitset
         """
-        domain = self._domain()
-        new_expr = [elem for elem in domain if elem not in self._expr_internal]  
-        ret = ExplicitSet(vars=self._vars, expr=new_expr)
+        # columns that are don't care in every element stay don't care in the complement
+        rows = self._expr_internal | self._cubes
+        free = {i for i in range(len(self._vars)) if all(elem[i] is ANY for elem in rows)}
+        kept = [i for i in range(len(self._vars)) if i not in free]
+        kept_domains = [self._vars[i].value_range for i in kept]
+        covered = set()
+        for elem in rows:
+            covered.update(_expand_cube(tuple([elem[i] for i in kept]), kept_domains))
+        new_expr = []
+        for kept_elem in itertools.product(*kept_domains):
+            if kept_elem in covered:
+                continue
+            new_elem = [ANY] * len(self._vars)
+            for i, val in zip(kept, kept_elem):
+                new_elem[i] = val
+            new_expr.append(tuple(new_elem))
+        ret = ExplicitSet._from_internal(self._vars, new_expr)
+        ret._reorder_vars(self.ordered_vars)
         return ret
 
-    def project(self, new_vars: Iterable[Var], is_refine = False) -> ExplicitSet:
+    def project(self, new_vars: Iterable[Var], is_refine = False, num_workers: int = 1) -> ExplicitSet:
         """ Projection opration of set onto the new variables 
 
         The projection can be refinement or abstraction.
@@ -233,80 +400,133 @@ class ExplicitSet(SetBase):
 
         :param Iterable[Var] vars: the list of variables to be the projection result.
         :param bool is_refine: whether the projection is to result in refinement or abstraction
+        :param int num_workers: the number of processes for the refinement, the elements are split by the values of the remaining variables
         :return: A new set which represents the Projection of the set on the input variables
         :rtype: SetBase
         """
-        LOG.debug(f"Projection of Set {[var.id for var in self.ordered_vars]}{self.ordered_expr} to variables {[var.id for var in new_vars]}")
+        if LOG.isEnabledFor(logging.DEBUG):
+            LOG.debug(f"Projection of Set {[var.id for var in self.ordered_vars]}{self.ordered_expr} to variables {[var.id for var in new_vars]}")
 
         # find overleapped variables:
         overlapped_vars = [var for var in new_vars if var in self._vars]
         # project to the subset
-        ret = self._project_subset(overlapped_vars, is_refine = is_refine)
+        ret = self._project_subset(overlapped_vars, is_refine = is_refine, num_workers = num_workers)
         added_vars = [var for var in new_vars if var not in self._vars]
         if added_vars:
             ret = ret._project_extend(added_vars)
         ret._reorder_vars(new_vars)
-        LOG.debug(f"Result: {[var.id for var in ret.ordered_vars]}{ret.ordered_expr}")
+        if LOG.isEnabledFor(logging.DEBUG):
+            LOG.debug(f"Result: {[var.id for var in ret.ordered_vars]}{ret.ordered_expr}")
         return ret
     
-    def _project_subset(self, new_vars: Iterable[Var], is_refine = False):
+    def _project_subset(self, new_vars: Iterable[Var], is_refine = False, num_workers: int = 1):
         """ Project the set onto the new variables.
 
+        The refinement groups the elements by the values of the remaining variables in one pass,
+        a group is kept if its distinct values of the discarded variables within their domains are as many as the product of the domains.
+
         :param Iterable[str] vars: The id of the new variables, which must be a subset of the variables in the set
         :param bool is_refine: whether the resulting set is a refinement or abstraction, refinement results in a smaller project (must allow any values in the )
+        :param int num_workers: the number of processes for the refinement
         """
         # assume vars are subset of self._vars
         new_vars_set = {var for var in new_vars}
         indices = [i for i, var in enumerate(self._vars) if var in new_vars_set]
+        remain_vars = [var for var in self._vars if var in new_vars_set]
         # abstraction:
         if not is_refine:
-            remain_vars = [var for var in self._vars if var in new_vars_set]
             # collect all matching expr
-            new_expr = {tuple([elem[i] for i in indices]) for elem in self._expr_internal}
-            ret = ExplicitSet(vars = remain_vars, expr = new_expr)
+            new_expr = {tuple([elem[i] for i in indices]) for elem in self._iter_rows()}
+            ret = ExplicitSet._from_internal(remain_vars, new_expr, cubes=None if self._cubes else ())
             ret._reorder_vars(new_vars)
             return ret
 
         # refinement: need to check if all other expr is covered
         if is_refine:
-            discarded_vars = [var for var in self._vars if var not in new_vars_set] 
-            ret = self
-            for var in discarded_vars:
-                ret = ret._project_refine_one_variable(var)
+            discarded = [i for i, var in enumerate(self._vars) if var not in new_vars_set]
+            discarded_domains = [list(self._vars[i].value_range) for i in discarded]
+            groups = self._refine_groups(indices, discarded)
+            if num_workers > 1:
+                # the groups are independent, split them by the hash of the remaining values
+                chunks = [[] for _ in range(num_workers)]
+                for group in groups:
+                    chunks[hash(group[0]) % num_workers].append(group)
+                with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers) as executor:
+                    results = executor.map(_covered_keys, chunks, itertools.repeat(discarded_domains))
+                    new_expr = [key for keys in results for key in keys]
+            else:
+                new_expr = _covered_keys(groups, discarded_domains)
+            ret = ExplicitSet._from_internal(remain_vars, new_expr, cubes=())
             ret._reorder_vars(new_vars)
             return ret            
 
-    def _project_refine_one_variable(self, var: Var):   
-        discarded_idx =  self._vars.index(var)
-        discarded_domain = set(var._value_range)
-        new_vars = [v for v in self._vars if v != var]
-        # create a dictionary: key: new_elem_candidate, elem: discarded value set
-        refine_dict = dict()
-        for elem in self._expr_internal:
-            cand = tuple([elem[i] for i, val in enumerate(elem) if i != discarded_idx])
-            discarded_value = elem[discarded_idx]
-            if cand not in refine_dict:
-                refine_dict[cand] = set([discarded_value])
-            else:
-                refine_dict[cand].add(discarded_value)
-
-        new_expr = [cand for cand, covered_expr in refine_dict.items() if covered_expr == discarded_domain]
-        ret = ExplicitSet(vars = new_vars, expr = new_expr)
-        return ret
+    def _refine_groups(self, indices: list[int], discarded: list[int]) -> list[tuple[tuple, list[tuple]]]:
+        """Group the values of the discarded columns by the values of the columns in indices
 
+        The values of the columns in indices are expanded as different cubes may cover the discarded domain together.
+        """
+        remain_domains = [self._vars[i].value_range for i in indices]
+        groups = dict()
+        for elem in self._iter_rows():
+            discarded_values = tuple([elem[i] for i in discarded])
+            for key in _expand_cube(tuple([elem[i] for i in indices]), remain_domains):
+                groups.setdefault(key, []).append(discarded_values)
+        return list(groups.items())
 
     def _project_extend(self, new_vars: Iterable[Var], is_refine = True):   
-        """ Extend the variables with new_vars
+        """ Extend the variables with new_vars, the new columns are don't care
         """
-        new_domain = [var._value_range for var in new_vars]
+        extend_elem = (ANY,) * len(new_vars)
+        new_expr = [tuple(elem) + extend_elem for elem in self._iter_rows()]
 
-        new_expr = []
-        for elem in self._expr_internal:
-            for extend_elem in itertools.product(*new_domain):
-                new_expr.append(tuple(list(elem) + list(extend_elem)))
+        return ExplicitSet._from_internal(self._vars + list(new_vars), (), cubes=new_expr)
 
-        return ExplicitSet(self._vars + new_vars, new_expr)
-    
+    def select(self, assignment: dict[Var, Any]) -> ExplicitSet:
+        """ Select the elements matching a partial assignment of the variables
+
+        The elements are looked up in an index on the assigned variables.
+        The index is built by the first selection on the same variables and kept with the set,
+        later selections take time proportional to the number of selected elements.
+
+        :param dict[Var, Any] assignment: the values of some of the variables of the set
+        :return: the elements with the given values, the variables are the same as this set
+        :rtype: ExplicitSet
+        """
+        positions = {var: i for i, var in enumerate(self._vars)}
+        missing_vars = [var.id for var in assignment if var not in positions]
+        if missing_vars:
+            raise Exception(f"The variables {missing_vars} are not in the set")
+        columns = tuple(sorted([positions[var] for var in assignment]))
+        key = tuple([assignment[self._vars[i]] for i in columns])
+
+        new_expr = list(self._index(columns).get(key, ()))
+        if self._cubes:
+            if self._cube_index is None:
+                self._cube_index = _CubeIndex(self._cubes, self._vars)
+            assigned_cube = [ANY] * len(self._vars)
+            for i, val in zip(columns, key):
+                assigned_cube[i] = val
+            assigned_cube = tuple(assigned_cube)
+            for cube in self._cubes:
+                meet = self._cube_index.meet(cube, assigned_cube)
+                if meet is not None:
+                    new_expr.append(meet)
+        ret = ExplicitSet._from_internal(self._vars, new_expr)
+        ret._reorder_vars(self.ordered_vars)
+        return ret
+
+    def _index(self, columns: tuple[int]) -> dict[tuple, list[ExplicitSetElementType]]:
+        """The elements that are not cubes grouped by their values of the columns, built once for each columns"""
+        if self._indexes is None:
+            self._indexes = dict()
+        index = self._indexes.get(columns)
+        if index is None:
+            key_of = _permuter(columns, len(self._vars)) or tuple
+            index = dict()
+            for elem in self._concrete_expr():
+                index.setdefault(key_of(elem), []).append(elem)
+            self._indexes[columns] = index
+        return index
     
     def is_contain(self, element: ExplicitSetElementType) -> bool:
         """ Check if the set is contain the element
@@ -317,7 +537,14 @@ class ExplicitSet(SetBase):
         """
         self._verify_match_len_element(element, len(self.ordered_vars))
         # convert to internal
-        element = self._convert_elem_to_internal(element)
+        return self._contains_internal(self._convert_elem_to_internal(element))
+
+    def _contains_internal(self, element: ExplicitSetElementType) -> bool:
+        """Check if the set contains the element following the internal_vars"""
+        if self._cubes:
+            if self._cube_index is None:
+                self._cube_index = _CubeIndex(self._cubes, self._vars)
+            return element in self._expr_internal or self._cube_index.covers(element)
         return element in self.internal_expr
 
     def is_subset(self, other: ExplicitSet) -> bool:
@@ -327,9 +554,11 @@ class ExplicitSet(SetBase):
         :return: True if this set is a subset of the other set. False if not.
         :rtype: bool
         """
-        set1, set2 = self._context_sync(self, other)
-
-        return set1.internal_expr.issubset(set2.internal_expr)
+        if self._cubes or other._cubes:
+            return not self._apply_set_op(other, set.difference).is_satifiable()
+        if not self._is_same_vars(self, other):
+            return self._join_is_subset(self, other)
+        return self.internal_expr.issubset(other.internal_expr)
 
     def is_proper_subset(self, other: ExplicitSet) -> bool:
         """ Check if the set is a proper subset of the other set
@@ -338,9 +567,11 @@ class ExplicitSet(SetBase):
         :return: True if this set is a proper subset of the other set. False if not.
         :rtype: bool
         """
-        set1, set2 = self._context_sync(self, other)
-
-        return set1.internal_expr < set2.internal_expr
+        if self._cubes or other._cubes:
+            return self.is_subset(other) and not other.is_subset(self)
+        if not self._is_same_vars(self, other):
+            return self._join_is_subset(self, other) and not self._join_is_subset(other, self)
+        return self.internal_expr < set(other.internal_expr)
 
     def is_satifiable(self) -> bool:
         """ Check if the set is satisfiable, i.e., not empty
@@ -348,7 +579,7 @@ class ExplicitSet(SetBase):
         :return: True if this set is satisfiable. False if not.
         :rtype: bool
         """
-        return bool(self.internal_expr)
+        return bool(self._cubes) or bool(self.internal_expr)
 
     def is_equivalence(self, other: ExplicitSet) -> bool:
         """ Check if the set is equivalent to the other set
@@ -357,9 +588,11 @@ class ExplicitSet(SetBase):
         :return: True if this set is equivalent to the other set. False if not.
         :rtype: bool
         """
-        set1, set2 = self._context_sync(self, other)
-
-        return set1.internal_expr == set2.internal_expr
+        if self._cubes or other._cubes:
+            return self.is_subset(other) and other.is_subset(self)
+        if not self._is_same_vars(self, other):
+            return self._join_is_subset(self, other) and self._join_is_subset(other, self)
+        return self.internal_expr == set(other.internal_expr)
 
     def is_disjoint(self, other: ExplicitSet) -> bool:
         """ Check if the set is disjoint to the other set
@@ -368,9 +601,11 @@ class ExplicitSet(SetBase):
         :return: True if this set is disjoint to the other set. False if not.
         :rtype: bool
         """
-        set1, set2 = self._context_sync(self, other)
-
-        return set1.internal_expr.isdisjoint(set2.internal_expr)
+        if self._cubes or other._cubes:
+            return not self._apply_set_op(other, set.intersection).is_satifiable()
+        if not self._is_same_vars(self, other):
+            return not any(True for _ in self._join_rows(self, other))
+        return self.internal_expr.isdisjoint(other.internal_expr)
 
     @classmethod
     def generate_variable_equivalence_constraint_set(cls, vars: list[Var]) -> ExplicitSet:
@@ -382,9 +617,218 @@ class ExplicitSet(SetBase):
 
         return cls(vars = vars, expr=expr)
 
-    def len(self):
-        return len(self._vars)
+    def len(self) -> int:
+        """ The number of elements in the set, same as :meth:`cardinality`
+        """
+        return self.cardinality()
     
+    @classmethod
+    def _validate(cls, vars: ExplicitSetVarType, expr: ExplicitSetExpressionType) -> None:
+        """Check the variables are unique and finite, and the elements match the number of variables"""
+        # check no duplicate variable in vars
+        if not cls._verify_unique_vars(vars):
+            var_names = [var.id for var in vars]
+            raise Exception(f"Duplicate variables are not allowed {var_names}")
+        
+        if not cls._verify_finite_domain(vars):
+            violated_var = [var for var in vars if not var.is_finite()]
+            raise Exception(f"The created domain is not finite: Variables: {violated_var}")
+        
+        # check if the tuple is ok
+        for elem in expr:
+            cls._verify_match_len_element(elem, len(vars))
+
+    @classmethod
+    def _convert_explicit_set(cls, other: ExplicitSet) -> ExplicitSet:
+        """Create the set with the elements of other, the variables follow the internal order of other"""
+        return cls(vars=other.internal_vars, expr=other.internal_expr)
+
+    def _coerce(self, other: ExplicitSet) -> ExplicitSet:
+        """Convert the other operand into the representation of this set"""
+        return type(self).from_explicit_set(other)
+
+    def _merge(self, other: ExplicitSet, op) -> ExplicitSet:
+        """Apply the set operation op, the variables of the result are those of this set followed by the new variables of the other set"""
+        ret = self._apply_set_op(other, op)
+
+        new_var = self.ordered_vars
+        new_var += [var for var in other.ordered_vars if var not in new_var]
+        ret._reorder_vars(new_var)
+        return ret
+
+    def _apply_set_op(self, other: ExplicitSet, op) -> ExplicitSet:
+        """Apply op on the elements of the two sets after bringing them to the same variables
+
+        Subclasses override this to run the operation on their own storage.
+        """
+        # different variables: join on the shared variables instead of extending both operands
+        if not self._cubes and not other._cubes and not self._is_same_vars(self, other):
+            if op is set.intersection:
+                return ExplicitSet._from_internal(self._join_vars(self, other), self._join_rows(self, other), cubes=())
+            if op is set.difference:
+                return ExplicitSet._from_internal(self._join_vars(self, other), self._join_difference_rows(self, other), cubes=())
+        # check vars
+        set1, set2 = self._context_sync(self, other)
+        if set1._cubes or set2._cubes:
+            return self._cube_set_op(set1, set2, op)
+        return ExplicitSet._from_internal(set1._vars, op(set1.internal_expr, set2.internal_expr), cubes=())
+
+    @staticmethod
+    def _cube_set_op(set1: ExplicitSet, set2: ExplicitSet, op) -> ExplicitSet:
+        """Apply op on two sets with the same variables without expanding their cubes
+
+        The concrete elements are handled by the plain set operation and matched against the cubes of the other set by _CubeIndex.
+        """
+        vars = set1._vars
+        concrete1, concrete2 = set1._concrete_expr(), set2._concrete_expr()
+        cubes1, cubes2 = set(set1._cubes), set(set2._cubes)
+        index1, index2 = _CubeIndex(cubes1, vars), _CubeIndex(cubes2, vars)
+        if op is set.union:
+            cubes = cubes1 | cubes2
+            index = _CubeIndex(cubes, vars)
+            # drop the elements subsumed by a larger cube
+            new_expr = [cube for cube in cubes if not index.covers(cube, strict=True)]
+            new_expr += [elem for elem in concrete1 | concrete2 if not index.covers(elem)]
+        elif op is set.intersection:
+            new_expr = list(concrete1 & concrete2)
+            new_expr += [elem for elem in concrete1 if index2.covers(elem)]
+            new_expr += [elem for elem in concrete2 if index1.covers(elem)]
+            for cube in cubes1:
+                for other_cube in index2.intersecting(cube):
+                    meet = index2.meet(cube, other_cube)
+                    if meet is not None:
+                        new_expr.append(meet)
+        elif op is set.difference:
+            new_expr = [elem for elem in concrete1 if elem not in concrete2 and not index2.covers(elem)]
+            index_all2 = _CubeIndex(set(concrete2) | cubes2, vars)
+            for cube in cubes1:
+                if index2.covers(cube):
+                    continue
+                pieces = [cube]
+                for other_cube in index_all2.intersecting(cube):
+                    pieces = [new_piece for piece in pieces for new_piece in index_all2.sharp(piece, other_cube)]
+                    if not pieces:
+                        break
+                new_expr += pieces
+        else:
+            new_expr = op(set1.internal_expr, set2.internal_expr)
+        return ExplicitSet._from_internal(vars, new_expr)
+
+    def _concrete_expr(self) -> set[ExplicitSetElementType]:
+        """The elements that are not cubes, following the internal_vars"""
+        return self._expr_internal if self._cubes else self.internal_expr
+
+    def _iter_rows(self) -> Iterable[ExplicitSetElementType]:
+        """Iterate the stored elements including the cubes, following the internal_vars"""
+        if self._cubes:
+            return itertools.chain(self._expr_internal, self._cubes)
+        return self._iter_internal()
+
+    def _iter_internal(self) -> Iterable[ExplicitSetElementType]:
+        """Iterate the elements following the internal_vars"""
+        return iter(self.internal_expr)
+
+    @staticmethod
+    def _is_same_vars(set1: ExplicitSet, set2: ExplicitSet) -> bool:
+        return set(set1.internal_vars) == set(set2.internal_vars)
+
+    @staticmethod
+    def _join_plan(set1: ExplicitSet, set2: ExplicitSet):
+        """Split the variables of the two sets for a natural join on their shared variables
+
+        :return: the key positions in set1 and set2, the positions of the variables only in set1 and those only in set2
+        """
+        vars1 = list(set1.internal_vars)
+        vars2 = list(set2.internal_vars)
+        pos2 = {var: j for j, var in enumerate(vars2)}
+        vars1_set = set(vars1)
+        key1 = [i for i, var in enumerate(vars1) if var in pos2]
+        key2 = [pos2[vars1[i]] for i in key1]
+        only1 = [i for i, var in enumerate(vars1) if var not in pos2]
+        only2 = [j for j, var in enumerate(vars2) if var not in vars1_set]
+        return key1, key2, only1, only2
+
+    @staticmethod
+    def _join_vars(set1: ExplicitSet, set2: ExplicitSet) -> ExplicitSetVarType:
+        """The variables of a joined element: those of set1 followed by those only in set2"""
+        vars1_set = set(set1.internal_vars)
+        return list(set1.internal_vars) + [var for var in set2.internal_vars if var not in vars1_set]
+
+    @staticmethod
+    def _in_domain(elem: tuple, indices: list[int], domains: list[set]) -> bool:
+        return all(elem[i] in domain for i, domain in zip(indices, domains))
+
+    @classmethod
+    def _join_index(cls, set1: ExplicitSet, set2: ExplicitSet):
+        """Group the elements of set2 by the values of the shared variables
+
+        Only the values of the variables that are not in set1 and within their domains are kept,
+        since the extension of set1 only enumerates the domain.
+
+        :return: the join plan and the dictionary from key to the set of values of the variables only in set2
+        """
+        key1, key2, only1, only2 = plan = cls._join_plan(set1, set2)
+        vars2 = list(set2.internal_vars)
+        domains2 = [set(vars2[j].value_range) for j in only2]
+        index = dict()
+        for elem in set2.internal_expr:
+            if not cls._in_domain(elem, only2, domains2):
+                continue
+            key = tuple([elem[j] for j in key2])
+            index.setdefault(key, set()).add(tuple([elem[j] for j in only2]))
+        return plan, index
+
+    @classmethod
+    def _join_rows(cls, set1: ExplicitSet, set2: ExplicitSet) -> Iterable[ExplicitSetElementType]:
+        """Natural join of the two sets, the elements follow _join_vars(set1, set2)"""
+        (key1, _, only1, _), index = cls._join_index(set1, set2)
+        vars1 = list(set1.internal_vars)
+        domains1 = [set(vars1[i].value_range) for i in only1]
+        for elem in set1.internal_expr:
+            if not cls._in_domain(elem, only1, domains1):
+                continue
+            for extend_elem in index.get(tuple([elem[i] for i in key1]), ()):
+                yield tuple(elem) + extend_elem
+
+    @classmethod
+    def _join_difference_rows(cls, set1: ExplicitSet, set2: ExplicitSet) -> Iterable[ExplicitSetElementType]:
+        """Difference of the two sets over the union of their variables, the elements follow _join_vars(set1, set2)
+
+        Each element of set1 is only extended against the elements of set2 that share its key.
+        """
+        (key1, _, only1, only2), index = cls._join_index(set1, set2)
+        vars1 = list(set1.internal_vars)
+        vars2 = list(set2.internal_vars)
+        domains1 = [set(vars1[i].value_range) for i in only1]
+        new_domain = [vars2[j].value_range for j in only2]
+        for elem in set1.internal_expr:
+            matched = ()
+            if cls._in_domain(elem, only1, domains1):
+                matched = index.get(tuple([elem[i] for i in key1]), ())
+            for extend_elem in itertools.product(*new_domain):
+                if extend_elem not in matched:
+                    yield tuple(elem) + extend_elem
+
+    @classmethod
+    def _join_is_subset(cls, set1: ExplicitSet, set2: ExplicitSet) -> bool:
+        """Check set1 is a subset of set2 over the union of their variables by counting the matched extensions"""
+        (key1, _, only1, only2), index = cls._join_index(set1, set2)
+        vars1 = list(set1.internal_vars)
+        vars2 = list(set2.internal_vars)
+        domains1 = [set(vars1[i].value_range) for i in only1]
+        num_extension = 1
+        for j in only2:
+            num_extension *= len(set(vars2[j].value_range))
+        if num_extension == 0:
+            # the extension of set1 is empty
+            return True
+        for elem in set1.internal_expr:
+            if not cls._in_domain(elem, only1, domains1):
+                return False
+            if len(index.get(tuple([elem[i] for i in key1]), ())) != num_extension:
+                return False
+        return True
+
     @staticmethod
     def _context_sync(set1: ExplicitSet, set2:ExplicitSet):
         """Make to set at the same page by project their variable"""
@@ -417,22 +861,161 @@ class ExplicitSet(SetBase):
         return all([var.is_finite() for var in vars])
 
     def _convert_elem_to_external(self, elem: tuple) -> tuple:  
-        sorted_pair = sorted(zip(self._var_order, elem), key=lambda x: x[0])
-        return tuple([val for _, val in sorted_pair])
+        return tuple([elem[idx] for idx in self._inverse_order])
 
     def _convert_expr_to_external(self, expr: list[tuple]) -> list[tuple]:
-        return {self._convert_elem_to_external(elem) for elem in expr}
+        permute = _permuter(self._inverse_order)
+        return set(expr) if permute is None else set(map(permute, expr))
 
     # elem in var_order: the elem should go to place 
     def _convert_elem_to_internal(self, elem: tuple) -> tuple:  
         return tuple([ elem[idx] for idx in self._var_order])
     
     def _convert_expr_to_internal(self, expr: list[tuple]) -> list[tuple]:  
-        return {self._convert_elem_to_internal(elem) for elem in expr}
+        permute = _permuter(self._var_order)
+        return {tuple(elem) for elem in expr} if permute is None else set(map(permute, expr))
 
     def _domain(self):
         return itertools.product(*[var.value_range for var in self._vars])
 
+def _permuter(order: tuple[int], num_columns: int | None = None):
+    """A function taking the values of an element in the given order, None if the order is the identity
+
+    :param num_columns: the length of the elements, default to the length of order
+    """
+    if len(order) == (len(order) if num_columns is None else num_columns) and all(i == idx for i, idx in enumerate(order)):
+        return None
+    if len(order) == 0:
+        return lambda elem: ()
+    if len(order) == 1:
+        return lambda elem: (elem[order[0]],)
+    return operator.itemgetter(*order)
+
 def argsort(seq):
     # http://stackoverflow.com/questions/3071415/efficient-method-to-calculate-the-rank-vector-of-a-list-in-python
-    return sorted(range(len(seq)), key=lambda i: seq[i].get_id())
\ No newline at end of file
+    return sorted(range(len(seq)), key=lambda i: seq[i].get_id())
+
+class _DontCare:
+    """The don't care value of a cube column, see :data:`ExplicitSet.ANY`"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __repr__(self):
+        return "ANY"
+
+    def __reduce__(self):
+        return (_DontCare, ())
+
+ANY = _DontCare()
+ExplicitSet.ANY = ANY
+
+def _covered_keys(groups: list[tuple[tuple, list[tuple]]], domains: list[list]) -> list[tuple]:
+    """The keys of the groups whose values cover the product of the domains
+
+    The values in a group are counted once and those outside the domains are ignored.
+    """
+    num_cover = math.prod([len(domain) for domain in domains])
+    if num_cover == 0:
+        return []
+    domain_sets = [set(domain) for domain in domains]
+    ret = []
+    for key, values in groups:
+        covered = set()
+        for value in values:
+            if all(val is ANY for val in value):
+                covered = None
+                break
+            for elem in _expand_cube(value, domains):
+                if all(val in domain for val, domain in zip(elem, domain_sets)):
+                    covered.add(elem)
+        if covered is None or len(covered) == num_cover:
+            ret.append(key)
+    return ret
+
+def _expand_cube(cube: tuple, domains: list) -> Iterable[tuple]:
+    """Enumerate the elements of a cube, the domains are those of the columns"""
+    if ANY not in cube:
+        return (cube,)
+    return itertools.product(*[domain if val is ANY else (val,) for val, domain in zip(cube, domains)])
+
+def _fixed_columns(cube: tuple) -> tuple[int]:
+    return tuple([i for i, val in enumerate(cube) if val is not ANY])
+
+class _CubeIndex:
+    """Cubes grouped by their fixed (not don't care) columns
+
+    A cube covers an element if the values of the fixed columns match and the other values of the element are in the domain.
+    Lookups cost one dictionary access per group instead of one comparison per cube.
+    """
+    def __init__(self, cubes: Iterable[tuple], vars: list[Var]):
+        self._ranges = [var.value_range for var in vars]
+        self._domains = [set(value_range) for value_range in self._ranges]
+        self._groups: dict[tuple, dict[tuple, list]] = dict()
+        self._partial: dict[tuple, dict[tuple, list]] = dict()
+        for cube in cubes:
+            fixed = _fixed_columns(cube)
+            self._groups.setdefault(fixed, dict()).setdefault(tuple([cube[i] for i in fixed]), []).append(cube)
+
+    def covers(self, elem: tuple, strict: bool = False) -> bool:
+        """Check if a cube contains elem, which can be a cube itself. If strict, a cube does not cover itself"""
+        elem_fixed = _fixed_columns(elem)
+        for fixed, keys in self._groups.items():
+            if strict and fixed == elem_fixed:
+                continue
+            if tuple([elem[i] for i in fixed]) not in keys:
+                continue
+            fixed_set = set(fixed)
+            if all(val is ANY or val in self._domains[i] for i, val in enumerate(elem) if i not in fixed_set):
+                return True
+        return False
+
+    def intersecting(self, elem: tuple) -> Iterable[tuple]:
+        """Iterate the cubes agreeing with elem on the columns fixed in both"""
+        elem_fixed = set(_fixed_columns(elem))
+        for fixed, keys in self._groups.items():
+            shared = tuple([i for i in fixed if i in elem_fixed])
+            partial = self._partial.get((fixed, shared))
+            if partial is None:
+                partial = dict()
+                for cubes in keys.values():
+                    for cube in cubes:
+                        partial.setdefault(tuple([cube[i] for i in shared]), []).append(cube)
+                self._partial[(fixed, shared)] = partial
+            yield from partial.get(tuple([elem[i] for i in shared]), ())
+
+    def meet(self, cube1: tuple, cube2: tuple) -> tuple | None:
+        """The intersection of two cubes, None if it is empty"""
+        new_cube = []
+        for i, (val1, val2) in enumerate(zip(cube1, cube2)):
+            if val1 is ANY and val2 is ANY:
+                new_cube.append(ANY)
+            elif val1 is ANY or val2 is ANY:
+                val = val2 if val1 is ANY else val1
+                if val not in self._domains[i]:
+                    return None
+                new_cube.append(val)
+            elif val1 == val2:
+                new_cube.append(val1)
+            else:
+                return None
+        return tuple(new_cube)
+
+    def sharp(self, cube1: tuple, cube2: tuple) -> list[tuple]:
+        """The difference of two cubes as disjoint cubes"""
+        if self.meet(cube1, cube2) is None:
+            return [cube1]
+        ret = []
+        current = list(cube1)
+        for i, (val1, val2) in enumerate(zip(cube1, cube2)):
+            if val2 is ANY or val1 is not ANY:
+                continue
+            for val in self._ranges[i]:
+                if val != val2:
+                    current[i] = val
+                    ret.append(tuple(current))
+            current[i] = val2
+        return ret
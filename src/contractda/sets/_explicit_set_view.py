@@ -0,0 +1,110 @@
+""" Lazy views on the elements of an ExplicitSet
+"""
+from __future__ import annotations
+from typing import Iterable, TYPE_CHECKING
+
+from contractda.sets._explicit_set import _permuter
+from contractda.vars._var import Var
+
+if TYPE_CHECKING:
+    from contractda.sets._explicit_set import ExplicitSet
+
+class ExplicitSetView:
+    """
+    A read-only view of the elements of an explicit set with the values following the given variables
+
+    The view does not copy the elements. Each iteration walks the storage of the set and picks the columns of the variables,
+    so inspecting a large set keeps the memory flat. :meth:`materialize` builds the elements only when they are needed at once.
+
+    If the variables are a subset of the variables of the set, the view is the projection (abstraction) onto them,
+    and the values shared by several elements of the set are produced once.
+
+    :param ExplicitSet eset: The set to be viewed
+    :param list[Var] vars: The variables of the view, which must be in the set. Default to the ordered_vars of the set
+    """
+    def __init__(self, eset: ExplicitSet, vars: Iterable[Var] = None):
+        if vars is None:
+            vars = eset.ordered_vars
+        vars = list(vars)
+        positions = {var: i for i, var in enumerate(eset.internal_vars)}
+        missing_vars = [var.id for var in vars if var not in positions]
+        if missing_vars:
+            raise Exception(f"The variables {missing_vars} are not in the set")
+        if len(set(vars)) != len(vars):
+            var_names = [var.id for var in vars]
+            raise Exception(f"Duplicate variables are not allowed {var_names}")
+
+        self._set = eset
+        self._vars = vars
+        self._columns = tuple([positions[var] for var in vars])
+        self._is_projection = len(vars) != len(positions)
+
+    def __str__(self):
+        return f"{tuple([str(var) for var in self._vars])} = {str(self.materialize())}"
+
+    @property
+    def vars(self) -> list[Var]:
+        """
+        The variables of the view, the values of the elements follow this order
+        """
+        return self._vars
+
+    def __iter__(self):
+        permute = _permuter(self._columns, len(self._set.internal_vars))
+        elems = self._set._iter_internal()
+        if permute is not None:
+            elems = map(permute, elems)
+        if self._is_projection:
+            elems = _unique(elems)
+        return elems
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, element: tuple) -> bool:
+        element = tuple(element)
+        if self._is_projection:
+            return any(elem == element for elem in self)
+        internal = [None] * len(element)
+        for col, val in zip(self._columns, element):
+            internal[col] = val
+        return self._set._contains_internal(tuple(internal))
+
+    def materialize(self) -> set[tuple]:
+        """ Build the elements of the view
+
+        :return: the elements with the values following the vars of the view
+        :rtype: set[tuple]
+        """
+        return set(self)
+
+class ExplicitSetDictView(ExplicitSetView):
+    """
+    A read-only view of the elements of an explicit set as dictionaries with keys being the variables
+
+    The dictionaries are created one at a time during the iteration.
+
+    :param ExplicitSet eset: The set to be viewed
+    :param list[Var] vars: The variables in the dictionaries, which must be in the set. Default to the ordered_vars of the set
+    """
+    def __iter__(self):
+        vars = self._vars
+        return (dict(zip(vars, elem)) for elem in super().__iter__())
+
+    def __contains__(self, element: dict) -> bool:
+        return super().__contains__(tuple([element[var] for var in self._vars]))
+
+    def materialize(self) -> list[dict]:
+        """ Build the elements of the view
+
+        :return: the elements as dictionaries
+        :rtype: list[dict]
+        """
+        return list(self)
+
+def _unique(elems: Iterable[tuple]) -> Iterable[tuple]:
+    seen = set()
+    for elem in elems:
+        if elem not in seen:
+            seen.add(elem)
+            yield elem
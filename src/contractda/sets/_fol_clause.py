@@ -1,13 +1,16 @@
 from __future__ import annotations
-from typing import Iterable, Callable
+from typing import Iterable, Iterator, Callable, Any
 from abc import ABC, abstractmethod
 import copy
 
+import numpy as np
+
 
 from contractda.vars._var import Var
 from contractda.sets._clause import Clause
 import contractda.sets._fol_lan as fol_lan
 from contractda.sets._parsers import fol_parser
+from contractda.solvers._cache import LRUCache
 
 from contractda.solvers._z3_interface import Z3Interface
 
@@ -19,14 +22,18 @@ class FOLClause(Clause):
     The structure of a first order clause is represented as a abstract syntax tree
 
     """
+    # the compiled functions and the orders of their arguments, keyed by the root
+    compile_cache = LRUCache(maxsize=1 << 12)
+
     def __init__(self, description: str, ctx: dict):
         self._root: fol_lan.AST_Node | None = None
-        self._symbols: dict = dict()
+        self._symbols: frozenset[str] = frozenset()
+        self._compiled: tuple | None = None
         if description is None:
             return
         
         self._root = fol_parser.parse(description, ctx)
-        self._symbols: dict = self._root.get_symbols()
+        self._symbols: frozenset[str] = self._root.get_symbols()
     
     def __str__(self):
         return str(self._root)
@@ -44,11 +51,11 @@ class FOLClause(Clause):
         instance._symbols = instance._root.get_symbols()
         return instance
 
-    def get_symbols(self) -> dict:
+    def get_symbols(self) -> frozenset[str]:
         return self._symbols
     
     def rename_symbols(self, vars_remap):
-        fol_lan.name_remap(vars_remap, self._root)
+        self._root = fol_lan.name_remap(vars_remap, self._root)
         self._symbols = self._root.get_symbols()
     
     def clause_not(self):
@@ -57,12 +64,12 @@ class FOLClause(Clause):
         return self
 
     def clause_and(self, other):
-        self._root = fol_lan.PropositionNodeBinOp("&&", self._root, other._root)
+        self._root = fol_lan.connect("&&", [self._root, other._root])
         self._obtain_symbols()
         return self
 
     def clause_or(self, other):
-        self._root = fol_lan.PropositionNodeBinOp("||", self._root, other._root)
+        self._root = fol_lan.connect("||", [self._root, other._root])
         self._obtain_symbols()
         return self
 
@@ -90,7 +97,68 @@ class FOLClause(Clause):
         raise NotImplementedError()
     
     def evaluate(self, value_table):
-        return self._root.evaluate(value_table=value_table)
+        function, symbols = self.compile()
+        try:
+            values = [value_table[symbol] for symbol in symbols]
+        except KeyError as e:
+            raise Exception(f"No symbol value found for: {e.args[0]}")
+        return function(*values)
+
+    def evaluate_batch(self, columns: dict[str, np.ndarray], chunk_size: int = 1 << 16) -> np.ndarray:
+        """ Evaluate the clause on many rows with NumPy operations, see :meth:`~contractda.sets._fol_lan.AST_Node.evaluate_batch`
+
+        The rows are evaluated chunk_size rows at a time, so the intermediate arrays are bounded by the chunk size.
+
+        :param dict[str, np.ndarray] columns: the values of the symbols, one array of the same length per symbol
+        :param int chunk_size: the number of rows evaluated at a time
+        :return: whether the clause holds on each row
+        :rtype: np.ndarray
+        """
+        if chunk_size <= 0:
+            raise Exception(f"The chunk size must be positive, got {chunk_size}")
+        columns = {name: np.asarray(column) for name, column in columns.items()}
+        lengths = set([len(column) for column in columns.values()])
+        if len(lengths) != 1:
+            raise Exception(f"The columns must have the same number of rows, got {sorted(lengths)}")
+        size = lengths.pop()
+        missing = self._symbols - columns.keys()
+        if missing:
+            raise Exception(f"No symbol value found for: {', '.join(sorted(missing))}")
+        ret = np.empty(size, dtype=bool)
+        for start in range(0, size, chunk_size):
+            chunk = {name: columns[name][start:start + chunk_size] for name in self._symbols}
+            ret[start:start + chunk_size] = self._root.evaluate_batch(chunk)
+        return ret
+
+    def evaluate_chunks(self, chunks: Iterable[dict[str, np.ndarray]]) -> Iterator[np.ndarray]:
+        """ Evaluate the clause on a stream of chunks of rows, e.g., read from a file one chunk at a time
+
+        :param Iterable[dict[str, np.ndarray]] chunks: the chunks of columns, see :meth:`evaluate_batch`
+        :return: whether the clause holds on each row, per chunk
+        :rtype: Iterator[np.ndarray]
+        """
+        for chunk in chunks:
+            # the chunks are already bounded, each one is evaluated at once
+            yield self.evaluate_batch(chunk, chunk_size=max([1] + [len(column) for column in chunk.values()]))
+
+    def compile(self) -> tuple[Callable[..., Any], tuple[str, ...]]:
+        """ Compile the clause into a Python function, see :func:`~contractda.sets._fol_lan.compile_tree`
+
+        The function is kept by the clause and in compile_cache, so the clauses with the same tree share it.
+
+        :return: the function and the names of the symbols in the order of its arguments
+        :rtype: tuple[Callable[..., Any], tuple[str, ...]]
+        """
+        compiled = self._compiled
+        if compiled is None or compiled[0] is not self._root:
+            root = self._root
+            function_symbols = self.compile_cache.get(root)
+            if function_symbols is None:
+                symbols = tuple(sorted(root.get_symbols()))
+                function_symbols = (fol_lan.compile_tree(root, symbols), symbols)
+                self.compile_cache.put(root, function_symbols)
+            compiled = self._compiled = (root, *function_symbols)
+        return compiled[1], compiled[2]
     
     def _obtain_symbols(self):
         self._symbols = self._root.get_symbols()
@@ -1,19 +1,94 @@
 """ Class for ClauseSet
 """
 from __future__ import annotations
-from typing import Iterable, Callable, Any
+from fractions import Fraction
+from typing import Iterable, Iterator, Callable, Any
 import copy
+import functools
+import operator
+import time
+
+import numpy as np
 
 from contractda.sets._clause_set import ClauseSet, ClauseSetVarType
+from contractda.sets._explicit_set import ExplicitSet
 from contractda.vars._var import Var
 from contractda.sets._clause import Clause
 import contractda.sets._fol_lan as fol_lan
 from contractda.sets._fol_clause import FOLClause
-from contractda.solvers import Z3Interface
+from contractda.sets._fol_simplify import FOLSimplifier
+from contractda.solvers import Z3Interface, QueryCache, SolverSession
+from contractda.solvers._cache import LRUCache
 
 from contractda.logger._logger import LOG
 
 
+# marks a key that is not in a cache
+_MISSING = object()
+
+# the solver methods of the connectives and the comparisons
+_SOLVER_OPERATORS = {"==": "clause_equal", "<=": "clause_le", "<": "clause_lt", ">": "clause_gt", ">=": "clause_ge",
+                     "!=": "clause_neq", "&&": "clause_and", "||": "clause_or", "->": "clause_implies"}
+_ARITHMETIC_OPERATORS = {"+": operator.add, "-": operator.sub, "*": operator.mul, "/": operator.truediv, "^": operator.pow}
+
+def _encode_proposition(solver, vars_map, node, args):
+    method = _SOLVER_OPERATORS.get(node.op)
+    if method is None or (isinstance(node, fol_lan.PropositionNodeNaryOp) and node.op not in ("&&", "||")):
+        raise Exception(f"Unsupported operator: {node.op}")
+    return getattr(solver, method)(*args)
+
+def _encode_not(solver, vars_map, node, args):
+    if node.op == "!":
+        return solver.clause_not(args[0])
+    raise Exception(f"Unsupported operator: {node.op}")
+
+def _encode_number(solver, val):
+    # the fractions are passed to the solver as exact real values, the integers stay integers
+    if isinstance(val, Fraction):
+        if val.denominator == 1:
+            return int(val)
+        return solver.get_constant_value("real", val)
+    return val
+
+def _encode_arithmetic(solver, vars_map, node, args):
+    function = _ARITHMETIC_OPERATORS.get(node.op)
+    if function is None:
+        raise Exception(f"Unsupported operator: {node.op}")
+    if all(type(arg) is int for arg in args) and node.op in ("/", "^"):
+        # the division and the negative powers of integer constants are exact fractions
+        return _encode_number(solver, function(Fraction(args[0]), args[1]))
+    if node.op == "/":
+        # the division by an integer constant is the real division, as the division by a decimal constant
+        args = [solver.get_constant_value("real", arg) if type(arg) is int else arg for arg in args]
+    return function(*args)
+
+def _encode_tf(solver, vars_map, node, args):
+    if node.val == "true":
+        return True
+    elif node.val == "false":
+        return False
+    raise Exception(f"Unsupported TF value: {node.val}")
+
+def _encode_symbol(solver, vars_map, node, args):
+    # this should be handled by clause set, to be removed
+    solver_var = vars_map.get(node.name, None)
+    if solver_var is None:
+        raise Exception(f"Not specified varibles {node.name}")
+    return solver_var
+
+# the solver term of a node from the solver terms of its children
+_ENCODE_RULES = {
+    fol_lan.PropositionNodeBinOp: _encode_proposition,
+    fol_lan.PropositionNodeNaryOp: _encode_proposition,
+    fol_lan.PropositionNodeUniOp: _encode_not,
+    fol_lan.PropositionNodeParen: lambda solver, vars_map, node, args: args[0],
+    fol_lan.ExpressionNodeParen: lambda solver, vars_map, node, args: args[0],
+    fol_lan.ExpressionNodeBinOp: _encode_arithmetic,
+    fol_lan.TFNode: _encode_tf,
+    fol_lan.Constant: lambda solver, vars_map, node, args: _encode_number(solver, node.val),
+    fol_lan.Symbol: _encode_symbol,
+}
+
 class FOLClauseSet(ClauseSet):
     """ClauseSet
 
@@ -23,6 +98,11 @@ class FOLClauseSet(ClauseSet):
     When context is needed, go through the list of symbols and then store the Var in the astnode
     When two clause are combined, rename by changing the astnode in the tree or reply on context when created
     """
+    #: the solver terms of the encoded subtrees, shared by all clause sets
+    encode_cache: LRUCache = LRUCache(maxsize=1 << 16)
+    #: the rewrites applied to the clauses before encoding, None to encode the clauses as they are
+    simplifier: FOLSimplifier | None = FOLSimplifier()
+
     def __init__(self, vars: ClauseSetVarType, expr: str | FOLClause, ctx = None):
         """ clause_type: the """
         # create the context
@@ -47,18 +127,53 @@ class FOLClauseSet(ClauseSet):
     #   Extraction
     ######################
     def __iter__(self):
-        pass
+        self._iter = self.get_enumeration()
+        return self
     
     def __next__(self):
-        pass
+        return next(self._iter)
 
-    def get_enumeration(self) -> Iterable:
+    def get_enumeration(self, vars: Iterable[Var] | None = None, limit: int | None = None, timeout: float | None = None) -> Iterable[dict]:
         """ Enumerate the set elements
 
-        :return: An iterable object that can produce all elements
-        :rtype: Iterable
+        The elements are generated lazily by a single incremental solver (AllSAT).
+        After each model, a clause blocking the values of vars is added and the same solver is checked again,
+        so the enumeration stops when the blocked models cover the set.
+        If vars is a subset of the variables, each projection of the set onto vars is produced once (projected model enumeration).
+
+        Note: a variable with an infinite domain that is not bounded by the clause makes the enumeration infinite, use limit or timeout.
+
+        :param Iterable[Var] vars: the variables of the elements, default to all the variables of the set
+        :param int limit: the maximum number of elements to be produced, default to no limit
+        :param float timeout: the time budget of the whole enumeration in seconds, the enumeration stops without error when it runs out
+        :return: An iterable object that can produce all elements, each element is a dictionary from the variables to their values
+        :rtype: Iterable[dict]
         """
-        pass
+        if vars is None:
+            vars = self._vars
+        vars = list(vars)
+        var_ids = {var.id for var in self._vars}
+        missing_vars = [var.id for var in vars if var.id not in var_ids]
+        if missing_vars:
+            raise Exception(f"The variables {missing_vars} are not in the set")
+        return self._enumerate(vars=vars, limit=limit, timeout=timeout)
+
+    def to_explicit_set(self, vars: Iterable[Var] | None = None) -> ExplicitSet:
+        """ Convert the set into an explicit set by enumerating its models
+
+        Only the elements of the set are enumerated, not the whole domain.
+
+        :param Iterable[Var] vars: the variables of the explicit set, the set is projected onto them. Default to all the variables of the set
+        :return: the explicit set with the same elements
+        :rtype: ExplicitSet
+        """
+        if vars is None:
+            vars = self._vars
+        vars = list(vars)
+        infinite_vars = [var.id for var in vars if not var.is_finite()]
+        if infinite_vars:
+            raise Exception(f"The domain of variables {infinite_vars} is not finite")
+        return ExplicitSet(vars, [tuple([elem[var] for var in vars]) for elem in self.get_enumeration(vars=vars)])
 
     def sample(self) -> Any:
         """ Sample an element in the set
@@ -81,6 +196,18 @@ class FOLClauseSet(ClauseSet):
             raise Exception("No element available for sample")
         return ret, sample
         pass
+    def optimize(self, var: Var, minimum: bool = False) -> Any:
+        """ Find the maximum or minimum value of a variable in the set
+
+        :param Var var: the variable to be optimized
+        :param bool minimum: whether to find the minimum instead of the maximum
+        :return: the optimal value of var, None if the set is empty
+        :rtype: Any
+        """
+        solver_instance = self._solver_type()
+        vars_map, encoded_clause = self.encode(solver=solver_instance, vars=self._vars, clause=self._expr)
+        return solver_instance.optimize(encoded_clause, vars_map[var.id], minimum=minimum)
+
     ######################
     #   Set Operation
     ######################
@@ -91,8 +218,8 @@ class FOLClauseSet(ClauseSet):
         :return: A new set which represents the union of the two set
         :rtype: FOLClauseSet
         """
-        new_expr_a = copy.deepcopy(self.expr)
-        new_expr_b = copy.deepcopy(other.expr)
+        new_expr_a = copy.copy(self.expr)
+        new_expr_b = copy.copy(other.expr)
         try:
             new_vars = self._combine_vars(self._vars, other._vars)
         except:
@@ -112,8 +239,8 @@ class FOLClauseSet(ClauseSet):
         :return: A new set which represents the intersect of the two set
         :rtype: FOLClauseSet
         """
-        new_expr_a = copy.deepcopy(self.expr)
-        new_expr_b = copy.deepcopy(other.expr)
+        new_expr_a = copy.copy(self.expr)
+        new_expr_b = copy.copy(other.expr)
         try:
             new_vars = self._combine_vars(self._vars, other._vars)
         except:
@@ -133,8 +260,8 @@ class FOLClauseSet(ClauseSet):
         :return: A new set which represents the difference of the two set
         :rtype: FOLClauseSet
         """
-        new_expr_a = copy.deepcopy(self.expr)
-        new_expr_b = copy.deepcopy(other.expr)
+        new_expr_a = copy.copy(self.expr)
+        new_expr_b = copy.copy(other.expr)
         try:
             new_vars = self._combine_vars(self._vars, other._vars)
         except:
@@ -154,7 +281,7 @@ class FOLClauseSet(ClauseSet):
         :return: A new set which represents the Complement of the set
         :rtype: FOLClauseSet
         """
-        new_expr = copy.deepcopy(self.expr)
+        new_expr = copy.copy(self.expr)
         new_expr.clause_not()
         new_instance = __class__.__new__(__class__)
         new_instance._expr = new_expr
@@ -208,6 +335,7 @@ class FOLClauseSet(ClauseSet):
         :return: True if the element is in the set. False if not.
         :rtype: bool
         """
+        value_table = dict()
         # if dictionary is using id
         if element:
             sample = list(element.keys())[0]
@@ -218,13 +346,45 @@ class FOLClauseSet(ClauseSet):
             else:
                 raise Exception("Unsupported element type")
             # empty table
-        # create value_table
+        # create value_table, the clause is compiled once and evaluated by the compiled function
         return self._expr.evaluate(value_table=value_table)
 
-    def is_subset(self, other: FOLClauseSet) -> bool:
+    def contains_batch(self, columns: dict[str | Var, np.ndarray], chunk_size: int = 1 << 16) -> np.ndarray:
+        """ Check which rows are contained in the set, see :meth:`~contractda.sets._fol_clause.FOLClause.evaluate_batch`
+
+        :param columns: A dictionary that maps variable, or its id, to the array of its values in the rows
+        :param int chunk_size: the number of rows checked at a time
+        :return: True for the rows in the set, False for the others
+        :rtype: np.ndarray
+        """
+        return self._expr.evaluate_batch(self._column_table(columns), chunk_size=chunk_size)
+
+    def contains_chunks(self, chunks: Iterable[dict[str | Var, np.ndarray]]) -> Iterator[np.ndarray]:
+        """ Check which rows of a stream of chunks are contained in the set, see :meth:`contains_batch`
+
+        :param chunks: the chunks of columns, e.g., read from a file one chunk at a time
+        :return: True for the rows in the set, False for the others, per chunk
+        :rtype: Iterator[np.ndarray]
+        """
+        return self._expr.evaluate_chunks(self._column_table(chunk) for chunk in chunks)
+
+    @staticmethod
+    def _column_table(columns: dict[str | Var, np.ndarray]) -> dict[str, np.ndarray]:
+        table = dict()
+        for var, column in columns.items():
+            if isinstance(var, str):
+                table[var] = column
+            elif isinstance(var, Var):
+                table[var.id] = column
+            else:
+                raise Exception("Unsupported element type")
+        return table
+
+    def is_subset(self, other: FOLClauseSet, session: SolverSession | None = None) -> bool:
         """ Check if the set is a subset of the other set
 
         :param FOLClauseSet other: the other set to be check if this set is a subset of it.
+        :param SolverSession session: the session answering the check, a new solver is used if None
         :return: True if this set is a subset of the other set. False if not.
         :rtype: bool
         """
@@ -234,36 +394,39 @@ class FOLClauseSet(ClauseSet):
         except:
             LOG.error("The two set is defined under different variables with the same identifier!")
         # if a and not b is unsatisfiable, then a is a subset ( there is no element in a but not in b i.e., all element is in b)
-        new_expr_a = copy.deepcopy(self.expr)
-        new_expr_b = copy.deepcopy(other.expr)
+        new_expr_a = copy.copy(self.expr)
+        new_expr_b = copy.copy(other.expr)
 
         new_expr_a.clause_and(new_expr_b.clause_not())
-        ret = not self._clause_satisfiable(vars=new_vars, clause=new_expr_a)
+        ret = not self._clause_satisfiable(vars=new_vars, clause=new_expr_a, session=session)
         LOG.debug(f"Result: {ret}")
 
         return ret
 
-    def is_proper_subset(self, other: FOLClauseSet) -> bool:
+    def is_proper_subset(self, other: FOLClauseSet, session: SolverSession | None = None) -> bool:
         """ Check if the set is a proper subset of the other set
 
         :param FOLClauseSet other: the other set to be check if this set is a proper subset of it.
+        :param SolverSession session: the session answering the checks, a new solver is used if None
         :return: True if this set is a proper subset of the other set. False if not.
         :rtype: bool
         """
-        return self.is_subset(other=other) and not other.is_subset(other=self)
+        return self.is_subset(other=other, session=session) and not other.is_subset(other=self, session=session)
 
-    def is_satifiable(self) -> bool:
+    def is_satifiable(self, session: SolverSession | None = None) -> bool:
         """ Check if the set is satisfiable, i.e., not empty
 
+        :param SolverSession session: the session answering the check, a new solver is used if None
         :return: True if this set is satisfiable. False if not.
         :rtype: bool
         """
-        return self._clause_satisfiable(vars=self._vars, clause=self._expr)
+        return self._clause_satisfiable(vars=self._vars, clause=self._expr, session=session)
 
-    def is_equivalence(self, other: FOLClauseSet) -> bool:
+    def is_equivalence(self, other: FOLClauseSet, session: SolverSession | None = None) -> bool:
         """ Check if the set is equivalent to the other set
 
         :param FOLClauseSet other: the other set to be check if this set is equivalent to it.
+        :param SolverSession session: the session answering the check, a new solver is used if None
         :return: True if this set is equivalent to the other set. False if not.
         :rtype: bool
         """
@@ -277,22 +440,23 @@ class FOLClauseSet(ClauseSet):
         # we must show that it is unsat
         # TODO: this can be more efficient as the generated expression do not used outside: it can be not a tree (share the subtrees)
         # a -> b
-        new_expr1 = copy.deepcopy(self.expr)
-        new_expr_b1 = copy.deepcopy(other.expr)
+        new_expr1 = copy.copy(self.expr)
+        new_expr_b1 = copy.copy(other.expr)
         new_expr1.clause_and(new_expr_b1.clause_not())
         # b -> a
-        new_expr_a2 = copy.deepcopy(self.expr)
-        new_expr2 = copy.deepcopy(other.expr)
+        new_expr_a2 = copy.copy(self.expr)
+        new_expr2 = copy.copy(other.expr)
         new_expr2.clause_and(new_expr_a2.clause_not())
         # a -> b and b -> a
         new_expr1.clause_or(new_expr2)
         
-        return not self._clause_satisfiable(vars=new_vars, clause=new_expr1)
+        return not self._clause_satisfiable(vars=new_vars, clause=new_expr1, session=session)
 
-    def is_disjoint(self, other: FOLClauseSet) -> bool:
+    def is_disjoint(self, other: FOLClauseSet, session: SolverSession | None = None) -> bool:
         """ Check if the set is disjoint to the other set
 
         :param FOLClauseSet other: the other set to be check if this set is disjoint to it.
+        :param SolverSession session: the session answering the check, a new solver is used if None
         :return: True if this set is disjoint to the other set. False if not.
         :rtype: bool
         """
@@ -301,12 +465,12 @@ class FOLClauseSet(ClauseSet):
         except:
             LOG.error("The two set is defined under different variables with the same identifier!")
         # find counter example that a and b (there should not be any element in both set)
-        new_expr_a = copy.deepcopy(self.expr)
-        new_expr_b = copy.deepcopy(other.expr)
+        new_expr_a = copy.copy(self.expr)
+        new_expr_b = copy.copy(other.expr)
 
         new_expr_a.clause_and(new_expr_b)
 
-        return not self._clause_satisfiable(vars=new_vars, clause=new_expr_a)
+        return not self._clause_satisfiable(vars=new_vars, clause=new_expr_a, session=session)
 
     @classmethod
     def generate_variable_equivalence_constraint_set(cls, vars: list[Var]) -> FOLClauseSet | None:
@@ -384,7 +548,7 @@ class FOLClauseSet(ClauseSet):
     def generate_boundary_set_linear(self, max_count:int = None, exclude_empty: bool = True) -> list[tuple[list[ClauseSet], list[ClauseSet]]]:
         critical_behavior_examples = []
         result = []
-        self._generate_boundary_set_linear(result=result, node=self.expr.root, root=self.expr.root, exclude_empty=exclude_empty, vars=self.vars)
+        self._generate_boundary_set_linear(result=result, node=self.expr.root, wrap=lambda new_root: new_root, exclude_empty=exclude_empty, vars=self.vars)
         for (in_roots, out_roots) in result:
             example_ins = [FOLClauseSet(vars=self.vars, expr=FOLClause._create_clause_by_node(root)) for root in in_roots] 
             example_outs = [FOLClauseSet(vars=self.vars, expr=FOLClause._create_clause_by_node(root)) for root in out_roots]
@@ -417,7 +581,59 @@ class FOLClauseSet(ClauseSet):
                 __class__._update_nodes(node=child)
 
 
-    def _clause_satisfiable(self, vars: list[Var], clause: FOLClause):
+    def _enumerate(self, vars: list[Var], limit: int | None, timeout: float | None) -> Iterable[dict]:
+        solver_instance = self._solver_type()
+        vars_map, encoded_clause = self.encode(solver=solver_instance, vars=self._vars, clause=self._expr)
+        solver_instance.add_conjunction_clause(encoded_clause)
+        solver_vars = [vars_map[var.id] for var in vars]
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        count = 0
+        while limit is None or count < limit:
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    LOG.info(f"Enumeration stopped by the timeout after {count} elements")
+                    return
+                solver_instance.set_timeout(max(1, int(remaining * 1000)))
+            try:
+                is_sat = solver_instance.check()
+            except Exception:
+                if deadline is not None and time.monotonic() >= deadline:
+                    LOG.info(f"Enumeration stopped by the timeout after {count} elements")
+                    return
+                raise
+            if not is_sat:
+                return
+            values = [solver_instance.get_model_value(solver_var) for solver_var in solver_vars]
+            yield {var: solver_instance.get_model_for_var(val) for var, val in zip(vars, values)}
+            count += 1
+            if not solver_vars:
+                # the empty assignment is the only element
+                return
+            # block the values of this model
+            solver_instance.add_conjunction_clause(solver_instance.clause_or(*[solver_instance.clause_neq(solver_var, val) for solver_var, val in zip(solver_vars, values)]))
+
+    def _clause_satisfiable(self, vars: list[Var], clause: FOLClause, session: SolverSession | None = None):
+        cache = QueryCache.get_active()
+        if cache is None:
+            return self._check_clause_satisfiable(vars=vars, clause=clause, session=session)
+        if session is None:
+            kind = f"sat:{self._solver_type.__name__}"
+        else:
+            # the context of the session is part of the query
+            kind = f"sat:{session.solver_type.__name__}:{session.context_key}"
+        key = cache.make_key(kind, [str(clause)], [(var.id, var.type_str) for var in vars])
+        ret = cache.get(key)
+        if ret is None:
+            ret = self._check_clause_satisfiable(vars=vars, clause=clause, session=session)
+            cache.put(key, ret)
+        return ret
+
+    def _check_clause_satisfiable(self, vars: list[Var], clause: FOLClause, session: SolverSession | None = None):
+        if session is not None:
+            _, encoded_clause = self.encode(solver=session.solver, vars=vars, clause=clause, vars_map=session.declare(vars))
+            return session.check(encoded_clause)
         solver_instance = self._solver_type()
         _, encoded_clause = self.encode(solver=solver_instance, vars=vars, clause=clause)
         solver_instance.add_conjunction_clause(encoded_clause)
@@ -425,100 +641,54 @@ class FOLClauseSet(ClauseSet):
         return ret   
 
     def encode(self, solver, vars: list[Var], clause: FOLClause, vars_map: dict | None = None):
-        """Encode a first order logic clause into solver clauses"""
+        """Encode a first order logic clause into solver clauses
+
+        The encoded subtrees are kept in encode_cache, keyed by the solver type, the node and the sorts of vars,
+        so encoding the same clause or a clause sharing subtrees with it again reuses the solver terms.
+        The solver variables in vars_map must be created by get_fresh_variable from the ids and sorts of vars.
+        The clause is simplified by simplifier first.
+        """
         # generate symbols in solver
         if vars_map is None:
             vars_map = {var.id: solver.get_fresh_variable(var.id, sort=var.type_str) for var in vars}
-        # 
+        # the solver terms only depend on the sorts of the variables
+        scope = (type(solver), frozenset([(var.id, var.type_str) for var in vars]))
         root = clause.root
-        solver_clause = self._encode(solver=solver, vars_map=vars_map, node=root)
+        if self.simplifier is not None:
+            root = self.simplifier.simplify(root)
+        solver_clause = self._encode(solver=solver, vars_map=vars_map, node=root, scope=scope)
         return vars_map, solver_clause
 
-    def _encode(self, solver, vars_map, node: fol_lan.AST_Node):
+    def _encode(self, solver, vars_map, node: fol_lan.AST_Node, scope = None):
+        """Encode the tree without recursion, the terms of the subtrees are looked up and stored in encode_cache if scope is given"""
+        rules = {node_type: functools.partial(rule, solver, vars_map) for node_type, rule in _ENCODE_RULES.items()}
+        if scope is None:
+            return fol_lan.transform(node, rules)
 
-        # recursively encode the ast
-        if isinstance(node, fol_lan.PropositionNodeBinOp):
-            solver_clause1 = self._encode(solver=solver, vars_map=vars_map, node=node.children[0])
-            solver_clause2 = self._encode(solver=solver, vars_map=vars_map, node=node.children[1])
-            if node.op == "==":
-                return solver.clause_equal(solver_clause1, solver_clause2)
-            elif node.op == "<=":
-                return solver.clause_le(solver_clause1, solver_clause2)
-            elif node.op == "<":
-                return solver.clause_lt(solver_clause1, solver_clause2)
-            elif node.op == ">":
-                return solver.clause_gt(solver_clause1, solver_clause2)
-            elif node.op == ">=":
-                return solver.clause_ge(solver_clause1, solver_clause2)
-            elif node.op == "!=":
-                return solver.clause_neq(solver_clause1, solver_clause2)
-            elif node.op == "&&":
-                return solver.clause_and(solver_clause1, solver_clause2)
-            elif node.op == "||":
-                return solver.clause_or(solver_clause1, solver_clause2)
-            elif node.op == "->":
-                return solver.clause_implies(solver_clause1, solver_clause2)
-            else:
-                raise Exception(f"Unsupported operator: {node.op}")
+        def known(node: fol_lan.AST_Node):
+            solver_clause = self.encode_cache.get((scope, node), _MISSING)
+            return None if solver_clause is _MISSING else solver_clause
 
-        elif isinstance(node, fol_lan.PropositionNodeUniOp):
-            solver_clause = self._encode(solver=solver, vars_map=vars_map, node=node.children[0])
-            if node.op == "!":
-                return solver.clause_not(solver_clause)
-            else:
-                raise Exception(f"Unsupported operator: {node.op}")
-
-        elif isinstance(node, fol_lan.PropositionNodeParen):
-            return self._encode(solver=solver, vars_map=vars_map, node=node.children[0])
-        elif isinstance(node, fol_lan.ExpressionNodeParen):
-            return self._encode(solver=solver, vars_map=vars_map, node=node.children[0])
-        elif isinstance(node, fol_lan.ExpressionNodeBinOp):
-            solver_clause1 = self._encode(solver=solver, vars_map=vars_map, node=node.children[0])
-            solver_clause2 = self._encode(solver=solver, vars_map=vars_map, node=node.children[1])
-            if node.op == "+":
-                return solver_clause1 + solver_clause2
-            elif node.op == "-":
-                return solver_clause1 - solver_clause2
-            elif node.op == "*":
-                return solver_clause1 * solver_clause2
-            elif node.op == "/":
-                return solver_clause1 / solver_clause2
-            elif node.op == "^":
-                return solver_clause1 ** solver_clause2
-            else:
-                raise Exception(f"Unsupported operator: {node.op}")
-            
-        elif isinstance(node, fol_lan.TFNode):
-            if node.val == "true":
-                return True
-            elif node.val == "false":
-                return False
-            else:
-                raise Exception(f"Unsupported TF value: {node.val}")
-            
-        elif isinstance(node, fol_lan.Constant):
-            return node.val
-
-        elif isinstance(node, fol_lan.Symbol):
-            id = node.name
+        memo = dict()
+        solver_clause = fol_lan.transform(node, rules, memo=memo, known=known)
+        for encoded, term in memo.items():
+            self.encode_cache.put((scope, encoded), term)
+        return solver_clause
 
-            # this should be handled by clause set, to be removed
-            solver_var = vars_map.get(id, None)
-            if solver_var is None:
-                raise Exception(f"Not specified varibles {id}") 
-            
-            return solver_var
     @staticmethod
     def _generate_boundary_set(d: int, max_depth: int, node: fol_lan.AST_Node, exclude_empty: bool = False, vars = None) -> tuple[list[fol_lan.AST_Node], list[fol_lan.AST_Node]]:
         # all internal -> internal
         # once external -> external (no need to traverse)
         if d > max_depth:
-            neg_node = fol_lan.PropositionNodeUniOp(op="!", exp1=copy.deepcopy(node))
+            neg_node = fol_lan.PropositionNodeUniOp(op="!", exp1=node)
             return ([node], [neg_node])
         
         internal_boundaries: list[fol_lan.AST_Node] = []
         external_boundaries: list[fol_lan.AST_Node] = []
 
+        # the boundaries are defined on binary connectives
+        if isinstance(node, fol_lan.PropositionNodeNaryOp):
+            node = node.as_binary()
         if isinstance(node, fol_lan.PropositionNodeBinOp):
             if node.op == "==":
                 internal_boundaries.append(FOLClauseSet._newnode_change_op(node, op="=="))
@@ -599,126 +769,88 @@ class FOLClauseSet(ClauseSet):
 
         return internal_boundaries, external_boundaries
     @staticmethod
-    def _generate_boundary_set_linear(result: list[tuple[list[fol_lan.AST_Node], list[fol_lan.AST_Node]]], node: fol_lan.AST_Node, root: fol_lan.AST_Node, exclude_empty: bool = False, vars = None, reverse:bool = False):
-        
+    def _generate_boundary_set_linear(result: list[tuple[list[fol_lan.AST_Node], list[fol_lan.AST_Node]]], node: fol_lan.AST_Node, wrap: Callable[[fol_lan.AST_Node], fol_lan.AST_Node], exclude_empty: bool = False, vars = None, reverse:bool = False):
+        """ Collect the roots with the node replaced by its boundaries
+
+        The nodes are immutable, wrap rebuilds the root from a replacement of node,
+        the ancestors of node are rebuilt and the rest of the tree is shared.
+        """
         #DFS
         in_roots = []
         out_roots = []
+        # the boundaries are defined on binary connectives, the rebuilt roots keep the binary node
+        if isinstance(node, fol_lan.PropositionNodeNaryOp):
+            node = node.as_binary()
         if isinstance(node, fol_lan.PropositionNodeBinOp):
             if node.op == "==":
-                FOLClauseSet._newnode_change_op_in_place(node, "!=")
-                out_roots.append(copy.deepcopy(root))
-                FOLClauseSet._newnode_change_op_in_place(node, "==")
-                in_roots.append(copy.deepcopy(root))
-                FOLClauseSet._newnode_change_op_in_place(node, "==")
+                out_roots.append(wrap(node.with_op("!=")))
+                in_roots.append(wrap(node.with_op("==")))
             elif node.op == "<=":
-                FOLClauseSet._newnode_change_op_in_place(node, "<")
-                in_roots.append(copy.deepcopy(root))
-                FOLClauseSet._newnode_change_op_in_place(node, "==")
-                in_roots.append(copy.deepcopy(root))
-                FOLClauseSet._newnode_change_op_in_place(node, ">")
-                out_roots.append(copy.deepcopy(root))   
-                FOLClauseSet._newnode_change_op_in_place(node, "<=")
+                in_roots.append(wrap(node.with_op("<")))
+                in_roots.append(wrap(node.with_op("==")))
+                out_roots.append(wrap(node.with_op(">")))
             elif node.op == "<":
-                FOLClauseSet._newnode_change_op_in_place(node, "<")
-                in_roots.append(copy.deepcopy(root))
-                FOLClauseSet._newnode_change_op_in_place(node, "==")
-                out_roots.append(copy.deepcopy(root))
-                FOLClauseSet._newnode_change_op_in_place(node, ">")
-                out_roots.append(copy.deepcopy(root))
-                FOLClauseSet._newnode_change_op_in_place(node, "<")    
+                in_roots.append(wrap(node.with_op("<")))
+                out_roots.append(wrap(node.with_op("==")))
+                out_roots.append(wrap(node.with_op(">")))
             elif node.op == ">=":
-                FOLClauseSet._newnode_change_op_in_place(node, "<")
-                out_roots.append(copy.deepcopy(root))
-                FOLClauseSet._newnode_change_op_in_place(node, "==")
-                in_roots.append(copy.deepcopy(root))
-                FOLClauseSet._newnode_change_op_in_place(node, ">")
-                in_roots.append(copy.deepcopy(root))   
-                FOLClauseSet._newnode_change_op_in_place(node, ">=") 
+                out_roots.append(wrap(node.with_op("<")))
+                in_roots.append(wrap(node.with_op("==")))
+                in_roots.append(wrap(node.with_op(">")))
             elif node.op == ">":
-                FOLClauseSet._newnode_change_op_in_place(node, "<")
-                out_roots.append(copy.deepcopy(root))
-                FOLClauseSet._newnode_change_op_in_place(node, "==")
-                out_roots.append(copy.deepcopy(root))
-                FOLClauseSet._newnode_change_op_in_place(node, ">")
-                in_roots.append(copy.deepcopy(root))  
-                FOLClauseSet._newnode_change_op_in_place(node, ">") 
+                out_roots.append(wrap(node.with_op("<")))
+                out_roots.append(wrap(node.with_op("==")))
+                in_roots.append(wrap(node.with_op(">")))
             elif node.op == "!=":
-                FOLClauseSet._newnode_change_op_in_place(node, "==")
-                out_roots.append(copy.deepcopy(root))
-                FOLClauseSet._newnode_change_op_in_place(node, "!=")
-                in_roots.append(copy.deepcopy(root))  
-                FOLClauseSet._newnode_change_op_in_place(node, "!=") 
+                out_roots.append(wrap(node.with_op("==")))
+                in_roots.append(wrap(node.with_op("!=")))
             else:
                 left = node.children[0]
                 right = node.children[1]
-                if node.op == "||":
+                not_left = fol_lan.PropositionNodeUniOp(op="!", exp1=left)
+                not_right = fol_lan.PropositionNodeUniOp(op="!", exp1=right)
+                op = node.op
+                if op == "||":
                     # DFS
-                    node.children[1] = fol_lan.PropositionNodeUniOp(op="!", exp1=right)
-                    FOLClauseSet._generate_boundary_set_linear(result=result, node=left, root=root, exclude_empty=exclude_empty, vars=vars, reverse=reverse)
-                    node.children[1] = right
-                    node.children[0] = fol_lan.PropositionNodeUniOp(op="!", exp1=left)
-                    FOLClauseSet._generate_boundary_set_linear(result=result, node=right, root=root, exclude_empty=exclude_empty, vars=vars, reverse=reverse)
-                    node.children[0] = left
+                    FOLClauseSet._generate_boundary_set_linear(result=result, node=left, wrap=lambda new_left: wrap(fol_lan.PropositionNodeBinOp(op, new_left, not_right)), exclude_empty=exclude_empty, vars=vars, reverse=reverse)
+                    FOLClauseSet._generate_boundary_set_linear(result=result, node=right, wrap=lambda new_right: wrap(fol_lan.PropositionNodeBinOp(op, not_left, new_right)), exclude_empty=exclude_empty, vars=vars, reverse=reverse)
                     # explore different combination
-                    in_roots.append(copy.deepcopy(root))
-                    node.children[1] = fol_lan.PropositionNodeUniOp(op="!", exp1=right)
-                    in_roots.append(copy.deepcopy(root))
-                    node.children[0] = fol_lan.PropositionNodeUniOp(op="!", exp1=left)
-                    out_roots.append(copy.deepcopy(root))
-                    node.children[1] = right
-                    in_roots.append(copy.deepcopy(root))
-                    node.children[0] = left
-                    node.children[1] = right
-                    node.children[0] = left
-                elif node.op == "&&":
+                    in_roots.append(wrap(node))
+                    in_roots.append(wrap(node.with_children([left, not_right])))
+                    out_roots.append(wrap(node.with_children([not_left, not_right])))
+                    in_roots.append(wrap(node.with_children([not_left, right])))
+                elif op == "&&":
                     # DFS
-                    FOLClauseSet._generate_boundary_set_linear(result=result, node=left, root=root, exclude_empty=exclude_empty, vars=vars, reverse=reverse)
-                    FOLClauseSet._generate_boundary_set_linear(result=result, node=right, root=root, exclude_empty=exclude_empty, vars=vars, reverse=reverse)
+                    FOLClauseSet._generate_boundary_set_linear(result=result, node=left, wrap=lambda new_left: wrap(fol_lan.PropositionNodeBinOp(op, new_left, right)), exclude_empty=exclude_empty, vars=vars, reverse=reverse)
+                    FOLClauseSet._generate_boundary_set_linear(result=result, node=right, wrap=lambda new_right: wrap(fol_lan.PropositionNodeBinOp(op, left, new_right)), exclude_empty=exclude_empty, vars=vars, reverse=reverse)
                     # explore different combination
-                    in_roots.append(copy.deepcopy(root))
-                    node.children[1] = fol_lan.PropositionNodeUniOp(op="!", exp1=right)
-                    out_roots.append(copy.deepcopy(root))
-                    node.children[0] = fol_lan.PropositionNodeUniOp(op="!", exp1=left)
-                    out_roots.append(copy.deepcopy(root))
-                    node.children[1] = right
-                    out_roots.append(copy.deepcopy(root))
-                    node.children[0] = left
-                    node.children[1] = right
-                    node.children[0] = left
-                elif node.op == "->":
+                    in_roots.append(wrap(node))
+                    out_roots.append(wrap(node.with_children([left, not_right])))
+                    out_roots.append(wrap(node.with_children([not_left, not_right])))
+                    out_roots.append(wrap(node.with_children([not_left, right])))
+                elif op == "->":
                     # DFS
-                    node.children[1] = fol_lan.PropositionNodeUniOp(op="!", exp1=right)
-                    FOLClauseSet._generate_boundary_set_linear(result=result, node=left, root=root, exclude_empty=exclude_empty, vars=vars, reverse=reverse^True)
-                    node.children[1] = right
-                    FOLClauseSet._generate_boundary_set_linear(result=result, node=right, root=root, exclude_empty=exclude_empty, vars=vars, reverse=reverse)
+                    FOLClauseSet._generate_boundary_set_linear(result=result, node=left, wrap=lambda new_left: wrap(fol_lan.PropositionNodeBinOp(op, new_left, not_right)), exclude_empty=exclude_empty, vars=vars, reverse=reverse^True)
+                    FOLClauseSet._generate_boundary_set_linear(result=result, node=right, wrap=lambda new_right: wrap(fol_lan.PropositionNodeBinOp(op, left, new_right)), exclude_empty=exclude_empty, vars=vars, reverse=reverse)
                     # explore different combination
-                    in_roots.append(copy.deepcopy(root))
-                    node.children[1] = fol_lan.PropositionNodeUniOp(op="!", exp1=right)
-                    out_roots.append(copy.deepcopy(root))
-                    node.children[0] = fol_lan.PropositionNodeUniOp(op="!", exp1=left)
-                    in_roots.append(copy.deepcopy(root))
-                    node.children[1] = right
-                    in_roots.append(copy.deepcopy(root))
-                    node.children[0] = left
-                    node.children[1] = right
-                    node.children[0] = left
+                    in_roots.append(wrap(node))
+                    out_roots.append(wrap(node.with_children([left, not_right])))
+                    in_roots.append(wrap(node.with_children([not_left, not_right])))
+                    in_roots.append(wrap(node.with_children([not_left, right])))
                 else:
                     raise Exception(f"Unsupported operator: {node.op}")
         elif isinstance(node, fol_lan.PropositionNodeUniOp):
             if node.op == "!":
                 ch = node.children[0]
                 # flip the 
-                FOLClauseSet._generate_boundary_set_linear(result=result, node=ch, root=root, exclude_empty=exclude_empty, vars=vars, reverse=(reverse ^ True))
-                out_roots.append(copy.deepcopy(root))
-                node.children[0] = fol_lan.PropositionNodeUniOp(op="!", exp1=ch)
-                in_roots.append(copy.deepcopy(root))
-                node.children[0] = ch
+                FOLClauseSet._generate_boundary_set_linear(result=result, node=ch, wrap=lambda new_ch: wrap(node.with_children([new_ch])), exclude_empty=exclude_empty, vars=vars, reverse=(reverse ^ True))
+                out_roots.append(wrap(node))
+                in_roots.append(wrap(node.with_children([fol_lan.PropositionNodeUniOp(op="!", exp1=ch)])))
             else:
                 raise Exception(f"Unsupported operator: {node.op}")
         else:
             if len(node.children) == 1:
-                FOLClauseSet._generate_boundary_set_linear(result=result, node=node.children[0], root=root, exclude_empty=exclude_empty, vars=vars, reverse=reverse)
+                FOLClauseSet._generate_boundary_set_linear(result=result, node=node.children[0], wrap=lambda new_ch: wrap(node.with_children([new_ch])), exclude_empty=exclude_empty, vars=vars, reverse=reverse)
                 return
         if reverse:
             result.append((out_roots, in_roots))
@@ -728,24 +860,15 @@ class FOLClauseSet(ClauseSet):
         return
         
     
-    @staticmethod
-    def _newnode_change_op_in_place(node: fol_lan.AST_Node, op:str) -> fol_lan.AST_Node:
-        node.op = op
-        return   
-    
     @staticmethod
     def _newnode_change_op(node: fol_lan.AST_Node, op:str) -> fol_lan.AST_Node:
-        new_node = copy.deepcopy(node)
-        new_node.op = op
-        return new_node
+        return node.with_op(op)
     
     @staticmethod
     def _collect_boundaries(boundaries: list[fol_lan.AST_Node], bounds_a: list[fol_lan.AST_Node], bounds_b: list[fol_lan.AST_Node], op: str):
         for bound_a in bounds_a:
             for bound_b in bounds_b:
-                new_bound_a = copy.deepcopy(bound_a)
-                new_bound_b = copy.deepcopy(bound_b)
-                boundaries.append(fol_lan.PropositionNodeBinOp(op=op, exp1 = new_bound_a, exp2=new_bound_b))
+                boundaries.append(fol_lan.PropositionNodeBinOp(op=op, exp1=bound_a, exp2=bound_b))
 
 
 
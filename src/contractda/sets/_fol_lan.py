@@ -1,56 +1,234 @@
 """ First order logic language definition
 
 This source file defines the abstract syntax tree (AST) of First-order logic.
+
+The nodes are immutable and hash-consed: creating a node equal to a living node returns the living node.
+Combining clauses therefore shares the subtrees instead of copying them, the trees are directed acyclic graphs,
+and two nodes are structurally equal if and only if they are the same object, so nodes can be compared and hashed in constant time.
+To change a tree, build the changed nodes with :meth:`AST_Node.with_children` or ``with_op``, the unchanged subtrees are reused.
+
+The algorithms on the trees do not recurse in Python, so formulas of any depth can be processed.
+They are built on :func:`transform`, which walks the tree with an explicit stack and computes a value per distinct node,
+and on the tables at the end of this file, which map each node type to its rule.
 """
 from __future__ import annotations
-from abc import ABC, abstractmethod
-from typing import Callable, Any
-import copy
+from abc import ABCMeta, abstractmethod
+from fractions import Fraction
+from typing import Callable, Any, Iterator
+import functools
+import math
+import operator
+import threading
+import weakref
+
+import numpy as np
+
+# the living nodes keyed by their type, attributes and children
+_NODES: weakref.WeakValueDictionary[tuple, AST_Node] = weakref.WeakValueDictionary()
+# the threads building the same node must get the same object
+_NODES_LOCK = threading.Lock()
+
+class _HashConsMeta(ABCMeta):
+    """Return the existing node if an equal node is alive"""
+    def __call__(cls, *args, **kwargs):
+        key = cls._key(*args, **kwargs)
+        node = _NODES.get(key)
+        if node is None:
+            node = super().__call__(*args, **kwargs)
+            node._symbols = None
+            node._frozen = True
+            with _NODES_LOCK:
+                node = _NODES.setdefault(key, node)
+        return node
+
+class AST_Node(metaclass=_HashConsMeta):
+    _frozen = False
 
-class AST_Node(ABC):
     def __init__(self, children = None):
         if children is None:
-            self._children = []
-        else: 
-            self._children = children
+            self._children = ()
+        else:
+            self._children = tuple(children)
         pass
 
+    @classmethod
     @abstractmethod
-    def __str__(self):
+    def _key(cls, *args):
+        """The identity of the node created with args, the children are compared by identity"""
         pass
 
+    def __setattr__(self, name, value):
+        if self._frozen:
+            raise AttributeError(f"{type(self).__name__} is immutable, cannot set {name}")
+        super().__setattr__(name, value)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (type(self), self._args())
+
     @abstractmethod
-    def get_symbols(self):
-        return {}
-    
-    @abstractmethod
-    def evaluate(self, value_table = dict):
+    def _args(self) -> tuple:
+        """The arguments creating this node"""
         pass
 
+    def __str__(self):
+        return _format(self)
+
+    def get_symbols(self) -> frozenset[str]:
+        """The names of the symbols in the tree, computed once per node"""
+        if self._symbols is None:
+            child_symbols = [child._symbols for child in self._children]
+            if None in child_symbols:
+                transform(self, _SYMBOL_RULES, known=_known_symbols)
+            else:
+                _collect_symbols(self, child_symbols)
+        return self._symbols
+
+    def evaluate(self, value_table: dict):
+        """ Evaluate the tree
+
+        The connectives are short-circuited like the Python operators, the operands not needed are not evaluated.
+
+        :param dict value_table: the values of the symbols
+        :return: the value of the tree
+        """
+        return _evaluate(self, value_table)
+
+    def evaluate_batch(self, columns: dict[str, np.ndarray]) -> np.ndarray | Any:
+        """ Evaluate the tree on many rows at once
+
+        Each node is evaluated by one NumPy operation on the values of all rows,
+        and the value of a node is released as soon as all its parents are evaluated.
+
+        :param dict[str, np.ndarray] columns: the values of the symbols, one array of the same length per symbol
+        :return: the values of the tree per row, a scalar if the value does not depend on the symbols
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return _evaluate_batch(self, columns)
+
     @property
-    def children(self):
+    def children(self) -> tuple[AST_Node]:
         return self._children
-    
+
+    def with_children(self, children) -> AST_Node:
+        """The node of the same type and attributes with the given children"""
+        if tuple(children) == self._children:
+            return self
+        return type(self)(*self._args()[:-len(self._children)], *children)
+
     def recursive_process_preorder(self, process_func: Callable[..., Any], *args, **kwargs):
-        process_func(self, *args, **kwargs)
-        for child in self.children:
-            child.recursive_process_preorder(process_func, *args, **kwargs)
+        for node in iter_preorder(self):
+            process_func(node, *args, **kwargs)
 
     def recursive_process_postorder(self, process_func: Callable[..., Any], *args, **kwargs):
-        for child in self.children:
-            child.recursive_process_postorder(process_func, *args, **kwargs)
-        process_func(self, *args, **kwargs)
+        for node in iter_postorder(self):
+            process_func(node, *args, **kwargs)
+
+
+# marks the end of the children of the node below it on the stack, and the values not computed yet
+_EXIT = object()
+
+def transform(root: AST_Node, rules: dict[type, Callable[[AST_Node, list], Any]], memo: dict | None = None,
+              known: Callable[[AST_Node], Any] | None = None) -> Any:
+    """ Compute a value for every distinct node of a tree, the children before their parents
+
+    The tree is walked with an explicit stack, and a subtree shared by several parents is visited once.
+
+    :param AST_Node root: the root of the tree
+    :param dict rules: the rule of each node type, computing the value of a node from the node and the values of its children
+    :param dict memo: the values known in advance, receives the computed values
+    :param Callable known: returns the value of a node if it is known without visiting its subtree, None otherwise
+    :return: the value of the root
+    """
+    if memo is None:
+        memo = dict()
+    stack = [root]
+    push = stack.append
+    pop = stack.pop
+    # the values of the visited children of the nodes on the stack
+    values = []
+    emit = values.append
+    while stack:
+        node = pop()
+        if node is _EXIT:
+            node = pop()
+            count = len(node._children)
+            value = rules[node.__class__](node, values[-count:])
+            del values[-count:]
+            memo[node] = value
+            emit(value)
+            continue
+        value = memo.get(node, _EXIT)
+        if value is _EXIT and known is not None:
+            value = known(node)
+            if value is None:
+                value = _EXIT
+            else:
+                memo[node] = value
+        if value is not _EXIT:
+            emit(value)
+        elif node._children:
+            push(node)
+            push(_EXIT)
+            stack.extend(node._children[::-1])
+        else:
+            value = rules[node.__class__](node, [])
+            memo[node] = value
+            emit(value)
+    return values[0]
+
+def iter_preorder(root: AST_Node) -> Iterator[AST_Node]:
+    """ Iterate the nodes of a tree, the parents before their children
+
+    A subtree shared by several parents is iterated once per parent.
+
+    :param AST_Node root: the root of the tree
+    """
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(node._children))
+
+def iter_postorder(root: AST_Node) -> Iterator[AST_Node]:
+    """ Iterate the nodes of a tree, the children before their parents
+
+    A subtree shared by several parents is iterated once per parent.
+
+    :param AST_Node root: the root of the tree
+    """
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            yield node
+            continue
+        stack.append((node, True))
+        stack.extend([(child, False) for child in reversed(node._children)])
 
+def name_remap(name_map, node):
+    """ Rename the symbols in the tree
 
+    :param dict[str, str] name_map: the new names of the symbols, the symbols not in the map keep their names
+    :param AST_Node node: the root of the tree
+    :return: the root of the renamed tree, the subtrees without renamed symbols are shared with the original tree
+    :rtype: AST_Node
+    """
+    rules = dict.fromkeys(_NODE_TYPES, lambda node, children: node.with_children(children))
+    rules[Symbol] = lambda node, children: Symbol(name_map.get(node.name, node.name))
 
-def name_remap(name_map, node):
-    def rename_recur_func(node: AST_Node, map: dict[str, str]):
-        if isinstance(node, Symbol):
-            name = node.name
-            if name in name_map:
-                node.name = name_map[name]
+    def unchanged(node: AST_Node) -> AST_Node | None:
+        # the subtrees without renamed symbols are kept
+        if node.get_symbols().isdisjoint(name_map):
+            return node
+        return None
 
-    node.recursive_process_preorder(rename_recur_func, name_map)
+    return transform(node, rules, known=unchanged)
 
 class PropositionNode(AST_Node):
     # Proposition: Proposition ==&&||-> Proposition
@@ -67,40 +245,69 @@ class PropositionNodeBinOp(PropositionNode):
         self.op = op
         super().__init__(children=[exp1, exp2])
 
-    def __str__(self):
-        return f"({self._children[0]}{self.op}{self._children[1]})"
+    @classmethod
+    def _key(cls, op, exp1, exp2):
+        return (cls, op, exp1, exp2)
 
-    def get_symbols(self):
-        l_symbols = self._children[0].get_symbols()
-        r_symbols = self._children[1].get_symbols()
-        res = l_symbols.copy()
-        res.update(r_symbols)
-        return res
+    def _args(self) -> tuple:
+        return (self.op, *self._children)
+
+    def with_op(self, op) -> PropositionNodeBinOp:
+        """The node with the same children and the operator op"""
+        return PropositionNodeBinOp(op, *self._children)
 
     def debug(self):
         print("Exp 1:" )
 
-    def evaluate(self, value_table = dict) -> bool:
-        if self.op == "==":
-            return self._children[0].evaluate(value_table) == self._children[1].evaluate(value_table)
-        elif self.op == "<=":
-            return self._children[0].evaluate(value_table) <= self._children[1].evaluate(value_table)
-        elif self.op == "<":
-            return self._children[0].evaluate(value_table) < self._children[1].evaluate(value_table)
-        elif self.op == ">":
-            return self._children[0].evaluate(value_table) > self._children[1].evaluate(value_table)
-        elif self.op == ">=":
-            return self._children[0].evaluate(value_table) >= self._children[1].evaluate(value_table)
-        elif self.op == "!=":
-            return self._children[0].evaluate(value_table) != self._children[1].evaluate(value_table)
-        elif self.op == "&&":
-            return self._children[0].evaluate(value_table) and self._children[1].evaluate(value_table)
-        elif self.op == "||":
-            return self._children[0].evaluate(value_table) or self._children[1].evaluate(value_table)
-        elif self.op == "->":
-            return (not self._children[0].evaluate(value_table)) or self._children[1].evaluate(value_table)
+class PropositionNodeNaryOp(PropositionNode):
+    # Proposition && Proposition && ... && Proposition
+    # Proposition || Proposition || ... || Proposition
+    def __init__(self, op, *operands):
+        if op not in ("&&", "||"):
+            raise Exception(f"Unsupported operator: {op}")
+        if len(operands) < 2:
+            raise Exception(f"At least two operands are needed for {op}, got {len(operands)}")
+        self.op = op
+        super().__init__(children=operands)
+
+    @classmethod
+    def _key(cls, op, *operands):
+        return (cls, op, *operands)
+
+    def _args(self) -> tuple:
+        return (self.op, *self._children)
+
+    def with_op(self, op) -> PropositionNodeNaryOp:
+        """The node with the same children and the operator op"""
+        return PropositionNodeNaryOp(op, *self._children)
+
+    def as_binary(self) -> PropositionNodeBinOp:
+        """The equivalent binary node connecting all operands but the last one with the last one"""
+        return PropositionNodeBinOp(self.op, connect(self.op, self._children[:-1]), self._children[-1])
+
+def connect(op: str, operands) -> AST_Node:
+    """ Connect propositions by && or ||
+
+    The operands that are n-ary nodes of the same operator are merged, so chains of connections stay shallow.
+
+    :param str op: the operator, && or ||
+    :param operands: the propositions
+    :return: the only operand if there is one, the n-ary node otherwise
+    :rtype: AST_Node
+    """
+    merged = []
+    for operand in operands:
+        if isinstance(operand, PropositionNodeNaryOp) and operand.op == op:
+            merged.extend(operand.children)
         else:
-            raise Exception(f"Unsupported operator: {self.op}")
+            merged.append(operand)
+    if len(merged) == 1:
+        return merged[0]
+    node = PropositionNodeNaryOp(op, *merged)
+    if node._symbols is None:
+        # the symbols of the merged node are the ones of the operands, which are usually known
+        object.__setattr__(node, "_symbols", _union_symbols([operand.get_symbols() for operand in operands]))
+    return node
 
 class PropositionNodeUniOp(PropositionNode):#(!Proposition)
     def __init__(self, op, exp1):
@@ -108,30 +315,28 @@ class PropositionNodeUniOp(PropositionNode):#(!Proposition)
         self.op = op
         super().__init__(children=[exp1])
 
-    def __str__(self):
-        return f"({self.op}{self._children[0]})"
+    @classmethod
+    def _key(cls, op, exp1):
+        return (cls, op, exp1)
+
+    def _args(self) -> tuple:
+        return (self.op, *self._children)
+
+    def with_op(self, op) -> PropositionNodeUniOp:
+        """The node with the same child and the operator op"""
+        return PropositionNodeUniOp(op, *self._children)
 
-    def get_symbols(self):
-        return self._children[0].get_symbols()
-    
-    def evaluate(self, value_table: dict):
-        if self.op == "!":
-            return not self._children[0].evaluate(value_table)
-        else:
-            raise Exception(f"Unsupported operator: {self.op}")
-           
 class PropositionNodeParen(PropositionNode):#(!Proposition)
     def __init__(self, content):
         super().__init__(children=[content])
 
-    def __str__(self):
-        return f"({self._children[0]})"
+    @classmethod
+    def _key(cls, content):
+        return (cls, content)
 
-    def get_symbols(self):
-        return self._children[0].get_symbols()  
+    def _args(self) -> tuple:
+        return self._children
 
-    def evaluate(self, value_table: dict):
-        return self._children[0].evaluate(value_table)
 # class UnaryOp(AST_Node):
 #     def __init__(self, left, op, right):
 #         self.left = left
@@ -154,14 +359,12 @@ class ExpressionNodeParen(ExpressionNode): # (Expression)
     def __init__(self, content):
         super().__init__(children=[content])
 
-    def __str__(self):
-        return f"({self._children[0]})"
-
-    def get_symbols(self):
-        return self._children[0].get_symbols()   
+    @classmethod
+    def _key(cls, content):
+        return (cls, content)
 
-    def evaluate(self, value_table: dict):
-        return self._children[0].evaluate(value_table)
+    def _args(self) -> tuple:
+        return self._children
 
 class ExpressionNodeBinOp(ExpressionNode):
                                              # Expression +-*/^ Literals/Constant
@@ -170,70 +373,420 @@ class ExpressionNodeBinOp(ExpressionNode):
         self.op = op
         super().__init__(children=[left, right])
 
-    def __str__(self):
-        return f"{self._children[0]}{str(self.op)}{self._children[1]}"
-
-    def get_symbols(self):
-        l_symbols = self._children[0].get_symbols()
-        r_symbols = self._children[1].get_symbols()
-        res = l_symbols.copy()
-        res.update(r_symbols)
-        return res
-    
-    def evaluate(self, value_table: dict):
-        if self.op == "+":
-            return self._children[0].evaluate(value_table) + self._children[1].evaluate(value_table)
-        elif self.op == "-":
-            return self._children[0].evaluate(value_table) - self._children[1].evaluate(value_table)
-        elif self.op == "*":
-            return self._children[0].evaluate(value_table) * self._children[1].evaluate(value_table)
-        elif self.op == "/":
-            return self._children[0].evaluate(value_table) / self._children[1].evaluate(value_table)
-        elif self.op == "^":
-            return self._children[0].evaluate(value_table) ** self._children[1].evaluate(value_table)
-        else:
-            raise Exception(f"Unsupported operator: {self.op}")
+    @classmethod
+    def _key(cls, op, left, right):
+        return (cls, op, left, right)
+
+    def _args(self) -> tuple:
+        return (self.op, *self._children)
+
+    def with_op(self, op) -> ExpressionNodeBinOp:
+        """The node with the same children and the operator op"""
+        return ExpressionNodeBinOp(op, *self._children)
 
 class TFNode(AST_Node):
     def __init__(self, val):
         self.val = val
         super().__init__(children=None)
-    def __str__(self):
-        return self.val
-    def get_symbols(self):
-        return set() 
-    
-    def evaluate(self, value_table: dict):
-        if self.val == "true":
-            return True
-        elif self.val == "false":
-            return False
-        else:
-            raise Exception(f"Unsupported TF value: {self.val}")
+
+    @classmethod
+    def _key(cls, val):
+        return (cls, val)
+
+    def _args(self) -> tuple:
+        return (self.val,)
 
 class Symbol(AST_Node): # Literals
     def __init__(self, name):
         self.name = name
         super().__init__(children=None)
 
-    def __str__(self):
-        return self.name
-    def get_symbols(self):
-        return set([self.name])
-    def evaluate(self, value_table: dict):
-        value = value_table.get(self.name)
-        if value is None:
-            raise Exception(f"No symbol value found for: {self.name}")
-        return value
+    @classmethod
+    def _key(cls, name):
+        return (cls, name)
+
+    def _args(self) -> tuple:
+        return (self.name,)
 
 class Constant(AST_Node): # Constant
+    # the parsed integers are int and the other parsed numbers are their exact Fraction
     def __init__(self, val):
         self.val = val
         super().__init__(children=None)
 
-    def __str__(self):
-        return str(self.val)
-    def get_symbols(self):
-        return set()
-    def evaluate(self, value_table: dict):
-        return self.val
\ No newline at end of file
+    @classmethod
+    def _key(cls, val):
+        # 1, 1.0 and True are equal but are different constants
+        return (cls, type(val), val)
+
+    def _args(self) -> tuple:
+        return (self.val,)
+
+
+######################
+#   Rules per node type
+######################
+_NODE_TYPES = (PropositionNodeBinOp, PropositionNodeNaryOp, PropositionNodeUniOp, PropositionNodeParen,
+               ExpressionNodeParen, ExpressionNodeBinOp, TFNode, Symbol, Constant)
+
+# the text of a node, a string or the strings and the children to print in order
+_FORMAT_RULES: dict[type, Callable[[AST_Node], str | list]] = {
+    PropositionNodeBinOp: lambda node: ["(", node._children[0], node.op, node._children[1], ")"],
+    PropositionNodeNaryOp: lambda node: ["(", *_interleave(node.op, node._children), ")"],
+    PropositionNodeUniOp: lambda node: ["(", node.op, node._children[0], ")"],
+    PropositionNodeParen: lambda node: ["(", node._children[0], ")"],
+    ExpressionNodeParen: lambda node: ["(", node._children[0], ")"],
+    ExpressionNodeBinOp: lambda node: [node._children[0], node.op, node._children[1]],
+    TFNode: lambda node: node.val,
+    Symbol: lambda node: node.name,
+    Constant: lambda node: _format_constant(node.val),
+}
+
+def _format_constant(val) -> str:
+    """The decimal text of a constant, a fraction without a finite decimal expansion is printed as a division"""
+    if not isinstance(val, Fraction):
+        return str(val)
+    denominator = val.denominator
+    twos = fives = 0
+    while denominator % 2 == 0:
+        denominator //= 2
+        twos += 1
+    while denominator % 5 == 0:
+        denominator //= 5
+        fives += 1
+    if denominator != 1:
+        return f"({val.numerator}/{val.denominator})"
+    digits = max(twos, fives, 1)
+    scaled = str(abs(val.numerator) * 10 ** digits // val.denominator).rjust(digits + 1, "0")
+    sign = "-" if val < 0 else ""
+    return f"{sign}{scaled[:-digits]}.{scaled[-digits:].rstrip('0') or '0'}"
+
+def _number(val):
+    """The value of a constant in the evaluation, the fractions are evaluated as floats like the values of the symbols"""
+    if isinstance(val, Fraction):
+        return float(val)
+    return val
+
+def _interleave(separator: str, items) -> list:
+    ret = [separator] * (2 * len(items) - 1)
+    ret[::2] = items
+    return ret
+
+def _format(root: AST_Node) -> str:
+    """Print a tree by expanding the nodes into strings, so the text of each subtree is not copied into its parent"""
+    parts = []
+    emit = parts.append
+    stack = [root]
+    pop = stack.pop
+    while stack:
+        item = pop()
+        if item.__class__ is str:
+            emit(item)
+            continue
+        text = _FORMAT_RULES[item.__class__](item)
+        if text.__class__ is str:
+            emit(text)
+        else:
+            stack.extend(reversed(text))
+    return "".join(parts)
+
+def _known_symbols(node: AST_Node) -> frozenset[str] | None:
+    return node._symbols
+
+def _collect_symbols(node: AST_Node, child_symbols: list[frozenset[str]]) -> frozenset[str]:
+    if isinstance(node, Symbol):
+        symbols = frozenset([node.name])
+    else:
+        symbols = _union_symbols(child_symbols)
+    object.__setattr__(node, "_symbols", symbols)
+    return symbols
+
+def _union_symbols(symbol_sets: list[frozenset[str]]) -> frozenset[str]:
+    """The union of the sets, the largest set is shared instead of copied if it contains the others"""
+    if not symbol_sets:
+        return frozenset()
+    largest = max(symbol_sets, key=len)
+    others = [symbols for symbols in symbol_sets if symbols is not largest and not symbols <= largest]
+    if not others:
+        return largest
+    return largest.union(*others)
+
+_SYMBOL_RULES = dict.fromkeys(_NODE_TYPES, _collect_symbols)
+
+# the operators on the values of the children
+_OPERATORS: dict[str, Callable[[Any, Any], Any]] = {
+    "==": operator.eq,
+    "<=": operator.le,
+    "<": operator.lt,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "!=": operator.ne,
+    "&&": lambda a, b: a and b,
+    "||": lambda a, b: a or b,
+    "->": lambda a, b: (not a) or b,
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "^": operator.pow,
+}
+
+def _apply_operator(node: AST_Node, values: list) -> Any:
+    function = _OPERATORS.get(node.op)
+    if function is None:
+        raise Exception(f"Unsupported operator: {node.op}")
+    return function(*values)
+
+def _evaluate_nary(node: PropositionNodeNaryOp, values: list) -> bool:
+    # reached only if no operand short-circuited
+    return values[-1]
+
+def _evaluate_not(node: PropositionNodeUniOp, values: list) -> bool:
+    if node.op == "!":
+        return not values[0]
+    raise Exception(f"Unsupported operator: {node.op}")
+
+def _evaluate_tf(node: TFNode, values: list) -> bool:
+    if node.val == "true":
+        return True
+    elif node.val == "false":
+        return False
+    raise Exception(f"Unsupported TF value: {node.val}")
+
+_EVALUATE_RULES: dict[type, Callable[[AST_Node, list], Any]] = {
+    PropositionNodeBinOp: _apply_operator,
+    PropositionNodeNaryOp: _evaluate_nary,
+    PropositionNodeUniOp: _evaluate_not,
+    PropositionNodeParen: lambda node, values: values[0],
+    ExpressionNodeParen: lambda node, values: values[0],
+    ExpressionNodeBinOp: _apply_operator,
+    TFNode: _evaluate_tf,
+    Constant: lambda node, values: _number(node.val),
+}
+
+# the value of an operand of the connective that decides the value of the connective
+_SHORT_CIRCUITS: dict[str, Callable[[Any, int], bool]] = {
+    "&&": lambda value, index: not value,
+    "||": lambda value, index: bool(value),
+    "->": lambda value, index: index == 0 and not value,
+}
+_SHORT_CIRCUIT_VALUES = {"&&": False, "||": True, "->": True}
+_CONNECTIVE_TYPES = (PropositionNodeBinOp, PropositionNodeNaryOp)
+
+def _evaluate(root: AST_Node, value_table: dict) -> Any:
+    """Evaluate a tree with an explicit stack, the operands not needed by the connectives are skipped"""
+    memo = dict()
+    # the frames are the nodes and the values of their evaluated children
+    stack = [(root, [])]
+    while stack:
+        node, values = stack[-1]
+        index = len(values)
+        if index:
+            short_circuit = _SHORT_CIRCUITS.get(node.op) if isinstance(node, _CONNECTIVE_TYPES) else None
+            if short_circuit is not None and short_circuit(values[-1], index - 1):
+                stack.pop()
+                value = _SHORT_CIRCUIT_VALUES[node.op]
+                memo[node] = value
+                if stack:
+                    stack[-1][1].append(value)
+                continue
+        if index < len(node._children):
+            child = node._children[index]
+            if child in memo:
+                values.append(memo[child])
+            elif isinstance(child, Symbol):
+                value = value_table.get(child.name)
+                if value is None:
+                    raise Exception(f"No symbol value found for: {child.name}")
+                values.append(value)
+            else:
+                stack.append((child, []))
+            continue
+        stack.pop()
+        if isinstance(node, Symbol):
+            value = value_table.get(node.name)
+            if value is None:
+                raise Exception(f"No symbol value found for: {node.name}")
+        else:
+            value = _EVALUATE_RULES[type(node)](node, values)
+        memo[node] = value
+        if stack:
+            stack[-1][1].append(value)
+    return value
+
+
+######################
+#   Compilation
+######################
+def compile_tree(root: AST_Node, symbols: tuple[str, ...]) -> Callable[..., Any]:
+    """ Compile a tree into a Python function
+
+    The function takes the values of symbols as positional arguments and returns the value of the tree,
+    so evaluating it does not walk the tree nor compare the operators.
+    The trees nested deeper than the Python compiler accepts are evaluated by :meth:`AST_Node.evaluate` instead.
+
+    :param AST_Node root: the root of the tree
+    :param tuple[str, ...] symbols: the names of the symbols in the order of the arguments, including all symbols of the tree
+    :return: the compiled function
+    :rtype: Callable[..., Any]
+    """
+    if transform(root, _DEPTH_RULES) > _MAX_COMPILE_DEPTH:
+        return lambda *values: _evaluate(root, dict(zip(symbols, values)))
+    slots = {name: f"s{index}" for index, name in enumerate(symbols)}
+    namespace = dict()
+
+    def compile_symbol(node: Symbol, args: list) -> str:
+        slot = slots.get(node.name)
+        if slot is None:
+            raise Exception(f"No symbol value found for: {node.name}")
+        return slot
+
+    def compile_constant(node: Constant, args: list) -> str:
+        val = _number(node.val)
+        if type(val) in (int, float) and math.isfinite(val):
+            # the parenthesis keeps a negative base of ** negative
+            return repr(val) if val >= 0 else f"({val!r})"
+        # the other values are passed by name
+        name = f"c{len(namespace)}"
+        namespace[name] = val
+        return name
+
+    rules = dict(_COMPILE_RULES)
+    rules[Symbol] = compile_symbol
+    rules[Constant] = compile_constant
+    text = transform(root, rules)
+    exec(f"def compiled({', '.join(slots.values())}):\n    return {text}\n", namespace)
+    return namespace["compiled"]
+
+# the depth of the trees that are compiled, each node adds at most two levels of parentheses
+# and the Python parser accepts at most 200 nested parentheses
+_MAX_COMPILE_DEPTH = 64
+
+_DEPTH_RULES: dict[type, Callable[[AST_Node, list[int]], int]] = dict.fromkeys(
+    _NODE_TYPES, lambda node, depths: max(depths) + 1 if depths else 0)
+
+# the Python operators of the operators
+_PYTHON_OPERATORS = {"==": "==", "<=": "<=", "<": "<", ">": ">", ">=": ">=", "!=": "!=", "&&": "and", "||": "or",
+                     "+": "+", "-": "-", "*": "*", "/": "/", "^": "**"}
+
+def _compile_operator(node: AST_Node, args: list[str]) -> str:
+    if node.op == "->":
+        return f"((not {args[0]}) or {args[1]})"
+    python_op = _PYTHON_OPERATORS.get(node.op)
+    if python_op is None:
+        raise Exception(f"Unsupported operator: {node.op}")
+    return f"({args[0]} {python_op} {args[1]})"
+
+def _compile_not(node: PropositionNodeUniOp, args: list[str]) -> str:
+    if node.op != "!":
+        raise Exception(f"Unsupported operator: {node.op}")
+    return f"(not {args[0]})"
+
+def _compile_tf(node: TFNode, args: list) -> str:
+    if node.val == "true":
+        return "True"
+    elif node.val == "false":
+        return "False"
+    raise Exception(f"Unsupported TF value: {node.val}")
+
+# the Python expression of a node from the ones of its children
+_COMPILE_RULES: dict[type, Callable[[AST_Node, list[str]], str]] = {
+    PropositionNodeBinOp: _compile_operator,
+    PropositionNodeNaryOp: lambda node, args: "(" + f" {_PYTHON_OPERATORS[node.op]} ".join(args) + ")",
+    PropositionNodeUniOp: _compile_not,
+    PropositionNodeParen: lambda node, args: args[0],
+    ExpressionNodeParen: lambda node, args: args[0],
+    ExpressionNodeBinOp: _compile_operator,
+    TFNode: _compile_tf,
+}
+
+
+######################
+#   Batch evaluation
+######################
+_BATCH_OPERATORS: dict[str, Callable[[Any, Any], Any]] = {
+    "==": np.equal,
+    "<=": np.less_equal,
+    "<": np.less,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "!=": np.not_equal,
+    "&&": np.logical_and,
+    "||": np.logical_or,
+    "->": lambda a, b: np.logical_or(np.logical_not(a), b),
+    "+": np.add,
+    "-": np.subtract,
+    "*": np.multiply,
+    "/": np.true_divide,
+    "^": np.power,
+}
+
+def _apply_batch_operator(node: AST_Node, values: list) -> Any:
+    function = _BATCH_OPERATORS.get(node.op)
+    if function is None:
+        raise Exception(f"Unsupported operator: {node.op}")
+    return function(*values)
+
+def _evaluate_batch_not(node: PropositionNodeUniOp, values: list) -> Any:
+    if node.op == "!":
+        return np.logical_not(values[0])
+    raise Exception(f"Unsupported operator: {node.op}")
+
+_BATCH_RULES: dict[type, Callable[[AST_Node, list], Any]] = {
+    PropositionNodeBinOp: _apply_batch_operator,
+    PropositionNodeNaryOp: lambda node, values: functools.reduce(_BATCH_OPERATORS[node.op], values),
+    PropositionNodeUniOp: _evaluate_batch_not,
+    PropositionNodeParen: lambda node, values: values[0],
+    ExpressionNodeParen: lambda node, values: values[0],
+    ExpressionNodeBinOp: _apply_batch_operator,
+    TFNode: lambda node, values: np.bool_(_evaluate_tf(node, values)),
+    Constant: lambda node, values: _number(node.val),
+}
+
+def _evaluate_batch(root: AST_Node, columns: dict[str, np.ndarray]) -> Any:
+    """Evaluate a tree on columns, keeping the value of a shared node only until its last parent is evaluated"""
+    # the number of parents of each distinct node
+    uses = {root: 1}
+    stack = [root]
+    while stack:
+        for child in stack.pop()._children:
+            if child in uses:
+                uses[child] += 1
+            else:
+                uses[child] = 1
+                stack.append(child)
+
+    memo = dict()
+    stack = [root]
+    push = stack.append
+    pop = stack.pop
+    values = []
+    while stack:
+        node = pop()
+        if node is _EXIT:
+            node = pop()
+            count = len(node._children)
+            value = _BATCH_RULES[node.__class__](node, values[-count:])
+            del values[-count:]
+        elif node in memo:
+            value = memo[node]
+        elif node._children:
+            push(node)
+            push(_EXIT)
+            stack.extend(node._children[::-1])
+            continue
+        elif isinstance(node, Symbol):
+            value = columns.get(node.name)
+            if value is None:
+                raise Exception(f"No symbol value found for: {node.name}")
+        else:
+            value = _BATCH_RULES[node.__class__](node, [])
+        # the value is kept for the other parents
+        remaining = uses[node] - 1
+        if remaining:
+            memo[node] = value
+            uses[node] = remaining
+        else:
+            memo.pop(node, None)
+        values.append(value)
+    return values[0]
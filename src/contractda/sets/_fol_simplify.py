@@ -0,0 +1,227 @@
+""" Simplification of first order logic formulas
+
+The rewrites work on the abstract syntax tree of :mod:`contractda.sets._fol_lan` and do not depend on a solver.
+"""
+from __future__ import annotations
+from fractions import Fraction
+import operator
+
+import contractda.sets._fol_lan as fol_lan
+from contractda.solvers._cache import LRUCache
+from contractda.logger._logger import LOG
+
+# the operator of the negated comparison
+_NEGATED_COMPARISON = {"==": "!=", "!=": "==", "<": ">=", ">=": "<", ">": "<=", "<=": ">"}
+_COMPARISON = {"==": operator.eq, "!=": operator.ne, "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+_ARITHMETIC = {"+": operator.add, "-": operator.sub, "*": operator.mul, "/": operator.truediv}
+# the dual of the connectives
+_DUAL = {"&&": "||", "||": "&&"}
+
+_TRUE = "true"
+_FALSE = "false"
+
+class FOLSimplifier:
+    """
+    A pipeline of rewrites removing the redundancy of first order logic formulas
+
+    The rewrites are applied bottom-up in one pass:
+
+    * parens: remove the parenthesis nodes, the ones needed to print an arithmetic expression are kept
+    * fold: evaluate the operations on constants and absorb true and false in the connectives
+    * double_negation: replace !(!p) with p
+    * flatten: merge nested && and || into one n-ary node
+    * dedup: remove the repeated operands of && and ||, requires flatten
+    * nnf: push the negations to the comparisons and rewrite p -> q into !p || q (negation normal form)
+
+    The results are cached by node, the statistics are kept in :attr:`stats`.
+
+    :param bool parens: whether to remove the parenthesis nodes
+    :param bool fold: whether to fold the constants
+    :param bool double_negation: whether to remove the double negations
+    :param bool flatten: whether to flatten the connectives
+    :param bool dedup: whether to remove the repeated operands
+    :param bool nnf: whether to rewrite into negation normal form
+    :param int maxsize: the maximum number of cached results
+    """
+    def __init__(self, parens: bool = True, fold: bool = True, double_negation: bool = True, flatten: bool = True,
+                 dedup: bool = True, nnf: bool = True, maxsize: int = 1 << 16):
+        self.parens = parens
+        self.fold = fold
+        self.double_negation = double_negation
+        self.flatten = flatten
+        self.dedup = dedup
+        self.nnf = nnf
+        self._cache = LRUCache(maxsize=maxsize)
+        self._neg_cache = LRUCache(maxsize=maxsize)
+        self.stats = {"calls": 0, "nodes_before": 0, "nodes_after": 0}
+
+    def clear(self) -> None:
+        """ Remove the cached results and reset the statistics
+        """
+        self._cache.clear()
+        self._neg_cache.clear()
+        self.stats = {"calls": 0, "nodes_before": 0, "nodes_after": 0}
+
+    def simplify(self, node: fol_lan.AST_Node) -> fol_lan.AST_Node:
+        """ Simplify a formula
+
+        :param AST_Node node: the root of the formula
+        :return: the root of the equivalent simplified formula
+        :rtype: AST_Node
+        """
+        ret = self._simplify(node)
+        self.stats["calls"] += 1
+        before, after = count_nodes(node), count_nodes(ret)
+        self.stats["nodes_before"] += before
+        self.stats["nodes_after"] += after
+        LOG.debug(f"Simplified formula from {before} to {after} nodes")
+        return ret
+
+    def _simplify(self, node: fol_lan.AST_Node) -> fol_lan.AST_Node:
+        memo = dict()
+        ret = fol_lan.transform(node, dict.fromkeys(fol_lan._NODE_TYPES, self._rewrite), memo=memo, known=self._cache.get)
+        for rewritten, result in memo.items():
+            self._cache.put(rewritten, result)
+        return ret
+
+    def _rewrite(self, node: fol_lan.AST_Node, children: list[fol_lan.AST_Node]) -> fol_lan.AST_Node:
+        """Rewrite a node whose children are simplified"""
+        if isinstance(node, fol_lan.PropositionNodeParen):
+            if self.parens:
+                return children[0]
+        elif isinstance(node, fol_lan.ExpressionNodeParen):
+            # the parenthesis of a symbol, a constant or a parenthesis does not group anything
+            if self.parens and isinstance(children[0], (fol_lan.Symbol, fol_lan.Constant, fol_lan.ExpressionNodeParen)):
+                return children[0]
+        elif isinstance(node, fol_lan.PropositionNodeUniOp) and node.op == "!":
+            return self._negate(children[0])
+        elif isinstance(node, fol_lan.PropositionNodeNaryOp):
+            return self._connect(node.op, children)
+        elif isinstance(node, fol_lan.PropositionNodeBinOp):
+            if node.op in _DUAL:
+                return self._connect(node.op, children)
+            if node.op == "->":
+                if self.nnf:
+                    return self._connect("||", [self._negate(children[0]), children[1]])
+                if self.fold:
+                    return self._fold_implies(*children)
+            elif node.op in _COMPARISON and self.fold:
+                value = _compare(node.op, *children)
+                if value is not None:
+                    return fol_lan.TFNode(_TRUE if value else _FALSE)
+        elif isinstance(node, fol_lan.ExpressionNodeBinOp) and node.op in _ARITHMETIC and self.fold:
+            value = _calculate(node.op, *children)
+            if value is not None:
+                return fol_lan.Constant(value)
+        return node.with_children(children)
+
+    def _negate(self, node: fol_lan.AST_Node) -> fol_lan.AST_Node:
+        """The simplified negation of a simplified node"""
+        ret = self._neg_cache.get(node)
+        if ret is None:
+            ret = self._negate_node(node)
+            self._neg_cache.put(node, ret)
+        return ret
+
+    def _negate_node(self, node: fol_lan.AST_Node) -> fol_lan.AST_Node:
+        if self.fold and isinstance(node, fol_lan.TFNode):
+            return fol_lan.TFNode(_FALSE if node.val == _TRUE else _TRUE)
+        if (self.double_negation or self.nnf) and isinstance(node, fol_lan.PropositionNodeUniOp) and node.op == "!":
+            return node.children[0]
+        if self.nnf and isinstance(node, (fol_lan.PropositionNodeBinOp, fol_lan.PropositionNodeNaryOp)):
+            if node.op in _DUAL:
+                return self._connect(_DUAL[node.op], [self._negate(child) for child in node.children])
+            if node.op == "->":
+                return self._connect("&&", [node.children[0], self._negate(node.children[1])])
+            if node.op in _NEGATED_COMPARISON:
+                return node.with_op(_NEGATED_COMPARISON[node.op])
+        return fol_lan.PropositionNodeUniOp("!", node)
+
+    def _connect(self, op: str, operands: list[fol_lan.AST_Node]) -> fol_lan.AST_Node:
+        """The simplified connection of simplified operands by && or ||"""
+        if self.flatten:
+            operands = [leaf for operand in operands for leaf in _operands(op, operand)]
+        if self.dedup and self.flatten:
+            operands = list(dict.fromkeys(operands))
+        if self.fold:
+            # true is the identity of && and absorbs ||, false the other way around
+            identity, absorbing = (_TRUE, _FALSE) if op == "&&" else (_FALSE, _TRUE)
+            if any(isinstance(operand, fol_lan.TFNode) and operand.val == absorbing for operand in operands):
+                return fol_lan.TFNode(absorbing)
+            operands = [operand for operand in operands if not (isinstance(operand, fol_lan.TFNode) and operand.val == identity)]
+            if not operands:
+                return fol_lan.TFNode(identity)
+        if len(operands) == 1:
+            return operands[0]
+        if self.flatten:
+            return fol_lan.connect(op, operands)
+        return fol_lan.PropositionNodeNaryOp(op, *operands)
+
+    def _fold_implies(self, antecedent: fol_lan.AST_Node, consequent: fol_lan.AST_Node) -> fol_lan.AST_Node:
+        if isinstance(antecedent, fol_lan.TFNode):
+            return consequent if antecedent.val == _TRUE else fol_lan.TFNode(_TRUE)
+        if isinstance(consequent, fol_lan.TFNode) and consequent.val == _TRUE:
+            return consequent
+        return fol_lan.PropositionNodeBinOp("->", antecedent, consequent)
+
+
+def count_nodes(node: fol_lan.AST_Node) -> int:
+    """ Count the distinct nodes of a formula
+
+    :param AST_Node node: the root of the formula
+    :return: the number of distinct nodes, the shared subtrees are counted once
+    :rtype: int
+    """
+    visited = {node}
+    stack = [node]
+    while stack:
+        for child in stack.pop().children:
+            if child not in visited:
+                visited.add(child)
+                stack.append(child)
+    return len(visited)
+
+def _operands(op: str, node: fol_lan.AST_Node) -> list[fol_lan.AST_Node]:
+    """The operands of a chain of op"""
+    ret = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, (fol_lan.PropositionNodeBinOp, fol_lan.PropositionNodeNaryOp)) and current.op == op:
+            stack.extend(reversed(current.children))
+        else:
+            ret.append(current)
+    return ret
+
+def _exact(node: fol_lan.AST_Node) -> Fraction | None:
+    """The exact value of a numeric constant, None if node is not one"""
+    if not isinstance(node, fol_lan.Constant) or isinstance(node.val, bool):
+        return None
+    if isinstance(node.val, (int, Fraction)):
+        return Fraction(node.val)
+    if isinstance(node.val, float):
+        # the solvers read the decimal representation of the floats
+        return Fraction(repr(node.val))
+    return None
+
+def _calculate(op: str, left: fol_lan.AST_Node, right: fol_lan.AST_Node) -> int | float | Fraction | None:
+    """The value of an arithmetic operation on constants, None if it cannot be represented exactly"""
+    a, b = _exact(left), _exact(right)
+    if a is None or b is None or (op == "/" and b == 0):
+        return None
+    value = _ARITHMETIC[op](a, b)
+    if isinstance(left.val, float) or isinstance(right.val, float):
+        result = float(value)
+        if Fraction(repr(result)) != value:
+            return None
+        return result
+    if value.denominator == 1 and type(left.val) is int and type(right.val) is int:
+        return int(value)
+    return value
+
+def _compare(op: str, left: fol_lan.AST_Node, right: fol_lan.AST_Node) -> bool | None:
+    """The value of a comparison of constants, None if it is not a comparison of constants"""
+    a, b = _exact(left), _exact(right)
+    if a is None or b is None:
+        return None
+    return _COMPARISON[op](a, b)
@@ -0,0 +1,613 @@
+""" Class for MappedExplicitSet
+"""
+from __future__ import annotations
+from typing import Iterable, Any
+import json
+import math
+import os
+import shutil
+import tempfile
+import weakref
+
+import numpy as np
+
+from contractda.sets._explicit_set import ExplicitSet, ExplicitSetVarType, ExplicitSetElementType, ExplicitSetExpressionType, argsort
+from contractda.sets._array_explicit_set import ArrayExplicitSet, _decode_keys, _group_ranks, _intersect1d, _setdiff1d
+from contractda.sets._bitmap_explicit_set import _ravel
+from contractda.vars._var import Var
+
+# the file starts with the magic bytes and the length of the JSON header, the keys start at the next multiple of 8 bytes after the header
+_MAGIC = b"CDAXSET\x01"
+_HEADER_VERSION = 1
+_KEY_DTYPE = np.dtype("<i8")
+_MAX_KEY = np.iinfo(np.int64).max
+
+class MappedExplicitSet(ExplicitSet):
+    """
+    An explicit set stored out of core in a memory-mapped file
+
+    Each element is packed into a 64-bit mixed-radix key, the digits are the positions of the values in ``value_range`` of the internal variables.
+    The file holds a small header followed by the sorted keys without duplicates:
+
+    ===========  ============================================================
+    8 bytes      magic ``CDAXSET\\x01``
+    8 bytes      length of the header, little-endian
+    header       UTF-8 JSON with the version, the variable ids and their value dictionaries
+    padding      zeros up to a multiple of 8 bytes
+    keys         little-endian 64-bit integers until the end of the file
+    ===========  ============================================================
+
+    Only :attr:`chunk_size` keys of each operand are in memory at a time.
+    Union, intersection, difference and the subset/disjoint checks run as streaming merges of the sorted keys,
+    and complement streams the gaps between the keys.
+    Projection and extension compute the new keys chunk by chunk and sort them externally in runs written next to the set.
+    The results are written to new temporary files in the same directory, which are removed when the result is garbage collected.
+    Sets created with an explicit ``path`` keep their file.
+
+    Large tables are loaded from arrays of values with :meth:`from_arrays` and written back with :meth:`to_arrays`,
+    without creating a Python tuple per element. :meth:`open` maps an existing file.
+
+    Every value must be in the domain of its variable, an element with a value outside the domain raises an exception,
+    and the product of the domain sizes must fit in a 64-bit integer. The values must be JSON serializable to be stored in the header.
+
+    :param list[Var] vars: The variables of the set
+    :param list[tuple] expr: The elements of the set, each tuple is an element and the values follow the order of vars
+    :param str path: The file of the set, default to a temporary file
+    :param str directory: The directory of the temporary files of this set and the sets computed from it, default to the system temporary directory
+    """
+    #: number of keys read, merged or sorted at a time
+    chunk_size: int = 1 << 20
+
+    def __init__(self, vars: ExplicitSetVarType, expr: ExplicitSetExpressionType, path: str | None = None, directory: str | None = None):
+        expr = list(expr)
+        self._validate(vars, expr)
+
+        var_order = argsort(vars)
+        self._set_vars([vars[i] for i in var_order], directory)
+        self._var_order = var_order
+        keys = np.unique(self._encode_expr(expr))
+        self._open(self._write(path, [keys]), is_temporary=path is None)
+
+    @classmethod
+    def open(cls, path: str, vars: ExplicitSetVarType, directory: str | None = None) -> MappedExplicitSet:
+        """ Map the set stored in a file
+
+        :param str path: the file written by a MappedExplicitSet
+        :param list[Var] vars: the variables of the set, their ids and domains must match the header of the file
+        :param str directory: the directory of the temporary files, default to the directory of the file
+        :return: the set, the variable order follows vars
+        :rtype: MappedExplicitSet
+        """
+        vars = list(vars)
+        var_order = argsort(vars)
+        ret = cls._new([vars[i] for i in var_order], directory if directory is not None else os.path.dirname(os.path.abspath(path)))
+        header, _ = _read_header(path)
+        expected = json.loads(ret._header())
+        if header["vars"] != expected["vars"] or header["domains"] != expected["domains"]:
+            raise Exception(f"The file {path} does not store a set over the variables {[var.id for var in vars]}")
+        ret._open(path, is_temporary=False)
+        ret._var_order = var_order
+        return ret
+
+    @classmethod
+    def from_arrays(cls, vars: ExplicitSetVarType, chunks: Iterable[np.ndarray], path: str | None = None, directory: str | None = None) -> MappedExplicitSet:
+        """ Load a set from chunks of values
+
+        The values are encoded column by column and the keys are sorted externally, so the chunks can be streamed from a larger table.
+
+        :param list[Var] vars: the variables of the set
+        :param Iterable[np.ndarray] chunks: 2-D arrays of values, one row per element and the columns follow the order of vars
+        :param str path: the file of the set, default to a temporary file
+        :param str directory: the directory of the temporary files
+        :return: the set with the elements of all chunks
+        :rtype: MappedExplicitSet
+        """
+        vars = list(vars)
+        cls._validate(vars, [])
+        var_order = argsort(vars)
+        ret = cls._new([vars[i] for i in var_order], directory)
+        encoders = [_ColumnEncoder(var) for var in ret._vars]
+
+        def key_chunks():
+            for chunk in chunks:
+                chunk = np.asarray(chunk)
+                if chunk.ndim != 2 or chunk.shape[1] != len(vars):
+                    raise Exception(f"The chunk of shape {chunk.shape} does not have a column for each of the {len(vars)} variables")
+                codes = np.empty((len(chunk), len(vars)), dtype=np.int64)
+                for col, ext_idx in enumerate(var_order):
+                    codes[:, col] = encoders[col].encode(chunk[:, ext_idx])
+                yield _ravel(codes, ret._sizes)
+
+        ret._open(ret._write(path, ret._external_sort(key_chunks())), is_temporary=path is None)
+        ret._var_order = var_order
+        return ret
+
+    def to_arrays(self, chunk_size: int | None = None) -> Iterable[np.ndarray]:
+        """ Iterate the elements in chunks of values
+
+        :param int chunk_size: the number of elements in a chunk, default to chunk_size
+        :return: 2-D arrays of values, one row per element and the columns follow the ordered_vars
+        :rtype: Iterable[np.ndarray]
+        """
+        domains = [_value_array(values) for values in self._domains]
+        is_same_dtype = len({domain.dtype for domain in domains}) <= 1
+        for codes in self._iter_codes(chunk_size):
+            columns = [domains[col][codes[:, col]] for col in self._inverse_order]
+            if columns and is_same_dtype:
+                yield np.stack(columns, axis=1)
+            else:
+                ret = np.empty((len(codes), len(columns)), dtype=object)
+                for col, column in enumerate(columns):
+                    ret[:, col] = column
+                yield ret
+
+    def save(self, path: str) -> MappedExplicitSet:
+        """ Copy the set to a file that is kept
+
+        :param str path: the destination file
+        :return: the set mapped from the destination
+        :rtype: MappedExplicitSet
+        """
+        if isinstance(self._keys, np.memmap):
+            self._keys.flush()
+        shutil.copyfile(self._path, path)
+        return MappedExplicitSet.open(path, self.ordered_vars, directory=self._directory)
+
+    @property
+    def path(self) -> str:
+        """
+        The file storing the set
+        """
+        return self._path
+
+    @property
+    def keys(self) -> np.ndarray:
+        """
+        The memory-mapped sorted keys of the elements
+        """
+        return self._keys
+
+    @property
+    def internal_expr(self) -> set[tuple]:
+        """
+        The expr of the set, followed the internal_vars
+        """
+        return set(self._iter_internal())
+
+    ######################
+    #   Extraction
+    ######################
+
+    def cardinality(self) -> int:
+        """ The number of elements in the set
+
+        :return: the number of elements
+        :rtype: int
+        """
+        return len(self._keys)
+
+    ######################
+    #   Set Operation
+    ######################
+
+    def union(self, other: ExplicitSet) -> MappedExplicitSet:
+        """ Union opration on set
+
+        Note: if the variable set is different, projection is used
+
+        :param ExplicitSet other: the set to be union with this set
+        :return: A new set which represents the union of the two set
+        :rtype: MappedExplicitSet
+        """
+        return self._merge(other, np.union1d)
+
+    def intersect(self, other: ExplicitSet) -> MappedExplicitSet:
+        """ Intersect opration on set
+
+        :param ExplicitSet other: the set to be intersect with this set
+        :return: A new set which represents the intersect of the two set
+        :rtype: MappedExplicitSet
+        """
+        return self._merge(other, _intersect1d)
+
+    def difference(self, other: ExplicitSet) -> MappedExplicitSet:
+        """ Difference opration on set
+
+        :param ExplicitSet other: the set to be difference with this set
+        :return: A new set which represents the difference of the two set
+        :rtype: MappedExplicitSet
+        """
+        return self._merge(other, _setdiff1d)
+
+    def complement(self) -> MappedExplicitSet:
+        """ Complement opration on set
+
+        :return: A new set which represents the Complement of the set
+        :rtype: MappedExplicitSet
+        """
+        def key_chunks():
+            for low in range(0, self._size, self.chunk_size):
+                high = min(low + self.chunk_size, self._size)
+                start, end = np.searchsorted(self._keys, [low, high])
+                keys = np.setdiff1d(np.arange(low, high, dtype=np.int64), self._keys[start:end], assume_unique=True)
+                if len(keys):
+                    yield keys
+
+        ret = self._derive(self._vars, key_chunks())
+        ret._var_order = self._var_order
+        return ret
+
+    def _project_subset(self, new_vars: Iterable[Var], is_refine = False, num_workers: int = 1):
+        """ Project the set onto the new variables.
+
+        :param Iterable[str] vars: The id of the new variables, which must be a subset of the variables in the set
+        :param bool is_refine: whether the resulting set is a refinement or abstraction
+        :param int num_workers: not used, the projection streams through the keys in this process
+        """
+        new_vars_set = set(new_vars)
+        indices = [i for i, var in enumerate(self._vars) if var in new_vars_set]
+        remain_vars = [self._vars[i] for i in indices]
+        remain_sizes = [self._sizes[i] for i in indices]
+        if not is_refine:
+            key_chunks = (_ravel(codes[:, indices], remain_sizes) for codes in self._iter_codes())
+            ret = self._derive(remain_vars, key_chunks, is_sorted=False)
+        else:
+            # sort by the remaining values followed by the discarded values, the elements of a group are then consecutive
+            discarded = [i for i in range(len(self._vars)) if i not in indices]
+            discarded_sizes = [self._sizes[i] for i in discarded]
+            key_chunks = (_ravel(codes[:, indices + discarded], remain_sizes + discarded_sizes) for codes in self._iter_codes())
+            ret = self._derive(remain_vars, _covered_groups(self._external_sort(key_chunks), math.prod(discarded_sizes)))
+        ret._reorder_vars(new_vars)
+        return ret
+
+    def _project_extend(self, new_vars: Iterable[Var], is_refine = True):
+        """ Extend the variables with new_vars
+        """
+        new_vars = list(new_vars)
+        all_vars = self._vars + new_vars
+        order = argsort(all_vars)
+        extend_sizes = [len(var.value_range) for var in new_vars]
+        num_extend = math.prod(extend_sizes)
+        extend_codes = _decode_keys(np.arange(num_extend, dtype=np.int64), extend_sizes)
+        all_sizes = self._sizes + extend_sizes
+        sizes = [all_sizes[i] for i in order]
+
+        def key_chunks():
+            for codes in self._iter_codes(max(1, self.chunk_size // max(num_extend, 1))):
+                rows = np.hstack([np.repeat(codes, num_extend, axis=0), np.tile(extend_codes, (len(codes), 1))])
+                yield _ravel(rows[:, order], sizes)
+
+        return self._derive([all_vars[i] for i in order], key_chunks(), is_sorted=False)
+
+    def is_subset(self, other: ExplicitSet) -> bool:
+        """ Check if the set is a subset of the other set
+
+        :param ExplicitSet other: the other set to be check if this set is a subset of it.
+        :return: True if this set is a subset of the other set. False if not.
+        :rtype: bool
+        """
+        set1, set2 = self._sync(other)
+        return not any(True for _ in _stream_set_op(_setdiff1d, set1._keys, set2._keys, self.chunk_size))
+
+    def is_proper_subset(self, other: ExplicitSet) -> bool:
+        """ Check if the set is a proper subset of the other set
+
+        :param ExplicitSet other: the other set to be check if this set is a proper subset of it.
+        :return: True if this set is a proper subset of the other set. False if not.
+        :rtype: bool
+        """
+        set1, set2 = self._sync(other)
+        return len(set1._keys) < len(set2._keys) and not any(True for _ in _stream_set_op(_setdiff1d, set1._keys, set2._keys, self.chunk_size))
+
+    def is_satifiable(self) -> bool:
+        """ Check if the set is satisfiable, i.e., not empty
+
+        :return: True if this set is satisfiable. False if not.
+        :rtype: bool
+        """
+        return len(self._keys) > 0
+
+    def is_equivalence(self, other: ExplicitSet) -> bool:
+        """ Check if the set is equivalent to the other set
+
+        :param ExplicitSet other: the other set to be check if this set is equivalent to it.
+        :return: True if this set is equivalent to the other set. False if not.
+        :rtype: bool
+        """
+        set1, set2 = self._sync(other)
+        return len(set1._keys) == len(set2._keys) and not any(True for _ in _stream_set_op(_setdiff1d, set1._keys, set2._keys, self.chunk_size))
+
+    def is_disjoint(self, other: ExplicitSet) -> bool:
+        """ Check if the set is disjoint to the other set
+
+        :param ExplicitSet other: the other set to be check if this set is disjoint to it.
+        :return: True if this set is disjoint to the other set. False if not.
+        :rtype: bool
+        """
+        set1, set2 = self._sync(other)
+        return not any(True for _ in _stream_set_op(_intersect1d, set1._keys, set2._keys, self.chunk_size))
+
+    ######################
+    #   Internal Functions
+    ######################
+
+    @classmethod
+    def _new(cls, vars: ExplicitSetVarType, directory: str | None) -> MappedExplicitSet:
+        """ Create a set without file, the vars must be sorted in the internal order"""
+        ret = cls.__new__(cls)
+        ret._set_vars(list(vars), directory)
+        ret._var_order = list(range(len(vars)))
+        return ret
+
+    @classmethod
+    def _convert_explicit_set(cls, other: ExplicitSet) -> MappedExplicitSet:
+        if not isinstance(other, ArrayExplicitSet):
+            return cls(vars=other.internal_vars, expr=other.internal_expr)
+        # the codes of the values in the domain are already the mixed-radix digits and the rows are sorted
+        ret = cls._new(other.internal_vars, None)
+        rows = other.rows
+        if np.any(rows >= np.array(ret._sizes, dtype=rows.dtype)):
+            raise Exception("The set contains values outside the domain of its variables")
+        ret._open(ret._write(None, [_ravel(rows, ret._sizes)]), is_temporary=True)
+        return ret
+
+    def _apply_set_op(self, other: ExplicitSet, op) -> MappedExplicitSet:
+        """ Merge the keys of the two sets with the 1-D set operation op chunk by chunk"""
+        set1, set2 = self._sync(other)
+        return self._derive(set1._vars, _stream_set_op(op, set1._keys, set2._keys, self.chunk_size))
+
+    def _sync(self, other: ExplicitSet) -> tuple[MappedExplicitSet, MappedExplicitSet]:
+        """ Bring the two sets to the same variables"""
+        return self._context_sync(self, self._coerce(other))
+
+    def _contains_internal(self, element: ExplicitSetElementType) -> bool:
+        codes = [code_of.get(val) for code_of, val in zip(self._codes, element)]
+        if any(code is None for code in codes):
+            return False
+        key = _ravel(np.array([codes], dtype=np.int64).reshape(1, len(codes)), self._sizes)[0]
+        pos = np.searchsorted(self._keys, key)
+        return bool(pos < len(self._keys) and self._keys[pos] == key)
+
+    def _derive(self, vars: ExplicitSetVarType, key_chunks: Iterable[np.ndarray], is_sorted: bool = True) -> MappedExplicitSet:
+        """ Create a temporary set next to this set from the keys over vars in the internal order
+
+        :param bool is_sorted: whether the chunks are sorted and increasing, otherwise they are sorted externally
+        """
+        ret = MappedExplicitSet._new(vars, self._directory)
+        if not is_sorted:
+            key_chunks = ret._external_sort(key_chunks)
+        ret._open(ret._write(None, key_chunks), is_temporary=True)
+        return ret
+
+    def _external_sort(self, key_chunks: Iterable[np.ndarray]) -> Iterable[np.ndarray]:
+        """ Sort the keys and remove the duplicates in runs of chunk_size keys
+
+        :return: the increasing chunks of sorted keys
+        """
+        runs = []
+        try:
+            buffer = []
+            num_buffered = 0
+            for keys in key_chunks:
+                buffer.append(np.asarray(keys, dtype=np.int64))
+                num_buffered += len(keys)
+                if num_buffered >= self.chunk_size:
+                    runs.append(self._write_run([np.unique(np.concatenate(buffer))]))
+                    buffer = []
+                    num_buffered = 0
+            last = np.unique(np.concatenate(buffer)) if buffer else np.empty(0, dtype=np.int64)
+            if not runs:
+                if len(last):
+                    yield last
+                return
+            if len(last):
+                runs.append(self._write_run([last]))
+            # merge the runs pairwise until two are left, the last merge streams to the caller
+            while len(runs) > 2:
+                merged = []
+                for idx in range(0, len(runs) - 1, 2):
+                    merged.append(self._write_run(_stream_set_op(np.union1d, _map_run(runs[idx]), _map_run(runs[idx + 1]), self.chunk_size)))
+                    _remove_file(runs[idx])
+                    _remove_file(runs[idx + 1])
+                if len(runs) % 2:
+                    merged.append(runs[-1])
+                runs = merged
+            keys2 = _map_run(runs[1]) if len(runs) > 1 else np.empty(0, dtype=np.int64)
+            yield from _stream_set_op(np.union1d, _map_run(runs[0]), keys2, self.chunk_size)
+        finally:
+            for run in runs:
+                _remove_file(run)
+
+    def _write_run(self, key_chunks: Iterable[np.ndarray]) -> str:
+        """ Write the keys to a temporary file without header"""
+        fd, path = tempfile.mkstemp(suffix=".run", dir=self._directory)
+        with os.fdopen(fd, "wb") as f:
+            for keys in key_chunks:
+                np.asarray(keys, dtype=_KEY_DTYPE).tofile(f)
+        return path
+
+    def _write(self, path: str | None, key_chunks: Iterable[np.ndarray]) -> str:
+        """ Write the header and the increasing chunks of keys to path, default to a new temporary file
+
+        :return: the path of the file
+        """
+        if path is None:
+            fd, path = tempfile.mkstemp(suffix=".cdaset", dir=self._directory)
+            os.close(fd)
+        header = self._header()
+        with open(path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            f.write(b"\0" * (-(len(_MAGIC) + 8 + len(header)) % 8))
+            for keys in key_chunks:
+                np.asarray(keys, dtype=_KEY_DTYPE).tofile(f)
+        return path
+
+    def _open(self, path: str, is_temporary: bool) -> None:
+        """ Map the keys of the file, a temporary file is removed with the set"""
+        _, offset = _read_header(path)
+        num_keys = (os.path.getsize(path) - offset) // _KEY_DTYPE.itemsize
+        self._path = path
+        if num_keys:
+            self._keys = np.memmap(path, dtype=_KEY_DTYPE, mode="r", offset=offset, shape=(num_keys,))
+        else:
+            self._keys = np.empty(0, dtype=_KEY_DTYPE)
+        if is_temporary:
+            weakref.finalize(self, _remove_file, path)
+
+    def _header(self) -> bytes:
+        header = {"version": _HEADER_VERSION, "vars": [var.id for var in self._vars], "domains": self._domains}
+        try:
+            return json.dumps(header).encode("utf-8")
+        except TypeError as e:
+            raise Exception(f"The domains of the variables {[var.id for var in self._vars]} cannot be stored in the header: {e}")
+
+    def _set_vars(self, vars: ExplicitSetVarType, directory: str | None) -> None:
+        self._vars: list[Var] = vars
+        self._domains: list[list] = [list(var.value_range) for var in vars]
+        self._codes: list[dict] = [{val: code for code, val in enumerate(values)} for values in self._domains]
+        self._sizes: list[int] = [len(values) for values in self._domains]
+        self._size: int = math.prod(self._sizes)
+        self._directory = directory
+        if self._size > _MAX_KEY:
+            raise Exception(f"The domain size {self._size} does not fit in the 64-bit keys of a mapped set")
+
+    def _encode_expr(self, expr: list[tuple]) -> np.ndarray:
+        """ Convert the elements in external order into the keys"""
+        rows = np.empty((len(expr), len(self._vars)), dtype=np.int64)
+        for col, ext_idx in enumerate(self._var_order):
+            codes = self._codes[col]
+            column = []
+            for elem in expr:
+                code = codes.get(elem[ext_idx])
+                if code is None:
+                    raise Exception(f"The value {elem[ext_idx]} is not in the domain of variable {self._vars[col].id}")
+                column.append(code)
+            rows[:, col] = column
+        return _ravel(rows, self._sizes)
+
+    def _elements_at(self, ranks: list[int]) -> list[ExplicitSetElementType]:
+        codes = _decode_keys(self._keys[np.asarray(ranks, dtype=np.int64)], self._sizes)
+        return [self._decode_codes(row) for row in codes.tolist()]
+
+    def _rank_groups(self, column: int) -> dict[Any, np.ndarray]:
+        if self._strata is None:
+            self._strata = dict()
+        groups = self._strata.get(column)
+        if groups is None:
+            column_codes = np.concatenate([codes[:, column] for codes in self._iter_codes()] or [np.empty(0, dtype=np.int64)])
+            values = self._domains[column]
+            groups = {values[code]: ranks for code, ranks in _group_ranks(column_codes)}
+            self._strata[column] = groups
+        return groups
+
+    def _decode_codes(self, codes) -> tuple:
+        return tuple([values[code] for values, code in zip(self._domains, codes)])
+
+    def _iter_codes(self, chunk_size: int | None = None) -> Iterable[np.ndarray]:
+        """ Iterate the codes of the elements in chunks, the columns follow the internal_vars"""
+        chunk_size = chunk_size or self.chunk_size
+        for start in range(0, len(self._keys), chunk_size):
+            yield _decode_keys(np.asarray(self._keys[start:start+chunk_size]), self._sizes)
+
+    def _iter_internal(self):
+        for codes in self._iter_codes():
+            for row in codes.tolist():
+                yield self._decode_codes(row)
+
+class _ColumnEncoder:
+    """ Vectorized conversion of the values of a variable into their positions in value_range"""
+    def __init__(self, var: Var):
+        self._var = var
+        self._domain = _value_array(list(var.value_range))
+        self._sorter = np.argsort(self._domain, kind="stable")
+
+    def encode(self, column: np.ndarray) -> np.ndarray:
+        if len(self._domain) == 0:
+            if len(column):
+                raise Exception(f"The value {column[0]} is not in the domain of variable {self._var.id}")
+            return np.empty(0, dtype=np.int64)
+        pos = np.searchsorted(self._domain, column, sorter=self._sorter)
+        codes = self._sorter[np.minimum(pos, len(self._domain) - 1)]
+        mismatched = self._domain[codes] != column
+        if np.any(mismatched):
+            raise Exception(f"The value {column[mismatched][0]} is not in the domain of variable {self._var.id}")
+        return codes
+
+def _value_array(values: list) -> np.ndarray:
+    """ The values as a 1-D array, kept as Python objects if numpy would convert them"""
+    ret = np.asarray(values)
+    if ret.ndim != 1 or ret.tolist() != values:
+        ret = np.empty(len(values), dtype=object)
+        ret[:] = values
+    return ret
+
+def _read_header(path: str) -> tuple[dict, int]:
+    """ Read the header of a mapped set
+
+    :return: the header and the offset of the keys
+    """
+    with open(path, "rb") as f:
+        magic = f.read(len(_MAGIC))
+        if magic != _MAGIC:
+            raise Exception(f"The file {path} is not a mapped explicit set")
+        header_len = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(header_len).decode("utf-8"))
+    if header.get("version") != _HEADER_VERSION:
+        raise Exception(f"The version {header.get('version')} of the mapped explicit set {path} is not supported")
+    offset = len(_MAGIC) + 8 + header_len
+    return header, offset + (-offset % 8)
+
+def _map_run(path: str) -> np.ndarray:
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=_KEY_DTYPE)
+    return np.memmap(path, dtype=_KEY_DTYPE, mode="r")
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def _stream_set_op(op, keys1: np.ndarray, keys2: np.ndarray, chunk_size: int) -> Iterable[np.ndarray]:
+    """ Apply the 1-D set operation op on two sorted arrays of unique keys, at most chunk_size keys of each at a time
+
+    Each step takes the keys up to the smaller of the last keys of the next chunks of the two arrays,
+    so the keys that can match are always in the same step and the results are increasing.
+    """
+    idx1, idx2 = 0, 0
+    while idx1 < len(keys1) or idx2 < len(keys2):
+        bounds = []
+        if idx1 + chunk_size < len(keys1):
+            bounds.append(keys1[idx1 + chunk_size - 1])
+        if idx2 + chunk_size < len(keys2):
+            bounds.append(keys2[idx2 + chunk_size - 1])
+        if bounds:
+            bound = min(bounds)
+            end1 = idx1 + int(np.searchsorted(keys1[idx1:idx1+chunk_size], bound, side="right"))
+            end2 = idx2 + int(np.searchsorted(keys2[idx2:idx2+chunk_size], bound, side="right"))
+        else:
+            end1, end2 = len(keys1), len(keys2)
+        ret = op(np.asarray(keys1[idx1:end1]), np.asarray(keys2[idx2:end2]))
+        if len(ret):
+            yield ret
+        idx1, idx2 = end1, end2
+
+def _covered_groups(key_chunks: Iterable[np.ndarray], num_cover: int) -> Iterable[np.ndarray]:
+    """ The groups with num_cover keys, the group of a key is key // num_cover and the chunks are sorted and increasing"""
+    last_group, last_count = None, 0
+    for keys in key_chunks:
+        groups, counts = np.unique(keys // num_cover, return_counts=True)
+        if last_group is not None:
+            if groups[0] == last_group:
+                counts[0] += last_count
+            elif last_count == num_cover:
+                yield np.array([last_group], dtype=np.int64)
+        # the last group may continue in the next chunk
+        covered = groups[:-1][counts[:-1] == num_cover]
+        if len(covered):
+            yield covered
+        last_group, last_count = groups[-1], counts[-1]
+    if last_group is not None and last_count == num_cover:
+        yield np.array([last_group], dtype=np.int64)
@@ -0,0 +1,703 @@
+""" Class for MDDSet, a symbolic set represented by a reduced ordered multi-valued decision diagram
+"""
+from __future__ import annotations
+from typing import Any, Callable, Iterable
+from collections import OrderedDict
+import math
+import random
+
+from contractda.sets._base import SetBase
+from contractda.sets._explicit_set import ExplicitSet
+from contractda.vars._var import Var
+
+MDDSetVarType = list[Var]
+MDDSetElementType = tuple
+MDDSetExpressionType = list[tuple]
+
+# terminal nodes
+_FALSE = 0
+_TRUE = 1
+# operation codes used in the operation cache
+_AND = 0
+_OR = 1
+_DIFF = 2
+_NOT = 3
+_EXISTS = 4
+_FORALL = 5
+
+class MDDManager(object):
+    """
+    The node store shared by MDD sets
+
+    Nodes are integers, 0 and 1 are the terminals and the other nodes are kept in a unique table so that each
+    (variable, children) pair is created only once. Two sets managed by the same manager are equivalent if and only if their root nodes are the same.
+    The results of the operations are memorized in an operation cache, the least recently used entries are evicted when the cache is full.
+
+    The nodes are never freed while the manager is alive, the unique table only grows.
+    Scope a manager to a design (pass it to :class:`MDDSet` or install it with :func:`set_default_mdd_manager`),
+    the nodes are released together with the manager once no set refers to it.
+    All algorithms traverse the diagram with an explicit stack, so the number of variables is not limited by the recursion limit.
+
+    The variable ordering decides the size of the diagram. By default the variables are ordered by :attr:`Var.id`.
+    var_order can be a list of variables, which are placed first following the list while the other variables follow by id,
+    or a function mapping a variable to its sorting key.
+    Different variables with the same key (e.g. two variables created with the same id) are ordered by when the manager first sees them,
+    so the ordering is reproducible for a fresh manager but depends on the history of a long-lived one.
+
+    :param int cache_size: the maximum number of entries in the operation cache
+    :param var_order: the list of variables or the key function deciding the variable ordering
+    """
+    def __init__(self, cache_size: int = 1 << 18, var_order: Iterable[Var] | Callable[[Var], Any] = None):
+        self._node_var: list[Var] = [None, None]
+        self._node_children: list[tuple[int]] = [(), ()]
+        self._unique: dict[tuple, int] = {}
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_size: int = cache_size
+        self._var_keys: dict[Var, tuple] = {}
+        self._key_counts: dict[tuple, int] = {}
+        self._value_codes: dict[Var, dict] = {}
+        if var_order is None or callable(var_order):
+            self._order_fn = var_order
+            self._order_pos = None
+        else:
+            self._order_fn = None
+            self._order_pos = {var: i for i, var in enumerate(var_order)}
+
+    @property
+    def num_nodes(self) -> int:
+        """The number of nodes in the unique table including the terminals"""
+        return len(self._node_var)
+
+    def clear_cache(self) -> None:
+        """Clear the operation cache, the nodes in the unique table are kept"""
+        self._cache.clear()
+
+    def var_key(self, var: Var) -> tuple:
+        """The ordering key of the variable, a variable with smaller key is closer to the root"""
+        key = self._var_keys.get(var)
+        if key is None:
+            if self._order_fn is not None:
+                key = (self._order_fn(var),)
+            elif self._order_pos is not None:
+                key = (0, self._order_pos[var]) if var in self._order_pos else (1, var.id)
+            else:
+                key = (var.id,)
+            # break the ties between different variables with the same key
+            tie = self._key_counts.get(key, 0)
+            self._key_counts[key] = tie + 1
+            key = key + (tie,)
+            self._var_keys[var] = key
+        return key
+
+    def value_codes(self, var: Var) -> dict:
+        """The position of each value in the value range of the variable, which is the index of the child of a node testing var"""
+        codes = self._value_codes.get(var)
+        if codes is None:
+            codes = {val: code for code, val in enumerate(var.value_range)}
+            self._value_codes[var] = codes
+        return codes
+
+    def node_var(self, node: int) -> Var:
+        return self._node_var[node]
+
+    def node_children(self, node: int) -> tuple[int]:
+        return self._node_children[node]
+
+    def mk(self, var: Var, children: tuple[int]) -> int:
+        """ Return the reduced node testing var with the children, one child for each value in the value range"""
+        if not children:
+            return _FALSE
+        first = children[0]
+        if all(child == first for child in children):
+            return first
+        key = (var, children)
+        node = self._unique.get(key)
+        if node is None:
+            node = len(self._node_var)
+            self._node_var.append(var)
+            self._node_children.append(children)
+            self._unique[key] = node
+        return node
+
+    def build(self, vars: MDDSetVarType, expr: Iterable[tuple]) -> int:
+        """ Build the diagram of the elements, vars must follow the variable ordering and the values in the elements follow vars"""
+        codes = [self.value_codes(var) for var in vars]
+        nodes = {}
+        for elem in expr:
+            row = []
+            for var, code, val in zip(vars, codes, elem):
+                if val not in code:
+                    raise Exception(f"The value {val} is not in the domain of variable {var.id}")
+                row.append(code[val])
+            nodes[tuple(row)] = _TRUE
+        # merge the rows sharing the same prefix from the last variable up to the root
+        for level in reversed(range(len(vars))):
+            size = len(codes[level])
+            groups = {}
+            for row, node in nodes.items():
+                groups.setdefault(row[:level], [_FALSE] * size)[row[level]] = node
+            nodes = {prefix: self.mk(vars[level], tuple(children)) for prefix, children in groups.items()}
+        return nodes.get((), _FALSE)
+
+    def apply(self, op: int, node1: int, node2: int) -> int:
+        """ Apply the binary operation _AND, _OR or _DIFF on the two diagrams"""
+        ret = self._apply_terminal(op, node1, node2)
+        if ret is not None:
+            return ret
+        root = self._apply_pair(op, node1, node2)
+        results = {}
+        stack = [root]
+        while stack:
+            pair = stack[-1]
+            if pair in results:
+                stack.pop()
+                continue
+            key = (op,) + pair
+            ret = self._cache_get(key)
+            if ret is not None:
+                results[pair] = ret
+                stack.pop()
+                continue
+            var, child_pairs = self._cofactors(*pair)
+            children = []
+            pending = []
+            for child1, child2 in child_pairs:
+                child = self._apply_terminal(op, child1, child2)
+                if child is None:
+                    child_pair = self._apply_pair(op, child1, child2)
+                    child = results.get(child_pair)
+                    if child is None:
+                        pending.append(child_pair)
+                children.append(child)
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            ret = self.mk(var, tuple(children))
+            results[pair] = ret
+            self._cache_put(key, ret)
+        return results[root]
+
+    def negate(self, node: int) -> int:
+        """ The complement of the diagram"""
+        results = {_FALSE: _TRUE, _TRUE: _FALSE}
+        stack = [node]
+        while stack:
+            current = stack[-1]
+            if current in results:
+                stack.pop()
+                continue
+            key = (_NOT, current, None)
+            ret = self._cache_get(key)
+            if ret is None:
+                pending = [child for child in self._node_children[current] if child not in results]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                ret = self.mk(self._node_var[current], tuple(results[child] for child in self._node_children[current]))
+                self._cache_put(key, ret)
+            stack.pop()
+            results[current] = ret
+        return results[node]
+
+    def quantify(self, node: int, vars: frozenset[Var], is_forall: bool = False) -> int:
+        """ Existentially (or universally if is_forall) quantify the variables out of the diagram"""
+        op = _FORALL if is_forall else _EXISTS
+        results = {_FALSE: _FALSE, _TRUE: _TRUE}
+        stack = [node]
+        while stack:
+            current = stack[-1]
+            if current in results:
+                stack.pop()
+                continue
+            key = (op, current, vars)
+            ret = self._cache_get(key)
+            if ret is None:
+                pending = [child for child in self._node_children[current] if child not in results]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                var = self._node_var[current]
+                children = [results[child] for child in self._node_children[current]]
+                if var in vars:
+                    ret = children[0]
+                    for child in children[1:]:
+                        ret = self.apply(_AND if is_forall else _OR, ret, child)
+                else:
+                    ret = self.mk(var, tuple(children))
+                self._cache_put(key, ret)
+            stack.pop()
+            results[current] = ret
+        return results[node]
+
+    def count(self, node: int, vars: MDDSetVarType) -> int:
+        """ The number of assignments to vars that are in the diagram, vars must follow the variable ordering"""
+        return self._counter(vars)(node, 0)
+
+    def _counter(self, vars: MDDSetVarType):
+        """ Return the function counting the assignments to vars[level:] that are in the diagram of node"""
+        sizes = [len(var.value_range) for var in vars]
+        levels = {var: level for level, var in enumerate(vars)}
+        gaps = {}
+        def gap(start: int, stop: int) -> int:
+            # number of assignments to the skipped variables vars[start:stop]
+            ret = gaps.get((start, stop))
+            if ret is None:
+                ret = math.prod(sizes[start:stop])
+                gaps[(start, stop)] = ret
+            return ret
+        def level_of(node: int) -> int:
+            return len(vars) if node <= _TRUE else levels[self._node_var[node]]
+        # counts of the assignments to vars[level_of(node):]
+        counts = {_FALSE: 0, _TRUE: 1}
+        def count(node: int, level: int) -> int:
+            stack = [node]
+            while stack:
+                current = stack[-1]
+                if current in counts:
+                    stack.pop()
+                    continue
+                pending = [child for child in self._node_children[current] if child not in counts]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                stack.pop()
+                child_level = level_of(current) + 1
+                counts[current] = sum(counts[child] * gap(child_level, level_of(child)) for child in self._node_children[current])
+            return counts[node] * gap(level, level_of(node))
+        return count
+
+    def _apply_terminal(self, op: int, node1: int, node2: int) -> int | None:
+        """ The result of the operation if it is decided without expanding the nodes, None otherwise"""
+        if op == _AND:
+            if node1 == _FALSE or node2 == _FALSE:
+                return _FALSE
+            if node1 == _TRUE or node1 == node2:
+                return node2
+            if node2 == _TRUE:
+                return node1
+        elif op == _OR:
+            if node1 == _TRUE or node2 == _TRUE:
+                return _TRUE
+            if node1 == _FALSE or node1 == node2:
+                return node2
+            if node2 == _FALSE:
+                return node1
+        else:
+            if node1 == _FALSE or node2 == _TRUE or node1 == node2:
+                return _FALSE
+            if node2 == _FALSE:
+                return node1
+            if node1 == _TRUE:
+                return self.negate(node2)
+        return None
+
+    @staticmethod
+    def _apply_pair(op: int, node1: int, node2: int) -> tuple[int, int]:
+        # AND and OR are commutative, share the cache entries of both operand orders
+        if op != _DIFF and node1 > node2:
+            return node2, node1
+        return node1, node2
+
+    def _cofactors(self, node1: int, node2: int):
+        """ The top variable of the two nodes and the pairs of children for each of its values"""
+        var1 = self._node_var[node1]
+        var2 = self._node_var[node2]
+        key1 = self.var_key(var1)
+        key2 = self.var_key(var2)
+        if key1 == key2:
+            return var1, zip(self._node_children[node1], self._node_children[node2])
+        if key1 < key2:
+            return var1, [(child, node2) for child in self._node_children[node1]]
+        return var2, [(node1, child) for child in self._node_children[node2]]
+
+    def _cache_get(self, key: tuple) -> int | None:
+        ret = self._cache.get(key)
+        if ret is not None:
+            self._cache.move_to_end(key)
+        return ret
+
+    def _cache_put(self, key: tuple, node: int) -> None:
+        self._cache[key] = node
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+_default_manager = MDDManager()
+
+def get_default_mdd_manager() -> MDDManager:
+    """ The manager used by MDD sets created without an explicit manager
+
+    :rtype: MDDManager
+    """
+    return _default_manager
+
+def set_default_mdd_manager(manager: MDDManager) -> MDDManager:
+    """ Install the manager used by MDD sets created without an explicit manager
+
+    The sets created before keep their manager, the nodes of the previous manager are released once no set refers to it.
+
+    :param MDDManager manager: the new default manager
+    :return: the previous default manager
+    :rtype: MDDManager
+    """
+    global _default_manager
+    previous = _default_manager
+    _default_manager = manager
+    return previous
+
+class MDDSet(SetBase):
+    """
+    A symbolic set of finite-domain variables represented by a reduced ordered multi-valued decision diagram
+
+    Set operations, projection (existential and universal quantification), the subset checks and model counting are performed on the diagram
+    without enumerating the elements or calling a solver. The elements and the variables follow the same conventions as :class:`ExplicitSet`.
+
+    :param list[Var] vars: The variables of the set, all variables must have finite domains
+    :param list[tuple] expr: The elements of the set, each tuple is an element and the values follow the order of vars
+    :param MDDManager manager: the manager storing the nodes, the default manager (see :func:`get_default_mdd_manager`) is used if not provided
+    """
+    def __init__(self, vars: MDDSetVarType, expr: MDDSetExpressionType, manager: MDDManager = None):
+        expr = list(expr)
+        ExplicitSet._validate(vars, expr)
+
+        self._manager: MDDManager = _default_manager if manager is None else manager
+        self._var_order: list[int] = sorted(range(len(vars)), key=lambda i: self._manager.var_key(vars[i]))
+        self._vars: MDDSetVarType = [vars[i] for i in self._var_order]
+        self._root: int = self._manager.build(self._vars, [self._convert_elem_to_internal(elem) for elem in expr])
+
+    def __str__(self):
+        return f"{tuple([str(var)for var in self.ordered_vars])} = MDD({self._root})"
+
+    @classmethod
+    def from_explicit_set(cls, other: ExplicitSet, manager: MDDManager = None) -> MDDSet:
+        """ Convert an explicit set into a MDD set
+
+        :param ExplicitSet other: the set to be converted
+        :param MDDManager manager: the manager storing the nodes
+        :return: the MDD set with the same variables, variable order and elements
+        :rtype: MDDSet
+        """
+        return cls(vars=other.ordered_vars, expr=other.ordered_expr, manager=manager)
+
+    def to_explicit_set(self) -> ExplicitSet:
+        """ Convert the set into an explicit set
+
+        :return: the explicit set with the same variables, variable order and elements
+        :rtype: ExplicitSet
+        """
+        return ExplicitSet(vars=self.ordered_vars, expr=self.ordered_expr)
+
+    @classmethod
+    def _from_root(cls, manager: MDDManager, vars: MDDSetVarType, root: int, ordered_vars: MDDSetVarType = None) -> MDDSet:
+        ret = cls.__new__(cls)
+        ret._manager = manager
+        ret._vars = sorted(vars, key=manager.var_key)
+        ret._root = root
+        ret._var_order = list(range(len(vars)))
+        if ordered_vars is not None:
+            ret._reorder_vars(ordered_vars)
+        return ret
+
+    @property
+    def vars(self) -> MDDSetVarType:
+        return self._vars
+
+    @property
+    def internal_vars(self) -> MDDSetVarType:
+        """
+        The variables following the variable ordering of the diagram
+        """
+        return self._vars
+
+    @property
+    def ordered_vars(self) -> MDDSetVarType:
+        """
+        The variables in the order provided by the designer
+        """
+        sorted_pair = sorted(zip(self._var_order, self._vars), key=lambda x: x[0])
+        return [val for _, val in sorted_pair]
+
+    @property
+    def internal_expr(self) -> set[tuple]:
+        """
+        The elements of the set, followed the internal_vars
+        """
+        return set(self._iter_internal())
+
+    @property
+    def ordered_expr(self) -> set[tuple]:
+        """
+        The elements of the set, followed the ordered_vars
+        """
+        return {self._convert_elem_to_external(elem) for elem in self._iter_internal()}
+
+    @property
+    def root(self) -> int:
+        """
+        The root node of the diagram
+        """
+        return self._root
+
+    @property
+    def manager(self) -> MDDManager:
+        """
+        The manager storing the nodes of the diagram
+        """
+        return self._manager
+
+    def reorder_vars(self, vars: list[Var]) -> None:
+        """ Change the order of variables
+        """
+        if not self._verify_unique_vars(vars) or set(vars) != set(self._vars):
+            raise Exception("Reorder must be using the same set of variables")
+        self._reorder_vars(vars)
+
+    def _reorder_vars(self, vars: list[Var]) -> None:
+        position = {var: i for i, var in enumerate(self._vars)}
+        internal = sorted(range(len(vars)), key=lambda i: position[vars[i]])
+        self._var_order = internal
+
+    ######################
+    #   Extraction
+    ######################
+
+    def __iter__(self):
+        self._iter = self._iter_internal()
+        return self
+
+    def __next__(self):
+        element = next(self._iter)
+        return self._convert_elem_to_external(element)
+
+    def get_enumeration(self) -> Iterable[MDDSetElementType]:
+        """ Enumerate the set elements
+
+        :return: An iterable object that can produce all elements
+        :rtype: Iterable
+        """
+        return list(self._iter_internal())
+
+    def sample(self) -> Any:
+        """ Sample an element in the set
+
+        :return: any element that is in the set
+        :rtype: Any
+        """
+        count = self._manager._counter(self._vars)
+        random.seed(0)
+        rank = random.randrange(0, count(self._root, 0))
+        # walk down the diagram and pick the child containing the rank-th element
+        node = self._root
+        elem = []
+        for level, var in enumerate(self._vars):
+            if node > _TRUE and self._manager.node_var(node) is var:
+                children = self._manager.node_children(node)
+            else:
+                children = [node] * len(var.value_range)
+            for val, child in zip(var.value_range, children):
+                num = count(child, level + 1)
+                if rank < num:
+                    break
+                rank -= num
+            elem.append(val)
+            node = child
+        return tuple(elem)
+
+    def model_count(self) -> int:
+        """ The number of elements in the set, computed on the diagram
+
+        :return: the number of elements
+        :rtype: int
+        """
+        return self._manager.count(self._root, self._vars)
+
+    ######################
+    #   Set Operation
+    ######################
+
+    def union(self, other: SetBase) -> MDDSet:
+        """ Union opration on set
+
+        :param SetBase other: the set to be union with this set
+        :return: A new set which represents the union of the two set
+        :rtype: MDDSet
+        """
+        return self._merge(other, _OR)
+
+    def intersect(self, other: SetBase) -> MDDSet:
+        """ Intersect opration on set
+
+        :param SetBase other: the set to be intersect with this set
+        :return: A new set which represents the intersect of the two set
+        :rtype: MDDSet
+        """
+        return self._merge(other, _AND)
+
+    def difference(self, other: SetBase) -> MDDSet:
+        """ Difference opration on set
+
+        :param SetBase other: the set to be difference with this set
+        :return: A new set which represents the difference of the two set
+        :rtype: MDDSet
+        """
+        return self._merge(other, _DIFF)
+
+    def complement(self) -> MDDSet:
+        """ Complement opration on set
+
+        :return: A new set which represents the Complement of the set
+        :rtype: MDDSet
+        """
+        return self._from_root(self._manager, self._vars, self._manager.negate(self._root), self.ordered_vars)
+
+    def project(self, vars: Iterable[Var], is_refine = False) -> MDDSet:
+        """ Projection opration of set onto the new variables
+
+        The discarded variables are existentially quantified for abstraction and universally quantified for refinement.
+        The added variables are unconstrained.
+
+        :param Iterable[Var] vars: the list of variables to be the projection result.
+        :param bool is_refine: whether the projection is to result in refinement or abstraction
+        :return: A new set which represents the Projection of the set on the input variables
+        :rtype: MDDSet
+        """
+        vars = list(vars)
+        discarded = frozenset(self._vars).difference(vars)
+        root = self._root
+        if discarded:
+            root = self._manager.quantify(root, discarded, is_forall=is_refine)
+        return self._from_root(self._manager, vars, root, vars)
+
+    def is_contain(self, element: MDDSetElementType) -> bool:
+        """ Check if the set is contain the element
+
+        :param MDDSetElementType element: the element to be checked if it is contained in the set
+        :return: True if the element is in the set. False if not.
+        :rtype: bool
+        """
+        ExplicitSet._verify_match_len_element(element, len(self._vars))
+        codes = {}
+        for var, val in zip(self._vars, self._convert_elem_to_internal(element)):
+            code = self._manager.value_codes(var).get(val)
+            if code is None:
+                return False
+            codes[var] = code
+        node = self._root
+        while node > _TRUE:
+            node = self._manager.node_children(node)[codes[self._manager.node_var(node)]]
+        return node == _TRUE
+
+    def is_subset(self, other: SetBase) -> bool:
+        """ Check if the set is a subset of the other set
+
+        :param SetBase other: the other set to be check if this set is a subset of it.
+        :return: True if this set is a subset of the other set. False if not.
+        :rtype: bool
+        """
+        other = self._coerce(other)
+        return self._manager.apply(_DIFF, self._root, other._root) == _FALSE
+
+    def is_proper_subset(self, other: SetBase) -> bool:
+        """ Check if the set is a proper subset of the other set
+
+        :param SetBase other: the other set to be check if this set is a proper subset of it.
+        :return: True if this set is a proper subset of the other set. False if not.
+        :rtype: bool
+        """
+        other = self._coerce(other)
+        return self._root != other._root and self._manager.apply(_DIFF, self._root, other._root) == _FALSE
+
+    def is_satifiable(self) -> bool:
+        """ Check if the set is satisfiable, i.e., not empty
+
+        :return: True if this set is satisfiable. False if not.
+        :rtype: bool
+        """
+        return self._root != _FALSE
+
+    def is_equivalence(self, other: SetBase) -> bool:
+        """ Check if the set is equivalent to the other set
+
+        :param SetBase other: the other set to be check if this set is equivalent to it.
+        :return: True if this set is equivalent to the other set. False if not.
+        :rtype: bool
+        """
+        return self._root == self._coerce(other)._root
+
+    def is_disjoint(self, other: SetBase) -> bool:
+        """ Check if the set is disjoint to the other set
+
+        :param SetBase other: the other set to be check if this set is disjoint to it.
+        :return: True if this set is disjoint to the other set. False if not.
+        :rtype: bool
+        """
+        other = self._coerce(other)
+        return self._manager.apply(_AND, self._root, other._root) == _FALSE
+
+    @classmethod
+    def generate_variable_equivalence_constraint_set(cls, vars: list[Var]) -> MDDSet:
+        """ Generate a set that force the variable to have the same values
+
+        :param list[Var] vars: the variable that has the same values.
+        :return: the set that force the variables to have the same values.
+        :rtype: MDDSet
+        """
+        common_values = [val for val in vars[0].value_range if all(val in var.value_range for var in vars[1:])]
+        return cls(vars=vars, expr=[tuple([val] * len(vars)) for val in common_values])
+
+    @classmethod
+    def generate_var_val_equivalence_constraint_set(cls, var: Var, val) -> MDDSet:
+        """ Generate a set that force the variable to have the value
+
+        :param Var vars: the variable that to set the value.
+        :param val: the value for the variable
+        :return: the set that force the variables to have the value.
+        :rtype: MDDSet
+        """
+        return cls(vars=[var], expr=[tuple([val])])
+
+    ######################
+    #   Internal Functions
+    ######################
+
+    def _merge(self, other: SetBase, op: int) -> MDDSet:
+        other = self._coerce(other)
+        new_var = self.ordered_vars
+        new_var += [var for var in other.ordered_vars if var not in new_var]
+        return self._from_root(self._manager, new_var, self._manager.apply(op, self._root, other._root), new_var)
+
+    def _coerce(self, other: SetBase) -> MDDSet:
+        if isinstance(other, ExplicitSet):
+            return MDDSet.from_explicit_set(other, manager=self._manager)
+        if not isinstance(other, MDDSet):
+            raise Exception(f"Set operation between MDDSet and {type(other).__name__} is not supported")
+        if other._manager is not self._manager:
+            raise Exception("Set operation between MDDSets of different managers is not supported")
+        return other
+
+    def _iter_internal(self):
+        manager = self._manager
+        vars = self._vars
+        stack = [(self._root, 0, ())]
+        while stack:
+            node, level, prefix = stack.pop()
+            if node == _FALSE:
+                continue
+            if level == len(vars):
+                yield prefix
+                continue
+            var = vars[level]
+            if node > _TRUE and manager.node_var(node) is var:
+                children = manager.node_children(node)
+            else:
+                children = [node] * len(var.value_range)
+            # push in reverse so that the elements come out in the order of the value ranges
+            for val, child in reversed(list(zip(var.value_range, children))):
+                stack.append((child, level + 1, prefix + (val,)))
+
+    def _convert_elem_to_external(self, elem: tuple) -> tuple:
+        sorted_pair = sorted(zip(self._var_order, elem), key=lambda x: x[0])
+        return tuple([val for _, val in sorted_pair])
+
+    def _convert_elem_to_internal(self, elem: tuple) -> tuple:
+        return tuple([elem[idx] for idx in self._var_order])
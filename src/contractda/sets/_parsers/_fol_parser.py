@@ -1,10 +1,19 @@
 
+from __future__ import annotations
+from fractions import Fraction
+from typing import Iterable
+import concurrent.futures
 import ply.lex as lex
 import ply.yacc as yacc
+import os
 import re
+import threading
 
 import contractda.sets._fol_lan as _fol_lan
- 
+from contractda.solvers._cache import LRUCache
+
+# the LALR tables generated from the grammar of FOL_Parser, shipped with the package
+_TABLE_MODULE = "contractda.sets._parsers.parsetab"
 
 class FOL_Lexer(object):
     """First Order Logic Lexer
@@ -74,7 +83,11 @@ class FOL_Lexer(object):
 
     @lex.TOKEN(fol_tokens_symbol["CONSTANT"])
     def t_CONSTANT(self, t):
-        t.value = float(t.value)
+        # keep the exact value, the integers as int and the other numbers as Fraction
+        if t.value.lstrip("+-").isdigit():
+            t.value = int(t.value)
+        else:
+            t.value = Fraction(t.value)
         return t
 
     @lex.TOKEN(fol_tokens_symbol["LITERAL"])
@@ -103,12 +116,23 @@ class FOL_Lexer(object):
 
 class FOL_Parser(object):
     """First Order Logic Parser
-    
+
+    The trees of the parsed descriptions are kept in parse_cache, so parsing a description again returns the same tree.
+    The trees are immutable, so the returned tree can be shared.
+
+    The parser can be used by many threads, each thread parses with its own PLY parser and lexer.
+
+    :param int cache_size: the maximum number of descriptions in parse_cache
     """
-    def __init__(self):
-        
+    def __init__(self, cache_size: int = 1 << 12):
+        self.parse_cache = LRUCache(maxsize=cache_size)
+        # the PLY parser, the lexer and the context of each thread
+        self._local = threading.local()
+        self._build_options: dict | None = None
+
         lexer = FOL_Lexer()
         lexer.build()
+        self._lexer = lexer
         self.precedence = (("left", "LPAREN", "RPAREN"),
                            ("left", "AND", "OR", "IMPLY", "NOT"),
                            ("left", "GE", "GT", "LT", "LE", "EQ", "NEQ"),
@@ -116,7 +140,6 @@ class FOL_Parser(object):
                            ('left', 'MUL', 'DIV'),
                            ("left", "POWER"))
         self.tokens = lexer.tokens
-        self._ctx = {}
 
     def p_proposition_uniop(self, p):
         '''proposition : NOT proposition
@@ -130,14 +153,18 @@ class FOL_Parser(object):
                    | expression LE expression        
                    | expression EQ expression
                    | expression NEQ expression    
-                   | proposition AND proposition   
-                   | proposition OR proposition   
                    | proposition IMPLY proposition
                    | expression EQ proposition
                    | expression NEQ proposition
                    | proposition EQ expression
                    | proposition NEQ expression  '''
         p[0] = _fol_lan.PropositionNodeBinOp(p[2],p[1],p[3]) 
+
+    def p_proposition_connective(self, p):
+        '''proposition : proposition AND proposition   
+                       | proposition OR proposition'''
+        # the left operand of a chain is the chain so far, extend it instead of nesting
+        p[0] = _fol_lan.connect(p[2], [p[1], p[3]])
     def p_proposition_paren(self, p):   
         '''proposition : LPAREN proposition RPAREN'''
         p[0] = _fol_lan.PropositionNodeParen(p[2])
@@ -186,24 +213,108 @@ class FOL_Parser(object):
  
  # Build the parser
     def build(self, **kwargs):
-        self.parser = yacc.yacc(module=self, **kwargs)
+        """ Build the parser from the shipped tables
+
+        The tables are not written, they are only generated in memory if they do not match the grammar.
+        After changing the grammar, regenerate the shipped tables by :func:`write_tables`.
+        """
+        options = dict(tabmodule=_TABLE_MODULE, write_tables=False, debug=False)
+        options.update(kwargs)
+        self._build_options = options
+        self.parser = yacc.yacc(module=self, **options)
+        self._local.parser = self.parser
+        self._local.lexer = self._lexer.lexer
+
+    @property
+    def _ctx(self) -> dict:
+        return getattr(self._local, "ctx", {})
+
+    @_ctx.setter
+    def _ctx(self, ctx: dict) -> None:
+        self._local.ctx = ctx
+
+    def _thread_parser(self) -> tuple[yacc.LRParser, lex.Lexer]:
+        """The PLY parser and lexer of the current thread"""
+        local = self._local
+        parser = getattr(local, "parser", None)
+        if parser is None:
+            if self._build_options is None:
+                raise Exception("The parser is not built")
+            # the tables are shared, only the parsing state is per thread
+            parser = local.parser = yacc.yacc(module=self, **self._build_options)
+            local.lexer = self._lexer.lexer.clone()
+        return parser, local.lexer
 
     def reset(self) -> None:
         self._ctx = {}
 
     def test(self, data):
-        return self.parser.parse(data)
+        parser, lexer = self._thread_parser()
+        return parser.parse(data, lexer=lexer)
     
     def parse(self, data, ctx = None):
+        res = self.parse_cache.get(data)
+        if res is not None:
+            return res
         if ctx is None:
             self._ctx = {}
         else:
             self._ctx = ctx
 
-        res = self.parser.parse(data)
-        self.reset()
+        parser, lexer = self._thread_parser()
+        try:
+            res = parser.parse(data, lexer=lexer)
+        finally:
+            self.reset()
+        self.parse_cache.put(data, res)
         return res
 
+    def parse_many(self, descriptions: Iterable[str], workers: int | None = None, use_processes: bool = False) -> list[_fol_lan.AST_Node]:
+        """ Parse many descriptions concurrently
+
+        The descriptions in parse_cache and the repeated descriptions are parsed once.
+        The threads share the interpreter lock, so the processes are faster for large batches of long descriptions;
+        their trees are sent back by pickling and are shared with the trees built in this process.
+
+        :param Iterable[str] descriptions: the descriptions
+        :param int workers: the number of threads or processes, the default of concurrent.futures if None
+        :param bool use_processes: whether to parse in processes instead of threads
+        :return: the trees of the descriptions, in the same order
+        :rtype: list[AST_Node]
+        """
+        descriptions = list(descriptions)
+        trees = dict()
+        for description in descriptions:
+            if description not in trees:
+                trees[description] = self.parse_cache.get(description)
+        pending = [description for description, tree in trees.items() if tree is None]
+        if pending:
+            if use_processes:
+                workers = workers or os.cpu_count() or 1
+                # a few chunks per process amortize the pickling
+                chunksize = max(1, len(pending) // (4 * workers))
+                with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                    parsed = list(executor.map(_parse_in_process, pending, chunksize=chunksize))
+            else:
+                with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                    parsed = list(executor.map(self.parse, pending))
+            for description, tree in zip(pending, parsed):
+                trees[description] = tree
+                self.parse_cache.put(description, tree)
+        return [trees[description] for description in descriptions]
+
+def _parse_in_process(description: str) -> _fol_lan.AST_Node:
+    return fol_parser.parse(description, None)
+
+def write_tables(outputdir: str | None = None) -> None:
+    """ Generate the LALR tables of the grammar and write them to parsetab.py
+
+    :param str outputdir: the directory of parsetab.py, the directory of this file if None
+    """
+    if outputdir is None:
+        outputdir = os.path.dirname(os.path.abspath(__file__))
+    yacc.yacc(module=FOL_Parser(), tabmodule="parsetab", outputdir=outputdir, write_tables=True, debug=False)
+
 # global parser
 fol_parser = FOL_Parser()
 fol_parser.build()
@@ -217,5 +328,5 @@ if __name__ == "__main__":
     print(ast.get_symbols())
     symbols = ast.get_symbols()
     name_map = {"x": "y", "c_54": "c_64"}
-    _fol_lan.name_remap(name_map, ast)
+    ast = _fol_lan.name_remap(name_map, ast)
     print(ast)
@@ -100,7 +100,16 @@ class ClauseEvaluator(Evaluator):
             return ret
     
     def _evaluate_by_behavior(self, behavior: Stimulus) -> list[Any]:
-        behavior_set = _create_set_from_behavior(sample=behavior.var_val_map, set_type=type(self._clause_set))
+        values = behavior.var_val_map
+        if isinstance(self._clause_set, FOLClauseSet) and all([var in values for var in self._clause_set.vars]):
+            # the behavior determines the objectives, check it by the compiled clause instead of the solver
+            if not self._clause_set.is_contain(values):
+                err_msg = "Cannot evaluate as the objective function does not have solution"
+                LOG.error(err_msg)
+                raise Exception(err_msg)
+            return [values[var] for var in self._obj]
+
+        behavior_set = _create_set_from_behavior(behavior=behavior.var_val_map, set_type=type(self._clause_set))
         sat, sample = self._clause_set.intersect(behavior_set).sample()
         if not sat:
             err_msg = "Cannot evaluate as the objective function does not have solution"
@@ -120,6 +129,11 @@ class ClauseEvaluator(Evaluator):
             LOG.error("Multi-objective undefined!")
             return 
         
+        solver_set = self.objective_set.intersect(behavior_set)
+        if isinstance(solver_set, FOLClauseSet):
+            # stepping with strict bounds may approach a real-valued optimum forever, ask the solver for it instead
+            return [solver_set.optimize(self._obj[0], minimum=minimum)]
+
         sat = True
         max_val = None
         while sat:
@@ -7,12 +7,18 @@
 
     ~contractda.solvers.Z3Interface
     ~contractda.solvers.SolverInterface
+    ~contractda.solvers.QueryCache
+    ~contractda.solvers.SolverSession
 """
 
 from contractda.solvers._z3_interface import Z3Interface
 from contractda.solvers._solver_interface import SolverInterface
+from contractda.solvers._query_cache import QueryCache
+from contractda.solvers._solver_session import SolverSession
 
 __all__ = [
     "Z3Interface",
     "SolverInterface",
+    "QueryCache",
+    "SolverSession",
 ]
\ No newline at end of file
@@ -0,0 +1,74 @@
+""" Caches of the solver queries
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Hashable
+import threading
+
+class LRUCache:
+    """
+    A bounded mapping that evicts the least recently used entry
+
+    The lookups are counted in :attr:`hits` and :attr:`misses`. The cache can be shared by threads.
+
+    :param int maxsize: the maximum number of entries
+    """
+    def __init__(self, maxsize: int = 1 << 16):
+        if maxsize <= 0:
+            raise Exception(f"The size of the cache must be positive, got {maxsize}")
+        self._maxsize = maxsize
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    @property
+    def maxsize(self) -> int:
+        """
+        The maximum number of entries
+        """
+        return self._maxsize
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """ Look up an entry and mark it as the most recently used
+
+        :param Hashable key: the key of the entry
+        :param Any default: the value returned if the key is not in the cache
+        :return: the value of the entry, or default
+        :rtype: Any
+        """
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """ Add or replace an entry, the least recently used entry is evicted if the cache is full
+
+        :param Hashable key: the key of the entry
+        :param Any value: the value of the entry
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """ Remove all entries and reset the statistics
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
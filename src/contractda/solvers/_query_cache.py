@@ -0,0 +1,196 @@
+""" The cache of the satisfiability and validity queries
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import Iterable, Iterator
+import contextvars
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from contractda.solvers._cache import LRUCache
+
+# marks that no cache is chosen for the current context
+_UNSET = object()
+_SCOPED_CACHE = contextvars.ContextVar("query_cache", default=_UNSET)
+
+class QueryCache:
+    """
+    The results of the solver queries, kept across runs
+
+    A query is keyed by a hash of its kind, the canonical strings of its formulas and the sorts of its variables.
+    The results are kept in an in-memory LRU tier and, if path is given, in a SQLite database.
+    The database keeps at most max_disk_entries results and evicts the least recently used ones.
+
+    The cache used by the queries is chosen by :meth:`set_global` or, for a block of code, by :meth:`scope`.
+
+    :param int maxsize: the maximum number of results kept in memory
+    :param str path: the path of the SQLite database, None if the results are only kept in memory
+    :param int max_disk_entries: the maximum number of results kept in the database
+    """
+    _global: QueryCache | None = None
+
+    def __init__(self, maxsize: int = 1 << 16, path: str | None = None, max_disk_entries: int = 1 << 20):
+        if max_disk_entries <= 0:
+            raise Exception(f"The size of the cache must be positive, got {max_disk_entries}")
+        self._memory = LRUCache(maxsize=maxsize)
+        self._path = path
+        self._max_disk_entries = max_disk_entries
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if path is not None:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS queries (key TEXT PRIMARY KEY, result INTEGER NOT NULL, used INTEGER NOT NULL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS queries_used ON queries (used)")
+
+    def __len__(self):
+        return len(self._memory)
+
+    @property
+    def path(self) -> str | None:
+        """
+        The path of the SQLite database, None if the results are only kept in memory
+        """
+        return self._path
+
+    @property
+    def disk_entries(self) -> int:
+        """
+        The number of results in the database
+        """
+        if self._conn is None:
+            return 0
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM queries").fetchone()[0]
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        The numbers of hits, hits in the database and misses
+        """
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses}
+
+    @staticmethod
+    def make_key(kind: str, formulas: Iterable[str], sorts: Iterable[tuple[str, str]]) -> str:
+        """ Generate the key of a query
+
+        :param str kind: the kind of the query, e.g. "sat"
+        :param Iterable[str] formulas: the canonical strings of the formulas in the query
+        :param Iterable[tuple[str, str]] sorts: the ids and the sorts of the variables
+        :return: the hex digest identifying the query
+        :rtype: str
+        """
+        digest = hashlib.sha256()
+        digest.update(kind.encode())
+        for formula in formulas:
+            digest.update(b"\x00" + str(formula).encode())
+        digest.update(b"\x01")
+        for var_id, sort in sorted(set(sorts)):
+            digest.update(f"{var_id}:{sort};".encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> bool | None:
+        """ Look up the result of a query
+
+        :param str key: the key generated by :meth:`make_key`
+        :return: the result, None if the query is not in the cache
+        :rtype: bool | None
+        """
+        result = self._memory.get(key)
+        if result is not None:
+            self.hits += 1
+            return result
+        if self._conn is not None:
+            with self._lock:
+                row = self._conn.execute("SELECT result FROM queries WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._conn.execute("UPDATE queries SET used = ? WHERE key = ?", (time.time_ns(), key))
+            if row is not None:
+                result = bool(row[0])
+                self._memory.put(key, result)
+                self.hits += 1
+                self.disk_hits += 1
+                return result
+        self.misses += 1
+        return None
+
+    def put(self, key: str, result: bool) -> None:
+        """ Store the result of a query
+
+        :param str key: the key generated by :meth:`make_key`
+        :param bool result: the result of the query
+        """
+        result = bool(result)
+        self._memory.put(key, result)
+        if self._conn is None:
+            return
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO queries (key, result, used) VALUES (?, ?, ?)", (key, int(result), time.time_ns()))
+            excess = self._conn.execute("SELECT COUNT(*) FROM queries").fetchone()[0] - self._max_disk_entries
+            if excess > 0:
+                self._conn.execute("DELETE FROM queries WHERE key IN (SELECT key FROM queries ORDER BY used LIMIT ?)", (excess,))
+
+    def clear(self) -> None:
+        """ Remove all results, including the ones in the database, and reset the statistics
+        """
+        self._memory.clear()
+        if self._conn is not None:
+            with self._lock:
+                self._conn.execute("DELETE FROM queries")
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def close(self) -> None:
+        """ Close the database, the results in memory are kept
+        """
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    ######################
+    #   Activation
+    ######################
+    @classmethod
+    def set_global(cls, cache: QueryCache | None) -> QueryCache | None:
+        """ Set the cache used by the queries, None to disable caching
+
+        :param QueryCache|None cache: the cache
+        :return: the previous global cache
+        :rtype: QueryCache | None
+        """
+        previous = cls._global
+        cls._global = cache
+        return previous
+
+    @classmethod
+    def get_active(cls) -> QueryCache | None:
+        """ Get the cache used by the queries in the current context
+
+        :return: the cache chosen by :meth:`scope`, or the global cache outside any scope
+        :rtype: QueryCache | None
+        """
+        cache = _SCOPED_CACHE.get()
+        if cache is _UNSET:
+            return cls._global
+        return cache
+
+    @classmethod
+    @contextmanager
+    def scope(cls, cache: QueryCache | None) -> Iterator[QueryCache | None]:
+        """ Use a cache for the queries in a block of code, None to disable caching in the block
+
+        :param QueryCache|None cache: the cache
+        """
+        token = _SCOPED_CACHE.set(cache)
+        try:
+            yield cache
+        finally:
+            _SCOPED_CACHE.reset(token)
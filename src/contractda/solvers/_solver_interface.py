@@ -80,6 +80,14 @@ class SolverInterface(ABC):
     def quantify_elimination(arg):
         pass
 
+    @abstractmethod
+    def push(self):
+        """Create a backtracking point"""
+
+    @abstractmethod
+    def pop(self, num: int = 1):
+        """Remove the clauses added after the last num backtracking points"""
+
     @abstractmethod
     def add_conjunction_clause(self, *args):
         pass
@@ -0,0 +1,125 @@
+""" A solver shared by many checks
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator
+import hashlib
+
+from contractda.vars._var import Var
+from contractda.solvers._solver_interface import SolverInterface
+from contractda.solvers._z3_interface import Z3Interface
+
+class SolverSession:
+    """
+    A solver instance answering many checks over the same variables
+
+    The variables are declared once and the shared context, e.g., the connection constraints, is asserted once.
+    Each check adds its clauses after a backtracking point and removes them afterwards,
+    so the solver keeps what it learned from the context between the checks.
+
+    :param type[SolverInterface] solver_type: the type of the solver
+    :param Iterable[Var] vars: the variables declared in advance
+    """
+    def __init__(self, solver_type: type[SolverInterface] = Z3Interface, vars: Iterable[Var] = ()):
+        self._solver_type = solver_type
+        self._solver: SolverInterface = solver_type()
+        self._vars_map: dict[str, Any] = dict()
+        self._sorts: dict[str, str] = dict()
+        self._context_digest = hashlib.sha256()
+        self._has_context = False
+        self._depth = 0
+        self.num_checks = 0
+        self.declare(vars)
+
+    @property
+    def solver(self) -> SolverInterface:
+        """
+        The solver instance of the session
+        """
+        return self._solver
+
+    @property
+    def solver_type(self) -> type[SolverInterface]:
+        """
+        The type of the solver
+        """
+        return self._solver_type
+
+    @property
+    def vars_map(self) -> dict[str, Any]:
+        """
+        The solver variables of the declared variables, keyed by the variable id
+        """
+        return self._vars_map
+
+    @property
+    def depth(self) -> int:
+        """
+        The number of open backtracking points
+        """
+        return self._depth
+
+    @property
+    def context_key(self) -> str:
+        """
+        The digest of the asserted context, empty if no context is asserted
+        """
+        if not self._has_context:
+            return ""
+        return self._context_digest.hexdigest()
+
+    def declare(self, vars: Iterable[Var]) -> dict[str, Any]:
+        """ Declare the variables that are not declared yet
+
+        :param Iterable[Var] vars: the variables
+        :return: the solver variables of all declared variables, keyed by the variable id
+        :rtype: dict[str, Any]
+        """
+        for var in vars:
+            sort = self._sorts.get(var.id)
+            if sort is None:
+                self._vars_map[var.id] = self._solver.get_fresh_variable(var.id, sort=var.type_str)
+                self._sorts[var.id] = var.type_str
+            elif sort != var.type_str:
+                raise Exception(f"Variable {var.id} is declared as {sort} in the session, but used as {var.type_str}")
+        return self._vars_map
+
+    def add_context(self, *clauses) -> None:
+        """ Assert the context shared by all the checks of the session
+
+        :param clauses: the solver clauses or the clause sets providing encode, e.g., :class:`~contractda.sets.FOLClauseSet`
+        """
+        if self._depth:
+            raise Exception("The context can only be added outside the checks")
+        for clause in clauses:
+            if hasattr(clause, "encode"):
+                _, clause = clause.encode(solver=self._solver, vars=clause.vars, clause=clause.expr, vars_map=self.declare(clause.vars))
+            self._solver.add_conjunction_clause(clause)
+            self._context_digest.update(str(clause).encode() + b"\x00")
+            self._has_context = True
+
+    @contextmanager
+    def frame(self) -> Iterator[SolverSession]:
+        """ Remove the clauses added in the block when leaving it
+        """
+        self._solver.push()
+        self._depth += 1
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+            self._solver.pop()
+
+    def check(self, *clauses) -> bool:
+        """ Check if the context and the clauses are satisfiable, the clauses are removed afterwards
+
+        The model of a satisfiable check stays available in :attr:`solver` until the next check.
+
+        :param clauses: the solver clauses
+        :return: True if satisfiable, False if not
+        :rtype: bool
+        """
+        self.num_checks += 1
+        with self.frame():
+            self._solver.add_conjunction_clause(*clauses)
+            return self._solver.check()
@@ -6,10 +6,15 @@ from contractda.solvers._solver_interface import SolverInterface
 from contractda.logger._logger import LOG
 
 class Z3Interface(SolverInterface):
+    # the global printing options are set by the first instance
+    _options_set = False
+
     def __init__(self):
         super().__init__()
         self._solver = z3.Solver()
-        z3.set_option(max_args=10000000, max_lines=1000000, max_depth=10000000, max_visited=1000000)
+        if not Z3Interface._options_set:
+            z3.set_option(max_args=10000000, max_lines=1000000, max_depth=10000000, max_visited=1000000)
+            Z3Interface._options_set = True
         self._model = None
 
     @staticmethod
@@ -113,6 +118,14 @@ class Z3Interface(SolverInterface):
     def reset(self):
         self._solver.reset()
 
+    def push(self):
+        """Create a backtracking point, the clauses added after it are removed by pop"""
+        self._solver.push()
+
+    def pop(self, num: int = 1):
+        """Remove the clauses added after the last num backtracking points"""
+        self._solver.pop(num)
+
     def add_conjunction_clause(self, *args):
         self._solver.add(*args)
 
@@ -138,9 +151,29 @@ class Z3Interface(SolverInterface):
             raise Exception("Not knowing what the checking result is")
 
 
+    def optimize(self, clause, term, minimum: bool = False):
+        """Find the optimal value of term subject to clause, None if clause is unsatisfiable"""
+        optimizer = z3.Optimize()
+        optimizer.add(clause)
+        objective = optimizer.minimize(term) if minimum else optimizer.maximize(term)
+        ret = optimizer.check()
+        if ret == z3.unsat:
+            return None
+        elif ret == z3.unknown:
+            raise Exception("Unknonw by Z3")
+        bound = objective.value()
+        if not (z3.is_rational_value(bound) or z3.is_int_value(bound)):
+            LOG.warning(f"The optimum {bound} is not attained, returning the value of the last model")
+        self._model = optimizer.model()
+        return self.get_model_for_var(term)
+
     def set_timeout(self, timeout_millisecond=100000):
         self._solver.set("timeout", timeout_millisecond)
 
+    def get_model_value(self, var):
+        """The value of var in the last model, an arbitrary value is chosen if the model does not constrain var"""
+        return self._model.eval(var, model_completion=True)
+
     def get_model_for_var(self, var):
         if self._var_is_variable(var):
             ref = self._model[var]
@@ -2,7 +2,7 @@ import pytest
 
 from contractda.contracts import AGContract
 from contractda.vars import Var, RealVar
-from contractda.solvers import Z3Interface
+from contractda.solvers import Z3Interface, QueryCache, SolverSession
 
 def test_ag_contract_quotient():
     x = RealVar("x")
@@ -234,4 +234,36 @@ def test_contract_composition():
     c3 = AGContract(vars=[x, y, z], assumption="x != 1", guarantee="y == x / (1 - x)")
 
     c12 = c1.composition(c2)
-    assert(c3.is_refined_by(c12) == True)
\ No newline at end of file
+    assert(c3.is_refined_by(c12) == True)
+def test_ag_contract_query_cache():
+    x = RealVar("x")
+    y = RealVar("y")
+    c1 = AGContract(vars=[x, y], assumption="x >= 0", guarantee="y == 2 * x")
+    c2 = AGContract(vars=[x, y], assumption="x >= 0", guarantee="y == 2 * x && x <= 1")
+    cache = QueryCache()
+    with QueryCache.scope(cache):
+        assert(c1.is_receptive())
+        assert(not c2.is_receptive())
+        assert(c1.is_receptive())
+        assert(cache.stats == {"hits": 1, "disk_hits": 0, "misses": 2})
+        # the same query as the receptiveness of c1
+        assert(c2.is_strongly_replaceable_by(c1))
+        assert(cache.hits == 2)
+
+def test_ag_contract_session():
+    x = RealVar("x")
+    y = RealVar("y")
+    c1 = AGContract(vars=[x, y], assumption="x >= 0", guarantee="y == 2 * x")
+    c2 = AGContract(vars=[x, y], assumption="x >= 0", guarantee="y == 2 * x && x <= 1")
+    session = SolverSession(vars=[x, y])
+    for contract in [c1, c2]:
+        assert(contract.is_receptive(session=session) == contract.is_receptive())
+        assert(contract.is_consistent(session=session) == contract.is_consistent())
+        assert(contract.is_compatible(session=session) == contract.is_compatible())
+    assert(c2.is_strongly_replaceable_by(c1, session=session))
+    assert(c1.is_replaceable_by(c2, session=session))
+    assert(c1.is_refined_by(c1, session=session))
+    assert(session.num_checks > 0)
+    assert(len(session.solver.assertions()) == 0)
+    with pytest.raises(Exception):
+        c1.is_receptive(solver=Z3Interface(), session=session)
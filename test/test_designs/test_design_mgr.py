@@ -1,6 +1,7 @@
 import json
 from contractda.design._system import System
 from contractda.design_api import DesignLevelManager
+from contractda.solvers import QueryCache
 
 def test_design_mgr():
     with open("./example/design_files/simple_design.json", "r") as file:
@@ -39,4 +40,20 @@ def test_system_composition():
     contract1 = example_system._get_composed_system_contract(max_level=0)
     contract2 = example_system._get_single_system_contract()
     assert(contract1[0] == contract2)
-    example_system._get_composed_system_contract()
\ No newline at end of file
+    example_system._get_composed_system_contract()
+def test_design_mgr_query_cache():
+    cache = QueryCache()
+    design_mgr = DesignLevelManager(query_cache=cache)
+    design_mgr.read_design_from_file("./example/design_files/simple_design.json")
+    sys = design_mgr.get_design("test_sys")
+    design_mgr.verify_system_consistensy(system=sys)
+    assert(cache.misses > 0)
+    misses = cache.misses
+    design_mgr.verify_system_consistensy(system=sys)
+    assert(cache.misses == misses)
+    assert(cache.hits >= misses)
+    # caching is disabled for the manager
+    design_mgr.query_cache = False
+    with QueryCache.scope(cache):
+        design_mgr.verify_system_consistensy(system=sys)
+    assert(cache.misses == misses)
@@ -0,0 +1,238 @@
+from contractda.sets._parsers import fol_parser
+from contractda.sets._fol_clause import FOLClause
+import contractda.sets._fol_lan as fol_lan
+from contractda.sets import FOLSimplifier
+import copy
+import pickle
+import numpy as np
+import random
+import pytest
+
+def test_fol_ast_hash_consing():
+    ast1 = fol_parser.parse("x + y <= 5 && x >= 3", None)
+    ast2 = fol_parser.parse("x + y <= 5 && x >= 3", None)
+    # equal trees are the same object
+    assert(ast1 is ast2)
+    assert(hash(ast1) == hash(ast2))
+    assert(fol_parser.parse("x + y <= 5 && x >= 4", None) is not ast1)
+    assert(fol_lan.Constant(1) is not fol_lan.Constant(1.0))
+    assert(fol_lan.Constant(1) is fol_lan.Constant(1))
+    assert(copy.deepcopy(ast1) is ast1)
+    assert(pickle.loads(pickle.dumps(ast1)) is ast1)
+    assert(ast1.get_symbols() == {"x", "y"})
+
+def test_fol_ast_immutable():
+    ast = fol_parser.parse("x >= 3", None)
+    with pytest.raises(AttributeError):
+        ast.op = "<"
+    assert(str(ast.with_op("<")) == "(x<3)")
+    assert(str(ast) == "(x>=3)")
+
+def test_fol_clause_sharing():
+    clause1 = FOLClause("x + y <= 5", None)
+    clause2 = FOLClause("x >= 3", None)
+    root1 = clause1.root
+    combined = copy.copy(clause1).clause_and(clause2)
+    # the operands are shared, not copied
+    assert(combined.root.children[0] is root1)
+    assert(combined.root.children[1] is clause2.root)
+    assert(clause1.root is root1)
+
+    renamed = copy.copy(combined)
+    renamed.rename_symbols({"y": "z"})
+    assert(str(renamed) == "((x+z<=5)&&(x>=3))")
+    assert(renamed.get_symbols() == {"x", "z"})
+    # the subtree without renamed symbols is shared
+    assert(renamed.root.children[1] is clause2.root)
+    assert(str(combined) == "((x+y<=5)&&(x>=3))")
+
+def _simplified(description, **kwargs):
+    return str(FOLSimplifier(**kwargs).simplify(fol_parser.parse(description, None)))
+
+def test_fol_simplify_rewrites():
+    assert(_simplified("!(!(x >= 3))") == "(x>=3)")
+    assert(_simplified("!(!(x >= 3))", nnf=False) == "(x>=3)")
+    assert(_simplified("!(!(x >= 3))", nnf=False, double_negation=False) == "(!(!(x>=3)))")
+    assert(_simplified("true && x >= 3") == "(x>=3)")
+    assert(_simplified("false || (x >= 3 && false)") == "false")
+    assert(_simplified("x >= 1 + 2") == "(x>=3)")
+    assert(_simplified("2 >= 1 -> x >= 3") == "(x>=3)")
+    # the folding is exact, the fractions without a finite decimal are printed as a division
+    assert(_simplified("x >= 0.1 + 0.2") == "(x>=0.3)")
+    assert(_simplified("x >= 1 / 3") == "(x>=(1/3))")
+    assert(_simplified("(x >= 3 && y >= 1) && (x >= 3 && z >= 2)") == "((x>=3)&&(y>=1)&&(z>=2))")
+    assert(_simplified("(x >= 3 && y >= 1) && (x >= 3 && z >= 2)", dedup=False) == "((x>=3)&&(y>=1)&&(x>=3)&&(z>=2))")
+    assert(_simplified("!(x >= 3 && y < 1)") == "((x<3)||(y>=1))")
+    assert(_simplified("!(x >= 3 -> y == 1)") == "((x>=3)&&(y!=1))")
+    assert(_simplified("x * (y + 1) >= 2") == "(x*(y+1)>=2)")
+
+def test_fol_simplify_equivalence():
+    rng = random.Random(0)
+    descriptions = ["!(x >= 3 || !(y < x + 1)) -> (z == 2 && (x >= 3))",
+                    "((x + y) * 2 <= z) || !(!(z != 1) && true)",
+                    "!((x > 1 -> y > 1) && (y > 1 -> x > 1)) || (false -> z < 0)"]
+    simplifier = FOLSimplifier()
+    for description in descriptions:
+        ast = fol_parser.parse(description, None)
+        simplified = simplifier.simplify(ast)
+        for _ in range(50):
+            value_table = {name: rng.choice([0.0, 1.0, 2.0, 3.0]) for name in "xyz"}
+            assert(simplified.evaluate(value_table) == ast.evaluate(value_table))
+    assert(simplifier.stats["calls"] == 3)
+    assert(simplifier.stats["nodes_after"] < simplifier.stats["nodes_before"])
+
+def test_fol_nary_connectives():
+    ast = fol_parser.parse("x >= 1 && y >= 2 && z >= 3 || x <= 0", None)
+    assert(isinstance(ast, fol_lan.PropositionNodeNaryOp))
+    assert(ast.op == "||")
+    assert(len(ast.children[0].children) == 3)
+    assert(str(ast) == "(((x>=1)&&(y>=2)&&(z>=3))||(x<=0))")
+    # the grouping of the user is kept
+    assert(str(fol_parser.parse("x >= 1 && (y >= 2 && z >= 3)", None)) == "((x>=1)&&(((y>=2)&&(z>=3))))")
+    assert(ast.evaluate({"x": 1.0, "y": 2.0, "z": 3.0}))
+    assert(not ast.evaluate({"x": 1.0, "y": 1.0, "z": 3.0}))
+    assert(str(ast.children[0].as_binary()) == "(((x>=1)&&(y>=2))&&(z>=3))")
+    with pytest.raises(Exception):
+        fol_lan.PropositionNodeNaryOp("&&", ast)
+
+def test_fol_clause_long_conjunction():
+    # the conjunction of many clauses stays shallow
+    clause = FOLClause("x0 >= 0", None)
+    for i in range(1, 5000):
+        clause.clause_and(FOLClause(f"x{i} >= {i}", None))
+    root = clause.root
+    assert(isinstance(root, fol_lan.PropositionNodeNaryOp))
+    assert(len(root.children) == 5000)
+    assert(len(root.get_symbols()) == 5000)
+    assert(root.evaluate({f"x{i}": float(i) for i in range(5000)}))
+    assert(str(root).count("&&") == 4999)
+
+def test_fol_deep_formula():
+    # a chain deeper than the recursion limit
+    depth = 20000
+    expr = fol_lan.Symbol("x0")
+    for i in range(1, depth):
+        expr = fol_lan.ExpressionNodeBinOp("+", fol_lan.Symbol(f"x{i % 10}"), expr)
+    root = fol_lan.PropositionNodeBinOp(">=", expr, fol_lan.Constant(0.0))
+    assert(root.get_symbols() == frozenset([f"x{i}" for i in range(10)]))
+    assert(root.evaluate({f"x{i}": 1.0 for i in range(10)}))
+    assert(not root.evaluate({f"x{i}": -1.0 for i in range(10)}))
+    assert(str(root).count("+") == depth - 1)
+    renamed = fol_lan.name_remap({"x0": "y0"}, root)
+    assert(renamed.get_symbols() == frozenset(["y0"] + [f"x{i}" for i in range(1, 10)]))
+    assert(sum(1 for _ in fol_lan.iter_preorder(root)) == 2 * depth + 1)
+    simplified = FOLSimplifier().simplify(fol_lan.PropositionNodeUniOp("!", root))
+    assert(simplified.op == "<")
+
+def test_fol_clause_compile():
+    rng = random.Random(0)
+    descriptions = ["!(x >= 3 || !(y < x + 1)) -> (z == 2 && (x >= 3))",
+                    "((x + y) * 2 <= z) || !(!(z != 1) && true)",
+                    "(0 - 2) ^ 2 == x * x || x / 2 > y - z"]
+    for description in descriptions:
+        clause = FOLClause(description, None)
+        function, symbols = clause.compile()
+        assert(symbols == ("x", "y", "z"))
+        assert(clause.compile()[0] is function)
+        # the clauses with the same tree share the compiled function
+        assert(FOLClause(description, None).compile()[0] is function)
+        for _ in range(50):
+            value_table = {name: rng.choice([-1.0, 1.0, 2.0, 3.0]) for name in "xyz"}
+            assert(bool(clause.evaluate(value_table)) == bool(clause.root.evaluate(value_table)))
+    with pytest.raises(Exception):
+        FOLClause("x >= 1", None).evaluate({"y": 1.0})
+    # the deep trees are interpreted
+    clause = FOLClause(" + ".join(["x"] * 500) + " >= 500", None)
+    assert(clause.evaluate({"x": 1.0}))
+    assert(not clause.evaluate({"x": 0.5}))
+
+def test_fol_evaluate_batch():
+    rng = np.random.default_rng(0)
+    columns = {name: rng.choice([-1.0, 1.0, 2.0, 3.0], size=200) for name in "xyz"}
+    descriptions = ["!(x >= 3 || !(y < x + 1)) -> (z == 2 && (x >= 3))",
+                    "((x + y) * 2 <= z) || !(!(z != 1) && true)",
+                    "(x + y >= z) && (x + y >= 1 || x + y <= 2) && (x + y != 3)"]
+    for description in descriptions:
+        ast = fol_parser.parse(description, None)
+        values = ast.evaluate_batch(columns)
+        for row in range(200):
+            assert(bool(values[row]) == bool(ast.evaluate({name: column[row] for name, column in columns.items()})))
+    with pytest.raises(Exception):
+        fol_parser.parse("w >= 1", None).evaluate_batch(columns)
+
+def test_fol_clause_incremental_symbols():
+    clause = FOLClause("x0 >= 0", None)
+    for i in range(1, 10):
+        clause.clause_and(FOLClause(f"x{i} >= {i}", None))
+    symbols = clause.get_symbols()
+    assert(symbols == frozenset([f"x{i}" for i in range(10)]))
+    # the symbol set is shared if the new operand does not add symbols
+    for i in range(10, 1000):
+        clause.clause_and(FOLClause(f"x{i % 10} <= {i}", None))
+        assert(clause.get_symbols() is symbols)
+    clause.clause_or(FOLClause("y >= 0", None))
+    assert(clause.get_symbols() == symbols | {"y"})
+    clause.clause_not()
+    assert(clause.get_symbols() == symbols | {"y"})
+    assert(clause.root.children[0].get_symbols() is clause.get_symbols())
+
+def test_fol_parse_cache():
+    description = "x >= 1 && (y <= 2 || z == 3)"
+    ast = fol_parser.parse(description, None)
+    hits = fol_parser.parse_cache.hits
+    assert(fol_parser.parse(description, None) is ast)
+    assert(fol_parser.parse_cache.hits == hits + 1)
+    assert(FOLClause(description, None).root is ast)
+    with pytest.raises(Exception):
+        fol_parser.parse("x >= && y", None)
+    assert("x >= && y" not in fol_parser.parse_cache)
+
+def test_fol_parser_tables():
+    # the shipped tables match the grammar, so they are not generated at import
+    from contractda.sets._parsers import _fol_parser, parsetab
+    import ply.yacc as yacc
+    parser = _fol_parser.FOL_Parser()
+    reflect = yacc.ParserReflect({name: getattr(parser, name) for name in dir(parser)})
+    reflect.get_all()
+    assert(reflect.signature() == parsetab._lr_signature)
+
+def _random_description(rng: random.Random, depth: int) -> str:
+    if depth == 0:
+        return f"x{rng.randrange(20)} + {rng.randrange(100)} {rng.choice(['>=', '<', '==', '!='])} y{rng.randrange(20)}"
+    op = rng.choice(["&&", "||", "->"])
+    return f"({_random_description(rng, depth - 1)}) {op} !({_random_description(rng, depth - 1)})"
+
+def test_fol_parser_threads():
+    from concurrent.futures import ThreadPoolExecutor
+    rng = random.Random(0)
+    descriptions = [_random_description(rng, rng.randrange(1, 5)) for _ in range(400)]
+    expected = [str(fol_parser.parse(description, None)) for description in descriptions]
+    # a parser without cache parses every description in the threads
+    parser = fol_parser.__class__(cache_size=1)
+    parser.build()
+    def parse_all(offset: int):
+        order = descriptions[offset:] + descriptions[:offset]
+        return [str(parser.parse(description, None)) for description in order], offset
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        for results, offset in executor.map(parse_all, range(0, 400, 25)):
+            assert(results == expected[offset:] + expected[:offset])
+    # the threads build the same nodes
+    trees = parser.parse_many(descriptions + descriptions, workers=8)
+    assert(trees[:400] == trees[400:])
+    assert(all([tree is fol_parser.parse(description, None) for tree, description in zip(trees, descriptions)]))
+    assert([str(tree) for tree in parser.parse_many(descriptions[:20], workers=2, use_processes=True)] == expected[:20])
+
+def test_fol_exact_constants():
+    from fractions import Fraction
+    constants = lambda description: [node.val for node in fol_lan.iter_preorder(fol_parser.parse(description, None)) if isinstance(node, fol_lan.Constant)]
+    assert(constants("x >= 3 && y <= 2.5 && z == 44e-5") == [3, Fraction(5, 2), Fraction(11, 25000)])
+    assert(type(constants("x >= 3")[0]) is int)
+    # the decimal text is kept, the other fractions are printed as a division
+    assert(str(fol_parser.parse("x >= 3.0 && y <= 0.1 && z == 44e-5", None)) == "((x>=3.0)&&(y<=0.1)&&(z==0.00044))")
+    assert(str(fol_lan.Constant(Fraction(-1, 3))) == "(-1/3)")
+    ast = FOLSimplifier().simplify(fol_parser.parse("x >= 1 / 3 + 0.1", None))
+    assert(fol_parser.parse(str(ast), None).evaluate({"x": 0.5}))
+    assert(FOLSimplifier().simplify(fol_parser.parse(str(ast), None)) is ast)
+    # the evaluation compares the fractions as floats
+    assert(FOLClause("x >= 0.1", None).evaluate({"x": 0.1}))
+    assert(fol_parser.parse("x >= 0.1", None).evaluate_batch({"x": np.array([0.1, 0.0])}).tolist() == [True, False])
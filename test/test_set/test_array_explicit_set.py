@@ -0,0 +1,28 @@
+from contractda.sets import ExplicitSet, ArrayExplicitSet
+from contractda.vars._var import CategoricalVar
+import pytest
+
+@pytest.fixture
+def all_vars():
+    return {
+    "x": CategoricalVar("x", range(0,3)),
+    "y": CategoricalVar("y", range(0,3))
+    }
+
+def test_array_explicit_set_rows(all_vars):
+    x, y = all_vars["x"], all_vars["y"]
+    a_set = ArrayExplicitSet([y, x], [(1, 2), (0, 1), (1, 2)])
+    # rows are deduplicated, sorted and follow the internal variable order
+    assert(a_set.rows.tolist() == [[1, 0], [2, 1]])
+    assert(a_set.value_dicts == [[0, 1, 2], [0, 1, 2]])
+    assert(ArrayExplicitSet.from_explicit_set(ExplicitSet([y, x], [(1, 2), (0, 1)])).is_equivalence(a_set))
+
+def test_array_explicit_set_out_of_domain_values(all_vars):
+    x, y = all_vars["x"], all_vars["y"]
+    a_set = ArrayExplicitSet([x, y], [(0, 1), (2, 3)])
+    b_set = ArrayExplicitSet([x, y], [(2, 3), (5, 5)])
+    assert(a_set.value_dicts[1] == [0, 1, 2, 3])
+    assert(a_set.intersect(b_set).ordered_expr == {(2, 3)})
+    assert(a_set.union(b_set).ordered_expr == {(0, 1), (2, 3), (5, 5)})
+    assert((0, 1) not in a_set.complement().ordered_expr)
+    assert(len(a_set.complement().ordered_expr) == 8)
@@ -0,0 +1,41 @@
+from contractda.sets import ExplicitSet, ArrayExplicitSet, BitmapExplicitSet
+from contractda.vars._var import CategoricalVar, IntVar
+import pytest
+
+@pytest.fixture
+def all_vars():
+    return {
+    "x": CategoricalVar("x", range(0,9)),
+    "y": CategoricalVar("y", range(0,9))
+    }
+
+def test_bitmap_explicit_set_words(all_vars):
+    x, y = all_vars["x"], all_vars["y"]
+    a_set = BitmapExplicitSet([y, x], [(0, 1), (8, 8)])
+    # 81 elements span two words, the index of (x, y) is 9 * x + y
+    assert(len(a_set.words) == 2)
+    assert(int(a_set.words[0]) == 1 << 9)
+    assert(int(a_set.words[1]) == 1 << (80 - 64))
+    assert(BitmapExplicitSet.from_explicit_set(ArrayExplicitSet([y, x], [(0, 1), (8, 8)])).is_equivalence(a_set))
+
+def test_bitmap_explicit_set_complement_tail(all_vars):
+    x, y = all_vars["x"], all_vars["y"]
+    a_set = BitmapExplicitSet([y, x], [(0, 1), (8, 8)])
+    comp = a_set.complement()
+    # the bits beyond the domain stay cleared
+    assert(int(comp.words[1]) >> (81 - 64) == 0)
+    assert(comp.ordered_vars == [y, x])
+    assert(len(comp.ordered_expr) == 79)
+    assert(comp.complement().is_equivalence(a_set))
+    assert(comp.union(a_set).is_equivalence(BitmapExplicitSet([x, y], []).complement()))
+    assert(not comp.intersect(a_set).is_satifiable())
+
+def test_bitmap_explicit_set_domain(all_vars):
+    x, y = all_vars["x"], all_vars["y"]
+    assert(BitmapExplicitSet.supports([x, y]))
+    assert(not BitmapExplicitSet.supports([x, IntVar("i")]))
+    # values outside the domain are rejected, also from the other operand
+    with pytest.raises(Exception):
+        BitmapExplicitSet([x, y], [(1, 9)])
+    with pytest.raises(Exception):
+        BitmapExplicitSet([x, y], [(1, 2)]).union(ExplicitSet([x, y], [(2, 9)]))
@@ -1,6 +1,10 @@
 from contractda.sets import ClauseSet, FOLClauseSet
 from contractda.vars._var import IntVar, BoolVar, RealVar, CategoricalVar
+from contractda.solvers import Z3Interface, QueryCache, SolverSession
+from contractda.solvers._cache import LRUCache
 import itertools
+import numpy as np
+import pytest
 
 def test_fol_clause_set_is_satisfiable():
     x = RealVar("x")
@@ -17,6 +21,19 @@ def test_fol_clause_set_is_satisfiable():
     clause = FOLClauseSet(vars=[x, y, z],expr="(x + y) ^ 2 == 4 && x == 2")
     assert(clause.is_satifiable())
 
+def test_fol_clause_set_exact_constants():
+    x = RealVar("x")
+    i = IntVar("i")
+    encode = lambda clause: clause.encode(solver=Z3Interface(), vars=clause.vars, clause=clause.expr)[1]
+    # the integer constants do not turn the integer terms into reals
+    assert(str(encode(FOLClauseSet(vars=[i],expr="i >= 3.0"))) == "i >= 3")
+    assert(str(encode(FOLClauseSet(vars=[i],expr="i / 2 >= 1"))) == "ToReal(i)/2 >= 1")
+    assert(str(encode(FOLClauseSet(vars=[x],expr="x >= 44e-5"))) == "11/25000 <= x")
+    assert(str(encode(FOLClauseSet(vars=[x],expr="x >= 2 ^ -1"))) == "1/2 <= x")
+    # the division of constants is exact
+    assert(FOLClauseSet(vars=[x],expr="x * 3 == 1 && x == 1 / 3").is_satifiable())
+    assert(not FOLClauseSet(vars=[i],expr="i / 2 >= 1 && i < 2").is_satifiable())
+
 def test_fol_clause_set_is_contain():
     x = RealVar("x")
     y = RealVar("y")
@@ -95,4 +112,184 @@ def test_fol_clause_set_is_disjoint():
     clause1 = FOLClauseSet(vars=[x, y],expr="(x + y >= 6 && y <= 5)")
     clause2 = FOLClauseSet(vars=[x, y],expr="(x < 1)")
     assert(clause1.is_disjoint(clause2) == True)
-    assert(clause2.is_disjoint(clause1) == True)
\ No newline at end of file
+    assert(clause2.is_disjoint(clause1) == True)
+def test_fol_clause_set_enumeration():
+    x = IntVar("x")
+    y = IntVar("y")
+    clause = FOLClauseSet(vars=[x, y],expr="x >= 0 && x <= 2 && y >= x && y <= 2")
+    elems = sorted((elem[x], elem[y]) for elem in clause)
+    assert(elems == [(0, 0), (0, 1), (0, 2), (1, 1), (1, 2), (2, 2)])
+    for x_val, y_val in elems:
+        assert(clause.is_contain({x: x_val, y: y_val}))
+    # projected enumeration produces each value once
+    assert(sorted(elem[x] for elem in clause.get_enumeration(vars=[x])) == [0, 1, 2])
+    assert(list(FOLClauseSet(vars=[x, y],expr="x > x + 1").get_enumeration()) == [])
+
+    # the set is infinite
+    clause = FOLClauseSet(vars=[x],expr="x >= 0")
+    elems = [elem[x] for elem in clause.get_enumeration(limit=5)]
+    assert(len(set(elems)) == 5)
+    assert(all(val >= 0 for val in elems))
+    assert(len(list(clause.get_enumeration(limit=1000000, timeout=0.5))) < 1000000)
+
+def test_fol_clause_set_to_explicit_set():
+    a = BoolVar("a")
+    b = BoolVar("b")
+    x = IntVar("x")
+    clause = FOLClauseSet(vars=[a, b],expr="a != b")
+    eset = clause.to_explicit_set()
+    assert(eset.ordered_vars == [a, b])
+    assert(eset.ordered_expr == {(True, False), (False, True)})
+    assert(clause.to_explicit_set([b]).ordered_expr == {(True,), (False,)})
+    with pytest.raises(Exception):
+        FOLClauseSet(vars=[x],expr="x >= 0").to_explicit_set()
+
+def test_fol_clause_set_encode_cache():
+    x = RealVar("x")
+    y = RealVar("y")
+    clause1 = FOLClauseSet(vars=[x, y],expr="(x + y <= 5 && x - y >= 0)")
+    clause2 = FOLClauseSet(vars=[x, y],expr="x >= 3")
+    solver = Z3Interface()
+    _, encoded1 = clause1.encode(solver=solver, vars=clause1.vars, clause=clause1.expr)
+    hits = FOLClauseSet.encode_cache.hits
+    _, encoded2 = clause1.encode(solver=Z3Interface(), vars=clause1.vars, clause=clause1.expr)
+    # the root is found in the cache
+    assert(encoded2 is encoded1)
+    assert(FOLClauseSet.encode_cache.hits == hits + 1)
+    # the shared conjuncts are reused by the intersection, which is encoded to one flat conjunction
+    both = clause1.intersect(clause2)
+    _, encoded3 = both.encode(solver=solver, vars=both.vars, clause=both.expr)
+    assert(encoded3.num_args() == 3)
+    assert(all([encoded3.arg(i).eq(encoded1.arg(i)) for i in range(2)]))
+    assert(both.is_satifiable())
+    # the sorts are part of the key
+    xi = IntVar("x")
+    clause3 = FOLClauseSet(vars=[xi],expr="x >= 3")
+    _, encoded4 = clause3.encode(solver=solver, vars=clause3.vars, clause=clause3.expr)
+    assert(not encoded4.eq(clause2.encode(solver=solver, vars=clause2.vars, clause=clause2.expr)[1]))
+
+def test_fol_clause_set_exact_constants():
+    x = RealVar("x")
+    i = IntVar("i")
+    encode = lambda clause: clause.encode(solver=Z3Interface(), vars=clause.vars, clause=clause.expr)[1]
+    # the integer constants do not turn the integer terms into reals
+    assert(str(encode(FOLClauseSet(vars=[i],expr="i >= 3.0"))) == "i >= 3")
+    assert(str(encode(FOLClauseSet(vars=[i],expr="i / 2 >= 1"))) == "ToReal(i)/2 >= 1")
+    assert(str(encode(FOLClauseSet(vars=[x],expr="x >= 44e-5"))) == "11/25000 <= x")
+    assert(str(encode(FOLClauseSet(vars=[x],expr="x >= 2 ^ -1"))) == "1/2 <= x")
+    # the division of constants is exact
+    assert(FOLClauseSet(vars=[x],expr="x * 3 == 1 && x == 1 / 3").is_satifiable())
+    assert(not FOLClauseSet(vars=[i],expr="i / 2 >= 1 && i < 2").is_satifiable())
+
+def test_fol_clause_set_is_contain():
+    x = RealVar("x")
+    y = RealVar("y")
+    clause = FOLClauseSet(vars=[x, y],expr="x + y <= 5 && !(x - y < 0)")
+    assert(clause.is_contain({"x": 3.0, "y": 1.0}))
+    assert(clause.is_contain({x: 3.0, y: 1.0}))
+    assert(not clause.is_contain({x: 1.0, y: 3.0}))
+    assert(not clause.is_contain({x: 4.0, y: 3.0}))
+    assert(FOLClauseSet(vars=[],expr="true").is_contain({}))
+
+def test_fol_clause_set_contains_batch():
+    x = RealVar("x")
+    y = RealVar("y")
+    clause = FOLClauseSet(vars=[x, y],expr="(x + y <= 5 && !(x - y < 0)) -> (y * y >= 2 || x / y > 2)")
+    rng = np.random.default_rng(0)
+    xs, ys = rng.uniform(-5, 5, 1000), rng.uniform(-5, 5, 1000)
+    expected = np.array([clause.is_contain({x: a, y: b}) for a, b in zip(xs, ys)])
+    assert(not expected.all() and expected.any())
+    assert((clause.contains_batch({x: xs, "y": ys}, chunk_size=77) == expected).all())
+    chunks = [{x: xs[:300], y: ys[:300]}, {x: xs[300:], y: ys[300:]}]
+    assert((np.concatenate(list(clause.contains_chunks(chunks))) == expected).all())
+    # the constant clauses are broadcast to the rows
+    assert(FOLClauseSet(vars=[x],expr="x >= 1 || true").contains_batch({x: xs}).all())
+    with pytest.raises(Exception):
+        clause.contains_batch({x: xs})
+    with pytest.raises(Exception):
+        clause.contains_batch({x: xs, y: ys[:10]})
+
+def test_fol_clause_set_optimize():
+    x = RealVar("x")
+    y = RealVar("y")
+    clause = FOLClauseSet(vars=[x, y],expr="(x + y <= 5 && x - y >= 0 && y >= 1)")
+    assert(clause.optimize(x) == 4)
+    assert(clause.optimize(x, minimum=True) == 1)
+    assert(FOLClauseSet(vars=[x],expr="x >= 3 && x <= 2").optimize(x) is None)
+
+def test_lru_cache():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert(cache.get("a") == 1)
+    # b is the least recently used
+    cache.put("c", 3)
+    assert("b" not in cache)
+    assert(cache.get("b", 0) == 0)
+    assert(cache.get("a") == 1 and cache.get("c") == 3)
+    assert((cache.hits, cache.misses) == (3, 1))
+    assert(len(cache) == 2)
+    cache.clear()
+    assert(len(cache) == 0 and cache.hits == 0)
+
+def test_query_cache(tmp_path):
+    x = RealVar("x")
+    y = RealVar("y")
+    path = str(tmp_path / "queries.sqlite")
+    cache = QueryCache(path=path, max_disk_entries=2)
+    clause1 = FOLClauseSet(vars=[x, y],expr="(x + y <= 5 && x - y >= 0)")
+    clause2 = FOLClauseSet(vars=[x, y],expr="x >= 3")
+    with QueryCache.scope(cache):
+        assert(clause2.is_subset(clause1) == False)
+        assert(cache.stats == {"hits": 0, "disk_hits": 0, "misses": 1})
+        assert(clause2.is_subset(clause1) == False)
+        assert(cache.hits == 1)
+        assert(clause1.is_satifiable())
+    assert(QueryCache.get_active() is None)
+    assert(cache.disk_entries == 2)
+    cache.close()
+
+    # the results are kept across runs
+    reopened = QueryCache(path=path, max_disk_entries=2)
+    with QueryCache.scope(reopened):
+        assert(clause1.is_satifiable())
+        assert(reopened.disk_hits == 1)
+        # the least recently used result is evicted
+        assert(FOLClauseSet(vars=[x],expr="x >= 3 && x <= 2").is_satifiable() == False)
+        assert(reopened.disk_entries == 2)
+        assert(clause2.is_subset(clause1) == False)
+        assert(reopened.disk_hits == 1)
+    # the sorts are part of the key
+    assert(QueryCache.make_key("sat", ["x >= 3"], [("x", "REAL")]) != QueryCache.make_key("sat", ["x >= 3"], [("x", "INTEGER")]))
+    reopened.close()
+
+def test_solver_session():
+    x = RealVar("x")
+    y = RealVar("y")
+    session = SolverSession(vars=[x])
+    clause1 = FOLClauseSet(vars=[x, y],expr="(x + y <= 5 && x - y >= 0)")
+    clause2 = FOLClauseSet(vars=[x, y],expr="x >= 3")
+    assert(clause2.is_subset(clause1, session=session) == clause2.is_subset(clause1))
+    assert(clause1.is_satifiable(session=session))
+    assert(clause1.is_disjoint(clause2, session=session) == False)
+    assert(clause1.is_equivalence(clause1, session=session))
+    # the checks do not leave clauses behind
+    assert(session.depth == 0)
+    assert(len(session.solver.assertions()) == 0)
+    assert(session.num_checks == 4)
+    # the shared context is asserted once for all checks
+    session.add_context(FOLClauseSet(vars=[y],expr="y >= 10"))
+    assert(not clause1.is_satifiable(session=session))
+    assert(clause2.is_satifiable(session=session))
+    assert(len(session.solver.assertions()) == 1)
+    with pytest.raises(Exception):
+        session.declare([IntVar("x")])
+    with pytest.raises(Exception):
+        with session.frame():
+            session.add_context(clause2)
+    # the context is part of the cached query
+    cache = QueryCache()
+    with QueryCache.scope(cache):
+        assert(not clause1.is_satifiable(session=session))
+        assert(clause1.is_satifiable())
+    assert(cache.misses == 2)
@@ -335,6 +335,202 @@ def test_explicit_set_is_equivalence():
     assert(e_set.is_equivalence(f_set) == False)
     assert(f_set.is_equivalence(e_set) == False)    
 
+def test_complement_keeps_var_order():
+    x = CategoricalVar("x", range(1,3))
+    y = CategoricalVar("y", range(1,4))
+
+    a_set = ExplicitSet([y, x], [(1, 2), (3, 1)])
+    comp = a_set.complement()
+    # the complement follows the variable order of the set, not the internal order
+    assert(comp.ordered_vars == [y, x])
+    assert(comp.ordered_expr == {(1, 1), (2, 1), (2, 2), (3, 2)})
+    assert(comp.union(a_set).ordered_vars == [y, x])
+
+
+def _extended(eset, new_vars):
+    # reference semantics: extend the elements to the union of the variables by enumerating the domains
+    import itertools
+    added_vars = [var for var in new_vars if var not in eset.ordered_vars]
+    ret = set()
+    for elem in eset.ordered_expr:
+        for extend_elem in itertools.product(*[var.value_range for var in added_vars]):
+            values = dict(zip(eset.ordered_vars + added_vars, elem + extend_elem))
+            ret.add(tuple([values[var] for var in new_vars]))
+    return ret
+
+@pytest.mark.parametrize("seed", range(5))
+def test_join_matches_extension(seed):
+    import random
+    rng = random.Random(seed)
+    x = CategoricalVar("x", range(1,4))
+    y = CategoricalVar("y", range(1,3))
+    z = CategoricalVar("z", range(1,4))
+    w = CategoricalVar("w", range(1,3))
+    all_vars = [w, x, y, z]
+    # values outside the domain (0) are allowed in the elements
+    a_expr = {(rng.randrange(0, 4), rng.randrange(1, 3), rng.randrange(0, 3)) for _ in range(8)}
+    b_expr = {(rng.randrange(1, 3), rng.randrange(0, 4), rng.randrange(1, 3)) for _ in range(8)}
+    a_set = ExplicitSet([x, y, w], list(a_expr))
+    b_set = ExplicitSet([y, z, w], list(b_expr))
+    ext_a = _extended(a_set, all_vars)
+    ext_b = _extended(b_set, all_vars)
+
+    inter = a_set.intersect(b_set)
+    assert(inter.ordered_vars == [x, y, w, z])
+    assert(set(inter.project(all_vars).ordered_expr) == ext_a & ext_b)
+    diff = a_set.difference(b_set)
+    assert(diff.ordered_vars == [x, y, w, z])
+    assert(set(diff.project(all_vars).ordered_expr) == ext_a - ext_b)
+    assert(a_set.is_subset(b_set) == (ext_a <= ext_b))
+    assert(a_set.is_disjoint(b_set) == ext_a.isdisjoint(ext_b))
+    assert(a_set.is_equivalence(b_set) == (ext_a == ext_b))
+
+    c_set = inter.project([x, y, z, w])
+    assert(c_set.is_subset(a_set))
+    assert(c_set.is_subset(b_set))
+    assert(c_set.is_proper_subset(b_set) == (_extended(c_set, all_vars) < ext_b))
+
+def test_join_subset_full_extension():
+    x = CategoricalVar("x", range(1,3))
+    y = CategoricalVar("y", range(1,4))
+
+    a_set = ExplicitSet([x], [(1,)])
+    b_set = ExplicitSet([x, y], [(1, 1), (1, 2), (1, 3), (2, 1)])
+    assert(a_set.is_subset(b_set))
+    assert(a_set.is_proper_subset(b_set))
+    assert(not b_set.is_subset(a_set))
+    assert(a_set.intersect(b_set).ordered_expr == {(1, 1), (1, 2), (1, 3)})
+    assert(b_set.difference(a_set).ordered_expr == {(2, 1)})
+
+
+def test_extension_keeps_cubes():
+    x = CategoricalVar("x", range(1,4))
+    y = CategoricalVar("y", range(1,100))
+    z = CategoricalVar("z", range(1,100))
+    any_val = ExplicitSet.ANY
+
+    a_set = ExplicitSet([x], [(1,), (2,)])
+    ext = a_set.project([x, y, z])
+    # one cube per element instead of one element per value of the domain
+    assert(len(list(ext._iter_rows())) == 2)
+    assert(ext.is_contain((1, 50, 3)))
+    assert(not ext.is_contain((3, 50, 3)))
+    assert(len(ext.ordered_expr) == 2 * 99 * 99)
+
+    comp = ext.complement()
+    assert(list(comp._iter_rows()) == [(3, any_val, any_val)])
+    assert(comp.is_disjoint(ext))
+    assert(comp.union(ext).is_equivalence(ExplicitSet([x], []).complement()))
+
+    # union drops the elements covered by a cube
+    b_set = ExplicitSet([x, y], [(1, 5), (3, 5), (1, any_val)])
+    union = b_set.union(ExplicitSet([x, y], [(3, any_val)]))
+    assert(set(union._iter_rows()) == {(1, any_val), (3, any_val)})
+
+def _random_cube_set(rng, vars):
+    any_val = ExplicitSet.ANY
+    expr = set()
+    for _ in range(rng.randrange(0, 6)):
+        # 0 is outside the domain
+        expr.add(tuple([any_val if rng.random() < 0.4 else rng.randrange(0, 4) for _ in vars]))
+    return ExplicitSet(vars, list(expr))
+
+@pytest.mark.parametrize("seed", range(10))
+def test_cube_operations_match_expansion(seed):
+    import random
+    rng = random.Random(seed)
+    x = CategoricalVar("x", range(1,4))
+    y = CategoricalVar("y", range(1,3))
+    z = CategoricalVar("z", range(1,4))
+    a_set = _random_cube_set(rng, [x, y])
+    b_set = _random_cube_set(rng, [y, z])
+    all_vars = [x, y, z]
+    ext_a = _extended(a_set, all_vars)
+    ext_b = _extended(b_set, all_vars)
+
+    golds = {"union": ext_a | ext_b, "intersect": ext_a & ext_b, "difference": ext_a - ext_b}
+    for op, gold in golds.items():
+        result = getattr(a_set, op)(b_set)
+        assert(result.ordered_vars == [x, y, z])
+        assert(result.ordered_expr == gold)
+    assert(a_set.is_subset(b_set) == (ext_a <= ext_b))
+    assert(a_set.is_proper_subset(b_set) == (ext_a < ext_b))
+    assert(a_set.is_equivalence(b_set) == (ext_a == ext_b))
+    assert(a_set.is_disjoint(b_set) == ext_a.isdisjoint(ext_b))
+    a_plain = ExplicitSet([x, y], list(a_set.ordered_expr))
+    assert(a_set.complement().ordered_expr == a_plain.complement().ordered_expr)
+    for is_refine in [False, True]:
+        assert(a_set.project([x], is_refine=is_refine).ordered_expr == a_plain.project([x], is_refine=is_refine).ordered_expr)
+
+
+def test_from_internal_matches_constructor():
+    x = CategoricalVar("x", range(1,4))
+    y = CategoricalVar("y", range(1,3))
+    z = CategoricalVar("z", range(1,4))
+    any_val = ExplicitSet.ANY
+    expr = [(1, 2, 3), (2, 1, 1), (3, any_val, 2)]
+
+    gold = ExplicitSet([z, x, y], expr)
+    trusted = ExplicitSet._from_internal([z, x, y], expr)
+    assert(trusted.internal_vars == gold.internal_vars)
+    assert(trusted.ordered_vars == [z, x, y])
+    assert(trusted.ordered_expr == gold.ordered_expr)
+    assert(set(trusted) == gold.ordered_expr)
+    assert(trusted.is_contain((3, 1, 2)))
+    trusted.reorder_vars([y, z, x])
+    assert(trusted.ordered_expr == {(3, 1, 2), (1, 2, 1), (2, 3, 1), (2, 3, 2), (2, 3, 3)})
+
+
+def test_select():
+    x = CategoricalVar("x", range(1,4))
+    y = CategoricalVar("y", range(1,4))
+    z = CategoricalVar("z", range(1,4))
+    any_val = ExplicitSet.ANY
+
+    a_set = ExplicitSet([z, x, y], [(1, 2, 3), (2, 2, 1), (1, 3, 3), (3, 2, 3), (2, any_val, 2)])
+    selected = a_set.select({x: 2, y: 3})
+    assert(selected.ordered_vars == [z, x, y])
+    assert(selected.ordered_expr == {(1, 2, 3), (3, 2, 3)})
+    # the same variables reuse the index
+    index = a_set._indexes[(0, 1)]
+    assert(a_set.select({y: 1, x: 2}).ordered_expr == {(2, 2, 1)})
+    assert(a_set._indexes[(0, 1)] is index)
+    # cubes are specialized to the assignment
+    assert(a_set.select({x: 1}).ordered_expr == {(2, 1, 2)})
+    assert(a_set.select({y: 2}).ordered_expr == {(2, 1, 2), (2, 2, 2), (2, 3, 2)})
+    assert(a_set.select({x: 1, z: 3}).ordered_expr == set())
+    assert(a_set.select({}).ordered_expr == a_set.ordered_expr)
+
+    # same as the intersection with the element
+    gold = a_set.intersect(ExplicitSet([x, z], [(3, 1)]))
+    assert(a_set.select({x: 3, z: 1}).is_equivalence(gold))
+
+    w = CategoricalVar("w", range(1,4))
+    with pytest.raises(Exception):
+        a_set.select({w: 1})
+
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_refine_many_variables(num_workers):
+    import itertools
+    import random
+    rng = random.Random(0)
+    x = CategoricalVar("x", range(1,4))
+    y = CategoricalVar("y", range(1,3))
+    z = CategoricalVar("z", range(1,3))
+    w = CategoricalVar("w", range(1,4))
+    # x = 1 and x = 2 cover the domain of (y, z, w), with a value outside the domain for x = 2
+    expr = [(1, b, c, d) for b, c, d in itertools.product(y.value_range, z.value_range, w.value_range)]
+    expr += [(2, b, c, d) for b, c, d in itertools.product(y.value_range, z.value_range, w.value_range)] + [(2, 1, 1, 0)]
+    expr += [(3, rng.randrange(1, 3), rng.randrange(1, 3), rng.randrange(1, 4)) for _ in range(6)]
+    a_set = ExplicitSet([x, y, z, w], expr)
+    assert(a_set.project([x], is_refine=True, num_workers=num_workers).ordered_expr == {(1,), (2,)})
+
+    # a cube covers the domain of its don't care columns
+    b_set = ExplicitSet([x, y, z], [(3, ExplicitSet.ANY, ExplicitSet.ANY), (1, 1, 1)])
+    assert(b_set.project([x], is_refine=True, num_workers=num_workers).ordered_expr == {(3,)})
+    assert(b_set.project([x, y], is_refine=True, num_workers=num_workers).ordered_expr == {(3, 1), (3, 2)})
+
 
 if __name__ == "__main__":
     test_explicit_set()
@@ -0,0 +1,196 @@
+from contractda.sets import ExplicitSet, ArrayExplicitSet, BitmapExplicitSet, MappedExplicitSet, MDDSet, MDDManager, set_default_mdd_manager
+from contractda.contracts import AGContract
+from contractda.vars._var import CategoricalVar, BoolVar
+import itertools
+import random
+import pytest
+
+@pytest.fixture(params=[ExplicitSet, ArrayExplicitSet, BitmapExplicitSet, MappedExplicitSet, MDDSet])
+def set_type(request):
+    # a fresh manager keeps the diagrams of a test independent of the other tests
+    previous = set_default_mdd_manager(MDDManager())
+    yield request.param
+    set_default_mdd_manager(previous)
+
+@pytest.fixture
+def all_vars():
+    return {
+    "a": CategoricalVar("a", range(1,3)),
+    "b": CategoricalVar("b", range(1,3)),
+    "c": CategoricalVar("c", range(1,3)),
+    "d": CategoricalVar("d", range(1,5)),
+    "e": CategoricalVar("e", range(1,4)),
+    "x": CategoricalVar("x", range(1,5)),
+    "y": CategoricalVar("y", range(1,5)),
+    "z": CategoricalVar("z", range(1,4))
+    }
+
+######## Test basic data
+
+@pytest.fixture
+def basic_expr():
+    return [(1, 2, 3), (2, 3, 1), (1, 3, 2), (1, 2, 3)]
+
+@pytest.fixture
+def basic_var_list(all_vars):
+    return [all_vars["z"], all_vars["x"], all_vars["y"]]
+
+def test_backend_basic(set_type, basic_var_list, basic_expr):
+    a_set = set_type(basic_var_list, basic_expr)
+    assert(a_set.ordered_vars == basic_var_list)
+    assert([var.id for var in a_set.internal_vars] == ["x", "y", "z"])
+    assert(a_set.ordered_expr == set(basic_expr))
+    assert(set(e for e in a_set) == set(basic_expr))
+    assert(len(a_set.get_enumeration()) == 3)
+    assert(a_set.is_contain((1, 2, 3)))
+    assert(not a_set.is_contain((3, 2, 1)))
+    assert(not a_set.is_contain((7, 2, 1)))
+    assert(a_set._convert_elem_to_external(a_set.sample()) in basic_expr)
+
+############### Test Operations
+
+@pytest.fixture
+def expr_a():
+    return [(1, 2), (2, 1), (3, 3), (3, 4)]
+
+@pytest.fixture
+def expr_b():
+    return [(2, 2), (1, 2), (3, 4)]
+
+@pytest.fixture
+def expr_c():
+    return [(2, 3), (1, 2)]
+
+@pytest.mark.parametrize("other_type", [ExplicitSet, ArrayExplicitSet, BitmapExplicitSet])
+def test_backend_operations(set_type, other_type, all_vars, expr_a, expr_b, expr_c):
+    x, y, z = all_vars["x"], all_vars["y"], all_vars["z"]
+    a_set = set_type([y, x], expr_a)
+    b_set = other_type([x, y], expr_b)
+    c_set = other_type([y, z], expr_c)
+    ret_set = a_set.difference(b_set)
+    assert(isinstance(ret_set, set_type))
+    assert(ret_set.ordered_expr == set([(1, 2), (3, 3), (3, 4)]))
+    assert(ret_set.ordered_vars == [y, x])
+
+    ret_set = a_set.union(b_set)
+    assert(ret_set.ordered_expr == set([(1, 2), (2, 1), (3, 4), (4, 3), (3, 3), (2, 2)]))
+
+    ret_set = a_set.intersect(c_set)
+    assert(ret_set.ordered_expr == set([(1, 2, 2), (2, 1, 3)]))
+    assert(ret_set.ordered_vars == [y, x, z])
+
+    ret_set = a_set.difference(c_set)
+    gold = set([(1, 2, 1), (2, 1, 1), (3, 3, 1), (3, 4, 3), (1, 2, 3), (3, 3, 3), (3, 4, 2), (2, 1, 2), (3, 4, 1), (3, 3, 2)])
+    assert(ret_set.ordered_expr == gold)
+
+def test_backend_project(set_type, all_vars):
+    a, b, c, d, e = [all_vars[name] for name in "abcde"]
+    test_set = set_type([b, a, c], [(1, 2, 1), (1, 2, 2), (1, 1, 1)])
+    test1 = test_set.project([a, b], is_refine=False)
+    test2 = test_set.project([b, a], is_refine=True)
+    test3 = test_set.project([a, b, d, e], is_refine=False)
+    test4 = test_set.project([a, b, e, d], is_refine=True)
+
+    assert(test1.ordered_expr == {(2, 1), (1, 1)})
+    assert(test2.ordered_expr == {(1, 2)})
+    assert(test3.ordered_expr == set(itertools.product([2, 1], [1], range(1, 5), range(1, 4))))
+    assert(test4.ordered_expr == set(itertools.product([2], [1], range(1, 4), range(1, 5))))
+
+def test_backend_relations(set_type, all_vars):
+    x, y = all_vars["x"], all_vars["y"]
+    a_set = set_type([x, y], [(1, 2), (2, 1), (3, 3), (3, 4)])
+    b_set = set_type([x, y], [(2, 1), (1, 2), (3, 4)])
+    d_set = ExplicitSet([y, x], [(2, 1), (1, 2), (4, 3), (3, 3)])
+    f_set = set_type([x], [tuple([1])])
+    g_set = set_type([x, y], [(4, 1), (2, 4)])
+    empty_set = set_type([x, y], [])
+
+    assert(b_set.is_subset(a_set) and not a_set.is_subset(b_set))
+    assert(b_set.is_proper_subset(a_set) and not a_set.is_proper_subset(d_set))
+    assert(a_set.is_equivalence(d_set))
+    assert(not a_set.is_equivalence(b_set))
+    assert(not f_set.is_subset(a_set))
+    assert(a_set.is_disjoint(g_set) and not a_set.is_disjoint(f_set))
+    assert(a_set.is_satifiable() and not empty_set.is_satifiable())
+    assert(empty_set.complement().is_equivalence(ExplicitSet([x, y], list(itertools.product(range(1, 5), range(1, 5))))))
+
+def test_backend_random_against_explicit_set(set_type):
+    random.seed(1)
+    all_vars = [CategoricalVar("v", range(3)), BoolVar("w"), CategoricalVar("x", ["a", "b", "c"]), CategoricalVar("y", range(4))]
+    for _ in range(30):
+        vars_a = random.sample(all_vars, random.randint(1, 3))
+        vars_b = random.sample(all_vars, random.randint(1, 3))
+        expr_a = [tuple(random.choice(list(var.value_range)) for var in vars_a) for _ in range(random.randint(0, 10))]
+        expr_b = [tuple(random.choice(list(var.value_range)) for var in vars_b) for _ in range(random.randint(0, 10))]
+        gold_a, gold_b = ExplicitSet(vars_a, expr_a), ExplicitSet(vars_b, expr_b)
+        set_a, set_b = set_type(vars_a, expr_a), set_type(vars_b, expr_b)
+        for op in ["union", "intersect", "difference"]:
+            gold = getattr(gold_a, op)(gold_b)
+            ret = getattr(set_a, op)(set_b)
+            assert(ret.ordered_vars == gold.ordered_vars)
+            assert(ret.ordered_expr == gold.ordered_expr)
+        for op in ["is_subset", "is_proper_subset", "is_equivalence", "is_disjoint"]:
+            assert(getattr(set_a, op)(set_b) == getattr(gold_a, op)(gold_b))
+        assert(set_a.complement().ordered_expr == gold_a.complement().ordered_expr)
+        target = random.sample(all_vars, random.randint(1, 4))
+        for is_refine in [True, False]:
+            assert(set_a.project(target, is_refine=is_refine).ordered_expr == gold_a.project(target, is_refine=is_refine).ordered_expr)
+
+############### Test Contracts
+
+def test_backend_contract(set_type):
+    x = CategoricalVar("x", range(0,3))
+    y = CategoricalVar("y", range(0,3))
+    z = CategoricalVar("z", range(0,3))
+
+    c1 = AGContract(vars=[x],
+                    assumption=set_type([x], [tuple([0])]),
+                    guarantee=set_type([x, y, z], [(0, 1, 2), (0, 0, 1)]))
+    c2 = AGContract(vars=[x],
+                    assumption=set_type([x], [tuple([0]), tuple([1])]),
+                    guarantee=set_type([x, y, z], [(0, 1, 2), (1, 2, 1), (2, 2, 1)]))
+    c4 = AGContract(vars=[x],
+                    assumption=set_type([x], [tuple([0]), tuple([1])]),
+                    guarantee=set_type([x, y, z], [(1, 2, 1)]))
+    assert(c1.is_replaceable_by(c2))
+    assert(not c1.is_replaceable_by(c4))
+    assert(c1.is_strongly_replaceable_by(c2))
+    assert(not c2.is_strongly_replaceable_by(c4))
+    assert(c2.is_receptive() and not c4.is_receptive())
+    assert(c1.is_compatible() and c1.is_consistent())
+    composed = c1.composition(c2)
+    assert(isinstance(composed.guarantee, set_type))
+    gold = AGContract(vars=[x], assumption=ExplicitSet([x], [tuple([0])]), guarantee=ExplicitSet([x, y, z], [(0, 1, 2), (0, 0, 1)])).composition(
+           AGContract(vars=[x], assumption=ExplicitSet([x], [tuple([0]), tuple([1])]), guarantee=ExplicitSet([x, y, z], [(0, 1, 2), (1, 2, 1), (2, 2, 1)])))
+    assert(composed.guarantee.is_equivalence(gold.guarantee))
+    assert(composed.assumption.is_equivalence(gold.assumption))
+
+############### Test Sampling
+
+@pytest.mark.parametrize("explicit_type", [ExplicitSet, ArrayExplicitSet, BitmapExplicitSet, MappedExplicitSet])
+def test_backend_sampling(explicit_type, basic_var_list, basic_expr, all_vars):
+    a_set = explicit_type(basic_var_list, basic_expr)
+    assert(a_set.cardinality() == 3)
+    assert(len(a_set) == 3)
+    assert(a_set.len() == 3)
+    assert(len(explicit_type(basic_var_list, [])) == 0)
+
+    samples = a_set.sample_many(200, seed=1)
+    assert(len(samples) == 200)
+    assert(set(samples) == set(basic_expr))
+    assert(a_set.sample_many(200, seed=1) == samples)
+    assert(sorted(a_set.sample_many(3, seed=2, replace=False)) == sorted(set(basic_expr)))
+    # the global random state is not used
+    random.seed(5)
+    state = random.getstate()
+    a_set.sample()
+    assert(random.getstate() == state)
+
+    # (z, x, y) = (1, 2, 3), (1, 3, 2) share z = 1
+    strata = a_set.sample_stratified(all_vars["z"], 10, seed=0)
+    assert(list(strata.keys()) == [1, 2])
+    assert(set(strata[1]) == {(1, 2, 3), (1, 3, 2)})
+    assert(strata[2] == [(2, 3, 1)] * 10)
+    assert(a_set.sample_stratified(all_vars["z"], 5, seed=0, replace=False)[2] == [(2, 3, 1)])
+    with pytest.raises(Exception):
+        a_set.sample_stratified(all_vars["a"], 1)
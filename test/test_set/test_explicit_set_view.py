@@ -0,0 +1,67 @@
+from contractda.sets import ExplicitSet, ArrayExplicitSet, ExplicitSetView, ExplicitSetDictView
+from contractda.vars._var import CategoricalVar
+import pytest
+
+@pytest.fixture
+def all_vars():
+    return {
+    "x": CategoricalVar("x", range(1,4)),
+    "y": CategoricalVar("y", range(1,4)),
+    "z": CategoricalVar("z", range(1,4))
+    }
+
+@pytest.fixture
+def basic_expr():
+    return [(1, 2, 3), (2, 2, 1), (1, 3, 3), (3, 1, 2)]
+
+@pytest.fixture(params=[ExplicitSet, ArrayExplicitSet])
+def basic_set(request, all_vars, basic_expr):
+    return request.param([all_vars["z"], all_vars["x"], all_vars["y"]], basic_expr)
+
+def test_view_ordered(basic_set, basic_expr):
+    view = basic_set.view()
+    assert(isinstance(view, ExplicitSetView))
+    assert(view.vars == basic_set.ordered_vars)
+    assert(view.materialize() == basic_set.ordered_expr)
+    assert(sorted(view) == sorted(basic_expr))
+    assert(len(view) == len(basic_expr))
+    assert((1, 3, 3) in view)
+    assert((3, 3, 3) not in view)
+
+def test_view_reordered(basic_set, all_vars):
+    x, y, z = all_vars["x"], all_vars["y"], all_vars["z"]
+    view = basic_set.view([x, y, z])
+    assert(view.materialize() == {(2, 3, 1), (2, 1, 2), (3, 3, 1), (1, 2, 3)})
+    assert((2, 1, 2) in view)
+    # the view does not change the set
+    assert(basic_set.ordered_vars == [z, x, y])
+
+def test_view_projection(basic_set, all_vars):
+    z = all_vars["z"]
+    view = basic_set.view([z])
+    elems = list(view)
+    # each value shows up once
+    assert(sorted(elems) == [(1,), (2,), (3,)])
+    assert(view.materialize() == basic_set.project([z]).ordered_expr)
+    assert((3,) in view)
+
+def test_dict_view(basic_set, all_vars):
+    x, y, z = all_vars["x"], all_vars["y"], all_vars["z"]
+    view = basic_set.dict_view()
+    assert(isinstance(view, ExplicitSetDictView))
+    rows = view.materialize()
+    assert(len(rows) == 4)
+    assert({z: 1, x: 2, y: 3} in rows)
+    assert({z: 1, x: 2, y: 3} in view)
+    assert(sorted(tuple(row.items()) for row in basic_set.dict_view([x])) == [((x, 1),), ((x, 2),), ((x, 3),)])
+
+def test_view_cubes(all_vars):
+    x, y, z = all_vars["x"], all_vars["y"], all_vars["z"]
+    eset = ExplicitSet([x], [(1,)]).project([x, y, z])
+    assert(eset.view([y, x]).materialize() == {(1, 1), (2, 1), (3, 1)})
+    assert((1, 3, 2) in eset.view())
+
+def test_view_unknown_var(basic_set):
+    w = CategoricalVar("w", range(1,4))
+    with pytest.raises(Exception):
+        basic_set.view([w])
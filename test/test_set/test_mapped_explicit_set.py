@@ -0,0 +1,104 @@
+from contractda.sets import ExplicitSet, ArrayExplicitSet, MappedExplicitSet
+from contractda.vars._var import CategoricalVar
+import numpy as np
+import os
+import random
+import pytest
+
+@pytest.fixture
+def all_vars():
+    return {
+    "x": CategoricalVar("x", range(0,5)),
+    "y": CategoricalVar("y", range(0,4)),
+    "z": CategoricalVar("z", ["a", "b", "c"])
+    }
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch, tmp_path):
+    # a few keys per chunk exercise the streaming merges and the external sort
+    monkeypatch.setattr(MappedExplicitSet, "chunk_size", 3)
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+
+def _random_expr(vars, num_elems, rng):
+    return [tuple([rng.choice(list(var.value_range)) for var in vars]) for _ in range(num_elems)]
+
+@pytest.mark.parametrize("seed", range(5))
+def test_mapped_matches_explicit_set(all_vars, seed):
+    rng = random.Random(seed)
+    x, y, z = all_vars["x"], all_vars["y"], all_vars["z"]
+    vars1, vars2 = [z, x], [y, x]
+    expr1, expr2 = _random_expr(vars1, 12, rng), _random_expr(vars2, 10, rng)
+    mapped1, mapped2 = MappedExplicitSet(vars1, expr1), MappedExplicitSet(vars2, expr2)
+    gold1, gold2 = ExplicitSet(vars1, expr1), ExplicitSet(vars2, expr2)
+
+    for op in ["union", "intersect", "difference"]:
+        ret = getattr(mapped1, op)(mapped2)
+        gold = getattr(gold1, op)(gold2)
+        assert(ret.ordered_vars == gold.ordered_vars)
+        assert(ret.ordered_expr == gold.ordered_expr)
+    assert(mapped1.complement().ordered_expr == gold1.complement().ordered_expr)
+    assert(mapped1.project([x]).ordered_expr == gold1.project([x]).ordered_expr)
+    assert(mapped1.project([x], is_refine=True).ordered_expr == gold1.project([x], is_refine=True).ordered_expr)
+    assert(mapped1.project([x, y, z]).ordered_expr == gold1.project([x, y, z]).ordered_expr)
+    # the other operand is converted
+    assert(mapped1.union(gold2).ordered_expr == gold1.union(gold2).ordered_expr)
+    assert(mapped1.is_subset(mapped1.union(mapped2)))
+    assert(mapped1.is_disjoint(mapped2) == gold1.is_disjoint(gold2))
+    assert(mapped1.is_equivalence(gold1))
+
+def test_mapped_file(all_vars, tmp_path):
+    x, z = all_vars["x"], all_vars["z"]
+    path = str(tmp_path / "a.cdaset")
+    a_set = MappedExplicitSet([z, x], [("a", 1), ("c", 4), ("a", 1)], path=path)
+    assert(a_set.path == path)
+    # the key of (x, z) is 3 * x + z
+    assert(list(a_set.keys) == [3, 14])
+    del a_set
+    # the file given by the user is kept
+    reopened = MappedExplicitSet.open(path, [x, z])
+    assert(reopened.ordered_expr == {(1, "a"), (4, "c")})
+    with pytest.raises(Exception):
+        MappedExplicitSet.open(path, [x, all_vars["y"]])
+
+    temp = reopened.complement()
+    temp_path = temp.path
+    assert(os.path.exists(temp_path))
+    del temp
+    # the temporary results are removed with the set
+    assert(not os.path.exists(temp_path))
+
+def test_mapped_bulk_load(all_vars):
+    x, y, z = all_vars["x"], all_vars["y"], all_vars["z"]
+    rng = np.random.default_rng(0)
+    columns = [rng.integers(0, 5, 50), rng.integers(0, 4, 50), rng.choice(["a", "b", "c"], 50)]
+    table = np.empty((50, 3), dtype=object)
+    for col, column in enumerate(columns):
+        table[:, col] = column
+    chunks = [table[start:start+7] for start in range(0, 50, 7)]
+    a_set = MappedExplicitSet.from_arrays([x, y, z], chunks)
+    expr = {(int(a), int(b), str(c)) for a, b, c in table}
+    assert(a_set.ordered_expr == expr)
+    assert(a_set.ordered_vars == [x, y, z])
+
+    rows = np.concatenate(list(a_set.to_arrays(4)))
+    assert({(int(a), int(b), str(c)) for a, b, c in rows} == expr)
+    # a set over one kind of values keeps the dtype
+    b_set = MappedExplicitSet.from_arrays([y, x], [np.array([[3, 4], [0, 0]])])
+    assert(np.concatenate(list(b_set.to_arrays())).tolist() == [[0, 0], [3, 4]])
+
+def test_mapped_domain(all_vars):
+    x, y = all_vars["x"], all_vars["y"]
+    with pytest.raises(Exception):
+        MappedExplicitSet([x, y], [(1, 4)])
+    with pytest.raises(Exception):
+        MappedExplicitSet.from_arrays([x, y], [np.array([[1, 4]])])
+    a_set = MappedExplicitSet([x, y], [(1, 3)])
+    assert(not a_set.is_contain((1, 4)))
+    assert(a_set.is_contain((1, 3)))
+
+def test_mapped_from_array_explicit_set(all_vars):
+    x, y = all_vars["x"], all_vars["y"]
+    array_set = ArrayExplicitSet([y, x], [(1, 2), (3, 0), (0, 4)])
+    a_set = MappedExplicitSet.from_explicit_set(array_set)
+    assert(a_set.ordered_vars == [y, x])
+    assert(a_set.ordered_expr == array_set.ordered_expr)
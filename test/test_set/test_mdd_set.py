@@ -0,0 +1,115 @@
+from contractda.sets import ExplicitSet, MDDSet, MDDManager, get_default_mdd_manager, set_default_mdd_manager
+from contractda.contracts import AGContract
+from contractda.vars._var import CategoricalVar, BoolVar
+import random
+import pytest
+
+@pytest.fixture(autouse=True)
+def fresh_default_manager():
+    # keep the variable ordering of the default manager independent of the other tests
+    previous = set_default_mdd_manager(MDDManager())
+    yield
+    set_default_mdd_manager(previous)
+
+@pytest.fixture
+def all_vars():
+    return {
+    "x": CategoricalVar("x", range(1,5)),
+    "y": CategoricalVar("y", range(1,5)),
+    "z": CategoricalVar("z", range(1,4))
+    }
+
+def test_mdd_set_model_count(all_vars):
+    x, y, z = all_vars["x"], all_vars["y"], all_vars["z"]
+    a_set = MDDSet([z, x, y], [(1, 2, 3), (2, 3, 1), (1, 3, 2), (1, 2, 3)])
+    assert(a_set.model_count() == 3)
+    assert(a_set.complement().model_count() == 3 * 4 * 4 - 3)
+    # the unconstrained variables multiply the count
+    assert(a_set.project([z, x, y, CategoricalVar("w", range(5))]).model_count() == 15)
+    assert(a_set.project([x]).model_count() == 2)
+    assert(a_set.to_explicit_set().is_equivalence(ExplicitSet([z, x, y], [(1, 2, 3), (2, 3, 1), (1, 3, 2)])))
+    with pytest.raises(Exception):
+        MDDSet([x, y], [(1, 7)])
+
+def test_mdd_manager_cache_eviction():
+    random.seed(0)
+    manager = MDDManager(cache_size=4)
+    vars = [BoolVar(f"b{i}") for i in range(6)]
+    a_set = MDDSet(vars, [tuple(random.choice([False, True]) for _ in vars) for _ in range(10)], manager=manager)
+    b_set = MDDSet(vars, [tuple(random.choice([False, True]) for _ in vars) for _ in range(10)], manager=manager)
+    union = a_set.union(b_set)
+    assert(len(manager._cache) <= 4)
+    assert(union.is_equivalence(b_set.union(a_set)))
+    assert(union.complement().complement().is_equivalence(union))
+    assert(union.model_count() == len(a_set.ordered_expr | b_set.ordered_expr))
+    # sets of different managers cannot be mixed
+    with pytest.raises(Exception):
+        a_set.union(MDDSet(vars, []))
+
+def test_mdd_manager_var_order():
+    ins = [BoolVar(f"i{n}") for n in range(10)]
+    outs = [BoolVar(f"o{n}") for n in range(10)]
+    interleaved = [var for pair in zip(ins, outs) for var in pair]
+    by_id = MDDManager()
+    by_list = MDDManager(var_order=interleaved)
+    by_key = MDDManager(var_order=lambda var: (int(var.id[1:]), var.id[0]))
+    sizes = []
+    for manager in [by_id, by_list, by_key]:
+        copy_set = MDDSet([], [tuple()], manager=manager)
+        for i, o in zip(ins, outs):
+            copy_set = copy_set.intersect(MDDSet([i, o], [(False, False), (True, True)], manager=manager))
+        assert(copy_set.model_count() == 2**10)
+        sizes.append(manager.num_nodes)
+    # ordering by id puts all inputs before the outputs and the diagram grows exponentially
+    assert(sizes[0] > 10 * max(sizes[1], sizes[2]))
+    assert([var.id for var in MDDSet(ins[:2] + outs[:2], [], manager=by_list).internal_vars] == ["i0", "o0", "i1", "o1"])
+    # variables with the same id are ordered by when the manager first sees them
+    twin = BoolVar("i0")
+    merged = MDDSet([twin], [], manager=by_id).union(MDDSet([ins[0]], [], manager=by_id))
+    assert(merged.internal_vars == [ins[0], twin])
+
+def test_mdd_default_manager():
+    manager = MDDManager()
+    previous = set_default_mdd_manager(manager)
+    try:
+        assert(get_default_mdd_manager() is manager)
+        assert(MDDSet([BoolVar("a")], [tuple([True])]).manager is manager)
+    finally:
+        set_default_mdd_manager(previous)
+    assert(get_default_mdd_manager() is previous)
+
+@pytest.mark.timeout(60)
+def test_mdd_set_many_boolean_ports():
+    ins = [BoolVar(f"i{n:03d}") for n in range(200)]
+    outs = [BoolVar(f"o{n:03d}") for n in range(200)]
+    # interleave each input with its output, otherwise the copy constraints are exponential
+    manager = MDDManager(var_order=[var for pair in zip(ins, outs) for var in pair])
+    # guarantee: each output copies its input
+    guarantee = MDDSet([], [tuple()], manager=manager)
+    for i, o in zip(ins, outs):
+        guarantee = guarantee.intersect(MDDSet([i, o], [(False, False), (True, True)], manager=manager))
+    assumption = MDDSet([ins[0]], [tuple([True])], manager=manager)
+    contract = AGContract(vars=ins + outs, assumption=assumption, guarantee=guarantee)
+    assert(guarantee.model_count() == 2**200)
+    assert(contract.is_receptive())
+    assert(contract.is_compatible() and contract.is_consistent())
+    assert(contract.implementation.model_count() == 2**400 - 2**399 + 2**199)
+
+@pytest.mark.timeout(60)
+def test_mdd_set_deeper_than_recursion_limit():
+    bits = [BoolVar(f"b{n:04d}") for n in range(3000)]
+    manager = MDDManager()
+    # the set of all-false and all-true assignments is a diagram with one node per variable per path
+    chain = MDDSet(bits, [tuple([False] * len(bits)), tuple([True] * len(bits))], manager=manager)
+    assert(chain.model_count() == 2)
+    assert(chain.complement().model_count() == 2**3000 - 2)
+    assert(chain.project(bits[:10]).model_count() == 2)
+    assert(chain.is_contain(tuple([True] * len(bits))))
+    assert(len(chain.get_enumeration()) == 2)
+
+def test_mdd_contract_independence_not_implemented():
+    x = CategoricalVar("x", range(0,2))
+    y = CategoricalVar("y", range(0,2))
+    c = AGContract(vars=[x], assumption=MDDSet([x], [tuple([0])]), guarantee=MDDSet([x, y], [(0, 1)]))
+    with pytest.raises(NotImplementedError):
+        c.is_independent_decomposition_of(c, c)
@@ -21,58 +21,58 @@ def test_autosim_boundary_generate_eq(x, y):
 
     ib, ob = c.assumption._generate_boundary_set(d=1, max_depth = 2, node=c.assumption.expr.root)
     assert(len(ib) == 1)
-    assert(str(ib[0]) == "(x==5.0)")
+    assert(str(ib[0]) == "(x==5)")
     assert(len(ob) == 1)
-    assert(str(ob[0]) == "(x!=5.0)")
+    assert(str(ob[0]) == "(x!=5)")
 
 def test_autosim_boundary_generate_neq(x, y):
     c = AGContract([x, y], assumption="x != 5", guarantee="y <= 2*x && y >= 1.8*x")
 
     ib, ob = c.assumption._generate_boundary_set(d=1, max_depth = 2, node=c.assumption.expr.root)
     assert(len(ib) == 1)
-    assert(str(ib[0]) == "(x!=5.0)")
+    assert(str(ib[0]) == "(x!=5)")
     assert(len(ob) == 1)
-    assert(str(ob[0]) == "(x==5.0)")
+    assert(str(ob[0]) == "(x==5)")
 
 def test_autosim_boundary_generate_lt(x, y):
     c = AGContract([x, y], assumption="x < 5", guarantee="y <= 2*x && y >= 1.8*x")
 
     ib, ob = c.assumption._generate_boundary_set(d=1, max_depth = 2, node=c.assumption.expr.root)
     assert(len(ib) == 1)
-    assert(str(ib[0]) == "(x<5.0)")
+    assert(str(ib[0]) == "(x<5)")
     assert(len(ob) == 2)
-    assert(str(ob[0]) == "(x==5.0)")
-    assert(str(ob[1]) == "(x>5.0)")
+    assert(str(ob[0]) == "(x==5)")
+    assert(str(ob[1]) == "(x>5)")
 
 def test_autosim_boundary_generate_le(x, y):
     c = AGContract([x, y], assumption="x <= 5", guarantee="y <= 2*x && y >= 1.8*x")
 
     ib, ob = c.assumption._generate_boundary_set(d=1, max_depth = 2, node=c.assumption.expr.root)
     assert(len(ib) == 2)
-    assert(str(ib[0]) == "(x<5.0)")
-    assert(str(ib[1]) == "(x==5.0)")
+    assert(str(ib[0]) == "(x<5)")
+    assert(str(ib[1]) == "(x==5)")
     assert(len(ob) == 1)
-    assert(str(ob[0]) == "(x>5.0)")
+    assert(str(ob[0]) == "(x>5)")
 
 def test_autosim_boundary_generate_ge(x, y):
     c = AGContract([x, y], assumption="x >= 5", guarantee="y <= 2*x && y >= 1.8*x")
 
     ib, ob = c.assumption._generate_boundary_set(d=1, max_depth = 2, node=c.assumption.expr.root)
     assert(len(ib) == 2)
-    assert(str(ib[0]) == "(x>5.0)")
-    assert(str(ib[1]) == "(x==5.0)")
+    assert(str(ib[0]) == "(x>5)")
+    assert(str(ib[1]) == "(x==5)")
     assert(len(ob) == 1)
-    assert(str(ob[0]) == "(x<5.0)")
+    assert(str(ob[0]) == "(x<5)")
 
 def test_autosim_boundary_generate_gt(x, y):
     c = AGContract([x, y], assumption="x > 5", guarantee="y <= 2*x && y >= 1.8*x")
 
     ib, ob = c.assumption._generate_boundary_set(d=1, max_depth = 2, node=c.assumption.expr.root)
     assert(len(ib) == 1)
-    assert(str(ib[0]) == "(x>5.0)")
+    assert(str(ib[0]) == "(x>5)")
     assert(len(ob) == 2)
-    assert(str(ob[0]) == "(x==5.0)")
-    assert(str(ob[1]) == "(x<5.0)")
+    assert(str(ob[0]) == "(x==5)")
+    assert(str(ob[1]) == "(x<5)")
 
 def test_autosim_boundary_generate_and(x, y, z):
     c = AGContract([x, y, z], assumption="x <= 5 && y >= 3", guarantee="z == x + y")
@@ -131,10 +131,10 @@ def test_autosim_public_boundary_generate_set(x, y, z):
 
 #     ib, ob = c.assumption._boundary_create_branch(expr=c.assumption.expr)
 #     assert(len(ib) == 2)
-#     assert(str(ib[0]) == "(x<5.0)")
-#     assert(str(ib[1]) == "(x==5.0)")
+#     assert(str(ib[0]) == "(x<5)")
+#     assert(str(ib[1]) == "(x==5)")
 #     assert(len(ob) == 1)
-#     assert(str(ob[0]) == "(x>5.0)")
+#     assert(str(ob[0]) == "(x>5)")
 
 # def test_autosim_boundary_generate_ge(x, y):
 #     x = RealVar("x")
@@ -143,10 +143,10 @@ def test_autosim_public_boundary_generate_set(x, y, z):
 
 #     ib, ob = c.assumption._boundary_create_branch(expr=c.assumption.expr)
 #     assert(len(ib) == 2)
-#     assert(str(ib[0]) == "(x>5.0)")
-#     assert(str(ib[1]) == "(x==5.0)")
+#     assert(str(ib[0]) == "(x>5)")
+#     assert(str(ib[1]) == "(x==5)")
 #     assert(len(ob) == 1)
-#     assert(str(ob[0]) == "(x<5.0)")
+#     assert(str(ob[0]) == "(x<5)")
 
 # def test_autosim_boundary_generate_lt(x, y):
 #     x = RealVar("x")
@@ -155,10 +155,10 @@ def test_autosim_public_boundary_generate_set(x, y, z):
 
 #     ib, ob = c.assumption._boundary_create_branch(expr=c.assumption.expr)
 #     assert(len(ib) == 1)
-#     assert(str(ib[0]) == "(x<5.0)")
+#     assert(str(ib[0]) == "(x<5)")
 #     assert(len(ob) == 2)
-#     assert(str(ob[0]) == "(x==5.0)")
-#     assert(str(ob[1]) == "(x>5.0)")
+#     assert(str(ob[0]) == "(x==5)")
+#     assert(str(ob[1]) == "(x>5)")
 
 # def test_autosim_boundary_generate_gt(x, y):
 #     x = RealVar("x")
@@ -167,10 +167,10 @@ def test_autosim_public_boundary_generate_set(x, y, z):
 
 #     ib, ob = c.assumption._boundary_create_branch(expr=c.assumption.expr)
 #     assert(len(ib) == 1)
-#     assert(str(ib[0]) == "(x>5.0)")
+#     assert(str(ib[0]) == "(x>5)")
 #     assert(len(ob) == 2)
-#     assert(str(ob[0]) == "(x==5.0)")
-#     assert(str(ob[1]) == "(x<5.0)")
+#     assert(str(ob[0]) == "(x==5)")
+#     assert(str(ob[1]) == "(x<5)")
 
 # def test_autosim_boundary_generate_ineq(x, y):
 #     x = RealVar("x")
@@ -179,9 +179,9 @@ def test_autosim_public_boundary_generate_set(x, y, z):
 
 #     ib, ob = c.assumption._boundary_create_branch(expr=c.assumption.expr)
 #     assert(len(ib) == 1)
-#     assert(str(ib[0]) == "(x!=5.0)")
+#     assert(str(ib[0]) == "(x!=5)")
 #     assert(len(ob) == 1)
-#     assert(str(ob[0]) == "(x==5.0)")
+#     assert(str(ob[0]) == "(x==5)")
 
 # def test_autosim_boundary_generate_and(x, y):
 #     x = RealVar("x")
@@ -190,11 +190,11 @@ def test_autosim_public_boundary_generate_set(x, y, z):
 
 #     ib, ob = c.assumption._boundary_create_branch(expr=c.assumption.expr)
 #     assert(len(ib) == 1)
-#     assert(str(ib[0]) == "((x<=5.0)&&(x>=3.0))")
+#     assert(str(ib[0]) == "((x<=5)&&(x>=3))")
 #     assert(len(ob) == 3)
-#     assert(str(ob[0]) == "((x<=5.0)&&(!(x>=3.0)))")
-#     assert(str(ob[1]) == "((!(x<=5.0))&&(x>=3.0))")
-#     assert(str(ob[2]) == "((!(x<=5.0))&&(!(x>=3.0)))")
+#     assert(str(ob[0]) == "((x<=5)&&(!(x>=3)))")
+#     assert(str(ob[1]) == "((!(x<=5))&&(x>=3))")
+#     assert(str(ob[2]) == "((!(x<=5))&&(!(x>=3)))")
 
 # def test_autosim_boundary_generate_and(x, y):
 #     x = RealVar("x")
@@ -203,11 +203,11 @@ def test_autosim_public_boundary_generate_set(x, y, z):
 
 #     ib, ob = c.assumption._boundary_create_branch(expr=c.assumption.expr)
 #     assert(len(ib) == 3)
-#     assert(str(ib[0]) == "((x<=5.0)&&(x>=3.0))")
-#     assert(str(ib[1]) == "((x<=5.0)&&(!(x>=3.0)))")
-#     assert(str(ib[2]) == "((!(x<=5.0))&&(x>=3.0))")
+#     assert(str(ib[0]) == "((x<=5)&&(x>=3))")
+#     assert(str(ib[1]) == "((x<=5)&&(!(x>=3)))")
+#     assert(str(ib[2]) == "((!(x<=5))&&(x>=3))")
 #     assert(len(ob) == 1)
-#     assert(str(ob[0]) == "((!(x<=5.0))&&(!(x>=3.0)))")
+#     assert(str(ob[0]) == "((!(x<=5))&&(!(x>=3)))")
 
 # def test_autosim_boundary_generate_imply(x, y):
 #     x = RealVar("x")
@@ -216,9 +216,9 @@ def test_autosim_public_boundary_generate_set(x, y, z):
 
 #     ib, ob = c.assumption._boundary_create_branch(expr=c.assumption.expr)
 #     assert(len(ib) == 3)
-#     assert(str(ib[0]) == "((x<=5.0)&&(x>=3.0))")
-#     assert(str(ib[1]) == "((!(x<=5.0))&&(x>=3.0))")
-#     assert(str(ib[2]) == "((!(x<=5.0))&&(!(x>=3.0)))")
+#     assert(str(ib[0]) == "((x<=5)&&(x>=3))")
+#     assert(str(ib[1]) == "((!(x<=5))&&(x>=3))")
+#     assert(str(ib[2]) == "((!(x<=5))&&(!(x>=3)))")
 #     assert(len(ob) == 1)
-#     assert(str(ob[0]) == "((x<=5.0)&&(!(x>=3.0)))")
+#     assert(str(ob[0]) == "((x<=5)&&(!(x>=3)))")
     
\ No newline at end of file
@@ -66,6 +66,17 @@ def test_evaluator():
     obj_val = sim.evaluate_range(stimulus=sti)
     assert(obj_val == ([150], [150]))
 
+def test_evaluator_behavior():
+    x = RealVar("x")
+    y = RealVar("y")
+    obj = RealVar("obj")
+    eval = ClauseEvaluator(FOLClauseSet(vars = [x, y, obj], expr= "obj == x+y"), clause_objective=[obj])
+    assert(eval.evaluate(behavior=Stimulus({x: 1, y: 2, obj: 3})) == [3])
+    with pytest.raises(Exception):
+        eval.evaluate(behavior=Stimulus({x: 1, y: 2, obj: 4}))
+    # the objective is found by the solver if the behavior does not assign it
+    assert(eval.evaluate(behavior=Stimulus({x: 1, y: 2})) == [3])
+
 def test_evaluator_env():
     x = RealVar("x")
     y = RealVar("y")